@@ -6,13 +6,37 @@
 - openai：从 `OPENAI_API_KEY`（可选 `OPENAI_BASE_URL`）读取
 - siliconflow：从 `SILICONFLOW_API_KEY`（可选 `SILICONFLOW_BASE_URL`，默认 `https://api.siliconflow.cn/v1`）读取
 - deepseek：从 `DEEPSEEK_API_KEY`（可选 `DEEPSEEK_BASE_URL`，默认 `https://api.deepseek.com`）读取
+- mock：离线模拟提供方，无需密钥与网络，返回确定性的设计点（见 Scripts.mock_llm）
+
+客户端按 (provider, base_url, key 哈希) 注册并跨请求复用，保留 HTTP keep-alive 连接池与 TLS 会话；
+注册表为 LRU，超过上限时淘汰最久未取用的客户端，并在不再被任何运行持有后关闭其连接池；
+每次调用带超时，对 429 / 5xx / 连接错误按带抖动的指数退避重试，并限制每个提供方的并发请求数。
+调用方显式传入的 `timeout` 视为整个调用（等待并发名额、各次尝试与退避）的时间预算，预算用尽后不再重试。
+`create_async_client` 提供 asyncio 版本（AsyncOpenAI，供 ASGI 服务使用）：注册表与并发上限按事件循环分别维护。
+默认值可由环境变量覆盖：
+- `LLM_TIMEOUT`：单次调用超时秒数（默认 60）
+- `LLM_MAX_RETRIES`：最大重试次数（默认 3）
+- `LLM_MAX_CONCURRENCY`：每个提供方的最大并发请求数（默认 16）
+- `LLM_MAX_CLIENTS`：注册表保留的客户端数上限（默认 32；异步注册表按事件循环分别计数）
+openai SDK 导入耗时较长，仅在首次创建真实提供方的客户端时导入（mock 提供方与服务启动不需要它）。
 """
 
+import asyncio
+import atexit
+import hashlib
 import os
+import random
+import sys
+import threading
+import time
+import weakref
+from collections import OrderedDict, deque
 from pathlib import Path
+from types import SimpleNamespace
 
 from dotenv import load_dotenv
-from openai import OpenAI
+
+from Scripts.mock_llm import AsyncMockClient, MockClient
 
 # 加载.env文件
 load_dotenv()
@@ -22,31 +46,355 @@ env_path = Path(__file__).parent.parent / '.env'
 if env_path.exists():
     load_dotenv(env_path)
 
-def create_client(provider, api_key=None, base_url=None):
-    """根据指定提供方创建 OpenAI 兼容客户端
+DEFAULT_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))
+DEFAULT_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+DEFAULT_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+MAX_CLIENTS = int(os.getenv("LLM_MAX_CLIENTS", "32"))
+BACKOFF_BASE = 0.5  # 首次重试的退避上限（秒）
+BACKOFF_MAX = 30.0  # 单次退避的最大秒数
 
-    参数：
-    - provider: 提供方标识（'openai' | 'siliconflow' | 'deepseek'，大小写不敏感）
-    - api_key: 可选，若为空则从对应环境变量读取
-    - base_url: 可选，若为空则从对应环境变量读取；部分提供方有默认值
+_PROVIDER_LIMITS = {}
+_REGISTRY_LOCK = threading.Lock()
+# 异步客户端与 asyncio 信号量绑定事件循环，按循环分别注册
+_ASYNC_CLIENTS = weakref.WeakKeyDictionary()
+_ASYNC_LIMITS = weakref.WeakKeyDictionary()
+_CLOSING = set()  # 正在关闭淘汰客户端的异步任务（保持引用直至完成）
 
-    返回：
-    - OpenAI 客户端实例，可用于 `chat.completions.create(...)` 等接口
 
-    异常：
-    - ValueError: 当提供方不受支持时抛出
+class _ClientRegistry:
+    """按注册表键复用底层客户端的 LRU 注册表
+
+    超过 max_clients 时淘汰最久未取用的条目；被淘汰的客户端在所有持有它的包装客户端
+    （PooledClient / AsyncPooledClient）被回收后才关闭，不会中断仍在进行的运行。
+    回收通知由 weakref.finalize 放入队列，在下次 acquire 时处理，避免在垃圾回收回调中加锁。
+
+    参数：
+    - max_clients: 保留的客户端数上限
     """
+
+    def __init__(self, max_clients=MAX_CLIENTS):
+        self.max_clients = max(1, int(max_clients))
+        self._entries = OrderedDict()  # 注册表键 -> [客户端, 持有者数]
+        self._evicted = []
+        self._released = deque()
+        self._lock = threading.Lock()
+
+    def acquire(self, key, factory):
+        """
+        取得注册表键对应的客户端（不存在时调用 factory 创建）并登记一个持有者。
+        返回：
+        - (entry, closing)：条目（传给 track）与此时可以关闭的淘汰客户端列表
+        """
+        with self._lock:
+            while self._released:
+                self._released.popleft()[1] -= 1
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = [factory(), 0]
+            self._entries.move_to_end(key)
+            entry[1] += 1
+            while len(self._entries) > self.max_clients:
+                self._evicted.append(self._entries.popitem(last=False)[1])
+            closing = [e[0] for e in self._evicted if e[1] <= 0]
+            self._evicted = [e for e in self._evicted if e[1] > 0]
+        return entry, closing
+
+    def track(self, owner, entry):
+        """owner 被回收时释放其对 entry 的持有"""
+        weakref.finalize(owner, self._released.append, entry)
+
+    def clear(self):
+        """清空注册表，返回全部客户端（含已淘汰但仍被持有的）"""
+        with self._lock:
+            clients = [e[0] for e in self._entries.values()] + [e[0] for e in self._evicted]
+            self._entries.clear()
+            self._evicted = []
+        return clients
+
+    def __len__(self):
+        return len(self._entries)
+
+
+_CLIENTS = _ClientRegistry()
+
+
+def _resolve_provider(provider, api_key=None, base_url=None):
+    """解析提供方对应的 (provider, api_key, base_url)；不支持时抛出 ValueError"""
     p = (provider or "").lower()
     if p == "openai":
         key = api_key or os.getenv("OPENAI_API_KEY")# 此处将api_key填写为你的OPENAI_API_KEY
-        return OpenAI(api_key=key) 
+        return p, key, None
     if p == "siliconflow":
         key = api_key or os.getenv("SILICONFLOW_API_KEY")# 此处将api_key填写为你的SILICONFLOW_API_KEY
         url = base_url or os.getenv("SILICONFLOW_BASE_URL") or "https://api.siliconflow.cn/v1"
-        return OpenAI(api_key=key, base_url=url)
+        return p, key, url
     if p == "deepseek":
         key = api_key or os.getenv("DEEPSEEK_API_KEY")# 此处将api_key填写为你的DEEPSEEK_API_KEY
         url = base_url or os.getenv("DEEPSEEK_BASE_URL") or "https://api.deepseek.com"
-        return OpenAI(api_key=key, base_url=url)
+        return p, key, url
     raise ValueError("unsupported provider")
 
+
+def _is_retryable(error):
+    """429、5xx 与连接 / 超时错误可重试；其余（鉴权、参数错误等）直接抛出"""
+    # openai 尚未导入时不可能出现其异常类型，无需为判断而导入
+    openai = sys.modules.get("openai")
+    if openai is None:
+        return False
+    if isinstance(error, openai.APIConnectionError):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return False
+
+
+def _retry_after(error):
+    """读取响应头 Retry-After（秒），没有时返回 None"""
+    response = getattr(error, "response", None)
+    value = response.headers.get("retry-after") if response is not None else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def _backoff_delay(error, attempt):
+    """重试前的等待秒数：优先使用 Retry-After，否则在 [0, min(上限, base * 2^attempt)] 内均匀取值（全抖动）"""
+    delay = _retry_after(error)
+    if delay is None:
+        delay = random.uniform(0.0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+    return min(delay, BACKOFF_MAX)
+
+
+def _budget_end(kwargs):
+    """调用方显式传入 timeout（秒）时返回该预算的截止时刻（time.monotonic），否则返回 None"""
+    timeout = kwargs.get("timeout")
+    return time.monotonic() + float(timeout) if isinstance(timeout, (int, float)) else None
+
+
+def _remaining(end):
+    """距截止时刻的剩余秒数（不小于 0）；end 为 None 时返回 None"""
+    return None if end is None else max(0.0, end - time.monotonic())
+
+
+class _Completions:
+    """提供 `chat.completions.create(...)` 接口，转发到 PooledClient 的重试逻辑"""
+
+    def __init__(self, owner):
+        self._owner = owner
+
+    def create(self, **kwargs):
+        return self._owner._create(**kwargs)
+
+
+class _Chat:
+    def __init__(self, owner):
+        self.completions = _Completions(owner)
+
+
+class PooledClient:
+    """共享底层 OpenAI 客户端（连接池）的轻量包装：超时、抖动指数退避重试与提供方并发上限
+
+    参数：
+    - client: 注册表中共享的 OpenAI 实例（自身不重试）
+    - provider: 提供方标识
+    - semaphore: 该提供方的并发上限信号量
+    - timeout: 单次调用超时秒数（调用时未显式传入 timeout 时使用）
+    - max_retries: 最大重试次数
+    """
+
+    def __init__(self, client, provider, semaphore, timeout=DEFAULT_TIMEOUT, max_retries=DEFAULT_MAX_RETRIES):
+        self.client = client
+        self.provider = provider
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self._semaphore = semaphore
+        self.chat = _Chat(self)
+
+    def _create(self, **kwargs):
+        end = _budget_end(kwargs)
+        kwargs.setdefault("timeout", self.timeout)
+        attempt = 0
+        while True:
+            if not self._semaphore.acquire(timeout=_remaining(end)):
+                raise TimeoutError("等待 LLM 并发名额超出时间预算")
+            try:
+                if end is not None:
+                    kwargs["timeout"] = _remaining(end)
+                return self.client.chat.completions.create(**kwargs)
+            except Exception as e:
+                if attempt >= self.max_retries or not _is_retryable(e):
+                    raise
+                delay = _backoff_delay(e, attempt)
+                if end is not None and delay >= _remaining(end):
+                    # 剩余预算不足以退避后再试
+                    raise
+            finally:
+                self._semaphore.release()
+            # 退避等待期间不占用并发名额
+            time.sleep(delay)
+            attempt += 1
+
+
+class _AsyncCompletions:
+    """提供 `await chat.completions.create(...)` 接口，转发到 AsyncPooledClient 的重试逻辑"""
+
+    def __init__(self, owner):
+        self._owner = owner
+
+    async def create(self, **kwargs):
+        return await self._owner._create(**kwargs)
+
+
+class AsyncPooledClient:
+    """PooledClient 的 asyncio 版本：等待回复与退避期间不占用线程
+
+    参数：
+    - client: 当前事件循环注册表中共享的 AsyncOpenAI 实例（自身不重试）
+    - provider: 提供方标识
+    - semaphore: 该提供方在当前事件循环中的 asyncio 并发上限信号量
+    - timeout: 单次调用超时秒数（调用时未显式传入 timeout 时使用）
+    - max_retries: 最大重试次数
+    """
+
+    def __init__(self, client, provider, semaphore, timeout=DEFAULT_TIMEOUT, max_retries=DEFAULT_MAX_RETRIES):
+        self.client = client
+        self.provider = provider
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self._semaphore = semaphore
+        self.chat = SimpleNamespace(completions=_AsyncCompletions(self))
+
+    async def _create(self, **kwargs):
+        end = _budget_end(kwargs)
+        kwargs.setdefault("timeout", self.timeout)
+        attempt = 0
+        while True:
+            await asyncio.wait_for(self._semaphore.acquire(), _remaining(end))
+            try:
+                if end is not None:
+                    kwargs["timeout"] = _remaining(end)
+                return await self.client.chat.completions.create(**kwargs)
+            except Exception as e:
+                if attempt >= self.max_retries or not _is_retryable(e):
+                    raise
+                delay = _backoff_delay(e, attempt)
+                if end is not None and delay >= _remaining(end):
+                    raise
+            finally:
+                self._semaphore.release()
+            await asyncio.sleep(delay)
+            attempt += 1
+
+
+def _provider_semaphore(provider, max_concurrency):
+    with _REGISTRY_LOCK:
+        semaphore = _PROVIDER_LIMITS.get(provider)
+        if semaphore is None:
+            semaphore = threading.BoundedSemaphore(max(1, int(max_concurrency)))
+            _PROVIDER_LIMITS[provider] = semaphore
+        return semaphore
+
+
+def close_clients():
+    """关闭注册表中的所有客户端连接池（进程退出时自动调用）"""
+    for client in _CLIENTS.clear():
+        client.close()
+
+
+atexit.register(close_clients)
+
+
+def _registry_key(provider, api_key=None, base_url=None):
+    """解析提供方并计算注册表键；返回 (provider, api_key, base_url, registry_key)"""
+    if (provider or "").lower() == "mock":
+        key, url = None, None
+        p = "mock"
+    else:
+        p, key, url = _resolve_provider(provider, api_key, base_url)
+    key_hash = hashlib.sha256((key or "").encode("utf-8")).hexdigest()[:16]
+    return p, key, url, (p, url, key_hash)
+
+
+def create_client(provider, api_key=None, base_url=None, timeout=None, max_retries=None, max_concurrency=None):
+    """根据指定提供方获取 OpenAI 兼容客户端（底层连接池按提供方、地址与密钥复用）
+
+    参数：
+    - provider: 提供方标识（'openai' | 'siliconflow' | 'deepseek' | 'mock'，大小写不敏感）
+    - api_key: 可选，若为空则从对应环境变量读取
+    - base_url: 可选，若为空则从对应环境变量读取；部分提供方有默认值
+    - timeout: 可选，单次调用超时秒数（默认 LLM_TIMEOUT）
+    - max_retries: 可选，429 / 5xx / 连接错误的最大重试次数（默认 LLM_MAX_RETRIES）
+    - max_concurrency: 可选，该提供方的最大并发请求数（首次创建时生效，默认 LLM_MAX_CONCURRENCY）
+
+    返回：
+    - PooledClient 实例，可用于 `chat.completions.create(...)` 接口
+
+    异常：
+    - ValueError: 当提供方不受支持时抛出
+    """
+    p, key, url, registry_key = _registry_key(provider, api_key, base_url)
+
+    def factory():
+        if p == "mock":
+            return MockClient()
+        from openai import OpenAI
+
+        # 重试由 PooledClient 统一处理，底层客户端不再自行重试
+        return OpenAI(api_key=key, base_url=url, max_retries=0)
+
+    entry, closing = _CLIENTS.acquire(registry_key, factory)
+    for stale in closing:
+        stale.close()
+    semaphore = _provider_semaphore(p, max_concurrency or DEFAULT_MAX_CONCURRENCY)
+    pooled = PooledClient(
+        entry[0], p, semaphore,
+        timeout=float(timeout) if timeout is not None else DEFAULT_TIMEOUT,
+        max_retries=int(max_retries) if max_retries is not None else DEFAULT_MAX_RETRIES,
+    )
+    _CLIENTS.track(pooled, entry)
+    return pooled
+
+
+def create_async_client(provider, api_key=None, base_url=None, timeout=None, max_retries=None, max_concurrency=None):
+    """create_client 的 asyncio 版本，须在事件循环中调用（参数同 create_client）
+
+    返回：
+    - AsyncPooledClient 实例，可用于 `await chat.completions.create(...)` 接口
+    """
+    p, key, url, registry_key = _registry_key(provider, api_key, base_url)
+    loop = asyncio.get_running_loop()
+    registry = _ASYNC_CLIENTS.get(loop)
+    if registry is None:
+        registry = _ASYNC_CLIENTS[loop] = _ClientRegistry()
+
+    def factory():
+        if p == "mock":
+            return AsyncMockClient()
+        from openai import AsyncOpenAI
+
+        return AsyncOpenAI(api_key=key, base_url=url, max_retries=0)
+
+    entry, closing = registry.acquire(registry_key, factory)
+    for stale in closing:
+        task = loop.create_task(stale.close())
+        _CLOSING.add(task)
+        task.add_done_callback(_CLOSING.discard)
+    limits = _ASYNC_LIMITS.setdefault(loop, {})
+    semaphore = limits.get(p)
+    if semaphore is None:
+        semaphore = limits[p] = asyncio.BoundedSemaphore(max(1, int(max_concurrency or DEFAULT_MAX_CONCURRENCY)))
+    pooled = AsyncPooledClient(
+        entry[0], p, semaphore,
+        timeout=float(timeout) if timeout is not None else DEFAULT_TIMEOUT,
+        max_retries=int(max_retries) if max_retries is not None else DEFAULT_MAX_RETRIES,
+    )
+    registry.track(pooled, entry)
+    return pooled
+
+
+async def aclose_clients():
+    """关闭当前事件循环注册的所有异步客户端连接池（ASGI 服务关闭时调用）"""
+    registry = _ASYNC_CLIENTS.pop(asyncio.get_running_loop(), None)
+    for client in registry.clear() if registry is not None else ():
+        await client.close()
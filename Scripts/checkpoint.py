@@ -0,0 +1,141 @@
+"""LLM-RBDO 优化检查点模块
+把优化循环的状态（当前 / 最优设计点、LLM 历史消息、停滞计数、随机数状态、公共随机数基矩阵等）
+保存为紧凑的 .npz 文件：数值数组直接存储，其余元数据编码为 JSON 字符串。
+写入采用“临时文件 + 原子替换”，服务器崩溃时不会留下半个检查点。
+检查点统一保存在 RBDO_CHECKPOINT_DIR（默认 checkpoints/）下，按名称引用。
+"""
+
+import json
+import os
+import re
+import tempfile
+
+import numpy as np
+
+CHECKPOINT_DIR = os.getenv("RBDO_CHECKPOINT_DIR", "checkpoints")
+FORMAT_VERSION = 1
+_NAME_RE = re.compile(r"^[A-Za-z0-9_.-]+$")
+
+
+def _to_builtin(value):
+    """把 numpy 标量 / 数组转换为可 JSON 序列化的 Python 对象"""
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, dict):
+        return {k: _to_builtin(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_builtin(v) for v in value]
+    return value
+
+
+class OptimizerState:
+    """优化循环状态（每次迭代结束时的快照）
+
+    参数：
+    - scenario: 场景 id
+    - iteration: 已完成的迭代次数
+    - best_point / current_point: 最优设计点与当前设计点
+    - best_cost / best_penalty / best_reliabilities: 最优点的目标函数值、惩罚与可靠度
+    - messages: 提供给 LLM 的历史消息列表
+    - stagnation_count: 停滞计数
+    - random_state: 本次运行随机数生成器的状态（扰动与蒙特卡洛样本使用），即 np.random.Generator.bit_generator.state
+    - engine_state: 公共随机数引擎状态（SamplingEngine.get_state()），未启用时为 None
+    - cache_stats: 评估缓存命中统计
+    """
+
+    def __init__(self, scenario, iteration, best_point, best_cost, best_penalty, best_reliabilities,
+                 current_point, messages, stagnation_count, random_state=None, engine_state=None, cache_stats=None):
+        self.scenario = scenario
+        self.iteration = int(iteration)
+        self.best_point = np.asarray(best_point, dtype=float)
+        self.best_cost = float(best_cost)
+        self.best_penalty = float(best_penalty)
+        self.best_reliabilities = np.asarray(best_reliabilities, dtype=float)
+        self.current_point = np.asarray(current_point, dtype=float)
+        self.messages = _to_builtin(list(messages))
+        self.stagnation_count = int(stagnation_count)
+        self.random_state = random_state
+        self.engine_state = engine_state
+        self.cache_stats = dict(cache_stats or {})
+
+    def to_arrays(self):
+        """编码为 np.savez 所需的数组字典"""
+        arrays = {
+            "best_point": self.best_point,
+            "best_reliabilities": self.best_reliabilities,
+            "current_point": self.current_point,
+        }
+        meta = {
+            "version": FORMAT_VERSION,
+            "scenario": self.scenario,
+            "iteration": self.iteration,
+            "best_cost": self.best_cost,
+            "best_penalty": self.best_penalty,
+            "messages": self.messages,
+            "stagnation_count": self.stagnation_count,
+            "cache_stats": self.cache_stats,
+            "random_state": None,
+            "engine_state": None,
+        }
+        if self.random_state is not None:
+            meta["random_state"] = _to_builtin(self.random_state)
+        if self.engine_state is not None:
+            engine_meta = {k: v for k, v in self.engine_state.items() if k != "base"}
+            if self.engine_state.get("base") is not None:
+                arrays["engine_base"] = np.asarray(self.engine_state["base"])
+            meta["engine_state"] = _to_builtin(engine_meta)
+        arrays["meta"] = np.array(json.dumps(meta))
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, data):
+        """由 np.load 读出的数组解码"""
+        meta = json.loads(str(data["meta"]))
+        if meta.get("version") != FORMAT_VERSION:
+            raise ValueError(f"不支持的检查点版本：{meta.get('version')}")
+        engine_state = None
+        if meta["engine_state"] is not None:
+            engine_state = dict(meta["engine_state"], base=np.array(data["engine_base"]) if "engine_base" in data else None)
+        return cls(
+            meta["scenario"], meta["iteration"], data["best_point"], meta["best_cost"], meta["best_penalty"],
+            data["best_reliabilities"], data["current_point"], meta["messages"], meta["stagnation_count"],
+            random_state=meta["random_state"], engine_state=engine_state, cache_stats=meta.get("cache_stats"),
+        )
+
+
+def checkpoint_path(name, directory=None):
+    """
+    由检查点名称得到文件路径；名称只允许字母、数字、下划线、点与连字符，防止路径穿越。
+    返回：
+    - 形如 <directory>/<name>.npz 的路径
+    """
+    name = str(name or "")
+    if name.endswith(".npz"):
+        name = name[:-4]
+    if not _NAME_RE.match(name) or name in (".", ".."):
+        raise ValueError(f"无效的检查点名称：{name!r}")
+    return os.path.join(directory or CHECKPOINT_DIR, f"{name}.npz")
+
+
+def save_checkpoint(state, name, directory=None):
+    """原子写入检查点：先写同目录临时文件，再用 os.replace 替换目标文件；返回文件路径"""
+    path = checkpoint_path(name, directory)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".npz.tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, **state.to_arrays())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return path
+
+
+def load_checkpoint(name, directory=None):
+    """读取检查点并返回 OptimizerState；文件不存在时抛出 FileNotFoundError"""
+    with np.load(checkpoint_path(name, directory), allow_pickle=False) as data:
+        return OptimizerState.from_arrays(data)
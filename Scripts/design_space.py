@@ -0,0 +1,100 @@
+"""LLM-RBDO 设计空间模块
+每次运行构建一次 DesignSpace：按变量序号排好的变量名与上下界数组在构建时预先算好，
+连续设计点与 LLM 使用的整数编码之间的映射、越界判断与截断均对 (K, d) 数组向量化进行，
+避免逐坐标的 Python 循环与字典查找。
+"""
+
+import numpy as np
+
+
+def sorted_range_keys(ranges_raw):
+    """按变量序号排序范围字典的键（x1_range, x2_range, ...）"""
+    return sorted(ranges_raw.keys(), key=lambda s: int("".join(filter(str.isdigit, s)) or "0"))
+
+
+class DesignSpace:
+    """设计变量空间
+
+    参数：
+    - ranges_raw: 范围字典，键形如 'x{i}_range'，值为 [min, max]
+    - target_range: LLM 使用的统一整数区间 [min_target, max_target]（默认 [0, 100]）
+    """
+
+    def __init__(self, ranges_raw, target_range=(0, 100)):
+        self.keys = sorted_range_keys(ranges_raw)
+        self.names = [k.split("_")[0] for k in self.keys]
+        bounds = np.array([ranges_raw[k] for k in self.keys], dtype=float).reshape(-1, 2)
+        self.lower = bounds[:, 0]
+        self.upper = bounds[:, 1]
+        self.span = self.upper - self.lower
+        self.target_range = (target_range[0], target_range[1])
+        self.target_lower = float(target_range[0])
+        self.target_span = float(target_range[1]) - float(target_range[0])
+        self._index = {name: i for i, name in enumerate(self.names)}
+
+    @property
+    def d(self):
+        """设计变量维度"""
+        return len(self.keys)
+
+    def __len__(self):
+        return len(self.keys)
+
+    @property
+    def bounds(self):
+        """按变量顺序排列的 [min, max] 列表"""
+        return np.column_stack([self.lower, self.upper]).tolist()
+
+    def to_int(self, points):
+        """
+        把连续设计点线性映射到整数区间并四舍五入（与内置 round 相同，取偶舍入）。
+        参数：
+        - points: 形状 (d,) 或 (K, d) 的数组
+        返回：
+        - 与输入同形状的整数数组
+        """
+        points = np.asarray(points, dtype=float)
+        scaled = self.target_lower + (points - self.lower) * self.target_span / self.span
+        return np.rint(scaled).astype(np.int64)
+
+    def to_float(self, int_points):
+        """
+        把整数编码映射回连续设计空间。
+        参数：
+        - int_points: 形状 (d,) 或 (K, d) 的数组，或以变量名为键的字典（如 {"x1": 12, "x2": 34}）
+        返回：
+        - 连续设计点数组
+        """
+        if isinstance(int_points, dict):
+            int_points = self.from_mapping(int_points)
+        values = np.asarray(int_points, dtype=float)
+        return (values - self.target_lower) / self.target_span * self.span + self.lower
+
+    def from_mapping(self, item):
+        """按变量顺序取出字典中的整数编码（多余的键被忽略，缺少变量时抛出 ValueError）"""
+        try:
+            return np.array([item[name] for name in self.names], dtype=float)
+        except KeyError as e:
+            raise ValueError(f"缺少设计变量 {e.args[0]}") from None
+
+    def clip(self, points):
+        """把设计点截断到上下界内"""
+        return np.clip(np.asarray(points, dtype=float), self.lower, self.upper)
+
+    def contains(self, points):
+        """
+        判断设计点是否位于上下界内（含边界）。
+        返回：
+        - 形状 (d,) 输入返回布尔标量，(K, d) 输入返回长度为 K 的布尔数组
+        """
+        points = np.asarray(points, dtype=float)
+        return np.all((points >= self.lower) & (points <= self.upper), axis=-1)
+
+
+def as_design_space(ranges, target_range=(0, 100)):
+    """ranges 已是同一整数区间的 DesignSpace 时直接返回，否则由范围字典构建"""
+    if isinstance(ranges, DesignSpace) and ranges.target_range == (target_range[0], target_range[1]):
+        return ranges
+    if isinstance(ranges, DesignSpace):
+        ranges = dict(zip(ranges.keys, ranges.bounds))
+    return DesignSpace(ranges, target_range)
@@ -0,0 +1,78 @@
+"""LLM-RBDO 设计点评估缓存
+LLM 在整数网格上提出设计点，解析失败时又回退到当前最优点，同一设计点会被反复评估。
+本模块以（量化后的扩展设计点, 评估设置）为键缓存 penalized_cost 的结果，按条目数做 LRU 淘汰，
+并统计命中 / 未命中次数。
+"""
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+def settings_digest(settings):
+    """将评估设置（N、std、threshold、场景等）规整为稳定的摘要字符串"""
+    def _default(value):
+        if isinstance(value, np.ndarray):
+            return value.tolist()
+        if isinstance(value, np.generic):
+            return value.item()
+        return str(value)
+
+    text = json.dumps(settings, sort_keys=True, default=_default)
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class EvaluationCache:
+    """线程安全的 LRU 评估缓存
+
+    参数：
+    - max_entries: 最大缓存条目数，超出时淘汰最久未使用的条目
+    - decimals: 设计点量化的小数位数
+    """
+
+    def __init__(self, max_entries=4096, decimals=9):
+        self.max_entries = int(max_entries)
+        self.decimals = int(decimals)
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def make_key(self, point, digest):
+        """由量化后的设计点与设置摘要构造缓存键"""
+        quantized = np.round(np.asarray(point, dtype=float), self.decimals) + 0.0  # +0.0 合并 -0.0 与 0.0
+        return digest, quantized.tobytes()
+
+    def get(self, key):
+        """查询缓存；命中时刷新其 LRU 位置并返回值，未命中返回 None"""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """写入缓存并按 LRU 淘汰超出容量的条目"""
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """清空缓存与计数"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """返回命中 / 未命中次数与当前条目数"""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
@@ -0,0 +1,150 @@
+"""LLM-RBDO 候选点并行评估模块
+- serial: 在当前线程内直接调用 penalized_cost_batch
+- thread: 线程池并行（numpy 大数组运算释放 GIL）
+- process: 进程池并行，适用于昂贵的约束函数（代理模型列表、仿真器封装等）
+
+每种执行器在进程内只创建一个工作池并跨请求复用，工作者数量由服务器端的 RBDO_EVAL_WORKERS
+（默认 CPU 核数）决定；请求中的 workers 只决定切块数，并被截断到该上限。
+候选点按顺序切分为若干块并行评估，结果按原顺序拼接。
+未使用公共随机数时，各块的样本取自由 cost_kwargs['seed']（种子或本次运行的 np.random.Generator）派生的子种子，
+结果可复现，且工作者之间不共享生成器，也不使用进程级的全局随机状态。
+使用公共随机数 (SamplingEngine) 时，各工作者持有由同一密钥重建 Z 的独立引擎（见 SamplingEngine.spawn），
+无需传递 N×d 的基矩阵；只有整体缓存的基矩阵（LHS）才通过共享内存传给子进程，避免逐任务复制。
+"""
+
+import atexit
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import get_context
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from Scripts.rbdo_utils import penalized_cost_batch
+from Scripts.sampling import SamplingEngine
+
+EXECUTOR_KINDS = ("serial", "thread", "process")
+MAX_WORKERS = int(os.getenv("RBDO_EVAL_WORKERS", "0")) or os.cpu_count() or 1
+
+_POOLS = {}
+_POOLS_LOCK = threading.Lock()
+
+
+def get_pool(kind):
+    """
+    获取持久化工作池；每种 kind 只创建一个，工作者数量为 MAX_WORKERS。
+    参数：
+    - kind: 'thread' | 'process'
+    返回：
+    - concurrent.futures.Executor 实例
+    """
+    with _POOLS_LOCK:
+        pool = _POOLS.get(kind)
+        if pool is None:
+            if kind == "thread":
+                pool = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="rbdo-eval")
+            elif kind == "process":
+                # spawn 在各平台行为一致，且不会复制 Flask 服务线程的状态
+                pool = ProcessPoolExecutor(max_workers=MAX_WORKERS, mp_context=get_context("spawn"))
+            else:
+                raise ValueError(f"unsupported executor: {kind}")
+            _POOLS[kind] = pool
+    return pool
+
+
+def shutdown_pools():
+    """关闭所有工作池（进程退出时自动调用）"""
+    with _POOLS_LOCK:
+        pools = list(_POOLS.values())
+        _POOLS.clear()
+    for pool in pools:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+atexit.register(shutdown_pools)
+
+
+def _evaluate_chunk(task):
+    """工作者入口：评估一块候选点（需为模块级函数以便进程池序列化）"""
+    points, cost_kwargs, shared_base, seed, engine = task
+    if shared_base is None:
+        return penalized_cost_batch(points, return_info=True, engine=engine, seed=seed, **cost_kwargs)
+    name, shape, dtype, sampler = shared_base
+    # spawn 子进程与父进程共用资源跟踪器，共享内存由父进程统一 unlink
+    shm = SharedMemory(name=name)
+    try:
+        base = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        engine = SamplingEngine.from_base(base, sampler)
+        result = penalized_cost_batch(points, return_info=True, engine=engine, seed=seed, **cost_kwargs)
+        del engine, base
+        return result
+    finally:
+        shm.close()
+
+
+def _merge(results):
+    """按原顺序拼接各块的 (penalties, objectives, reliabilities, info)"""
+    penalties = np.concatenate([r[0] for r in results])
+    objectives = np.concatenate([r[1] for r in results])
+    reliabilities = np.concatenate([r[2] for r in results], axis=0)
+    info = {key: np.concatenate([r[3][key] for r in results], axis=0) for key in results[0][3]}
+    return penalties, objectives, reliabilities, info
+
+
+def evaluate_points(points, kind="serial", workers=None, engine=None, **cost_kwargs):
+    """
+    通过可配置的执行器批量评估候选点，返回值与 penalized_cost_batch(..., return_info=True) 相同。
+    参数：
+    - points: 候选点矩阵，形状 (K, d)
+    - kind: 'serial' | 'thread' | 'process'
+    - workers: 并行块数（默认且不超过 MAX_WORKERS）
+    - engine: 可选的 SamplingEngine（公共随机数）；并行时各块共享同一基矩阵，结果与串行一致
+    - cost_kwargs: 透传给 penalized_cost_batch 的参数（N、threshold、constraint_source 等）
+    返回：
+    - (penalties, objectives, reliabilities, info)
+    """
+    if kind not in EXECUTOR_KINDS:
+        raise ValueError(f"unsupported executor: {kind}")
+    points = np.atleast_2d(np.asarray(points, dtype=float))
+    workers = min(int(workers or MAX_WORKERS), MAX_WORKERS)
+    if kind == "serial" or workers <= 1 or points.shape[0] <= 1:
+        return penalized_cost_batch(points, return_info=True, engine=engine, **cost_kwargs)
+
+    chunks = np.array_split(points, min(workers, points.shape[0]))
+    pool = get_pool(kind)
+    cost_kwargs = dict(cost_kwargs)
+    seeds = np.random.default_rng(cost_kwargs.pop("seed", None)).integers(2 ** 63, size=len(chunks))
+    base = None
+    if engine is not None and not engine.streamed:
+        # 整体缓存的基矩阵：预先生成足够行数，工作者无需再扩展
+        rows = max(int(cost_kwargs.get("N", 0)), int(cost_kwargs.get("is_samples", 0)), 1)
+        base = engine.base(rows, points.shape[1])
+
+    if kind == "thread":
+        tasks = []
+        for chunk, seed in zip(chunks, seeds):
+            chunk_engine = engine.spawn() if engine is not None else None
+            tasks.append(pool.submit(penalized_cost_batch, chunk, return_info=True, engine=chunk_engine, seed=int(seed),
+                                     **cost_kwargs))
+        return _merge([task.result() for task in tasks])
+
+    if engine is not None and base is None:
+        tasks = [(chunk, cost_kwargs, None, int(seed), engine.spawn()) for chunk, seed in zip(chunks, seeds)]
+        return _merge(list(pool.map(_evaluate_chunk, tasks)))
+
+    if base is None:
+        tasks = [(chunk, cost_kwargs, None, int(seed), None) for chunk, seed in zip(chunks, seeds)]
+        return _merge(list(pool.map(_evaluate_chunk, tasks)))
+
+    shm = SharedMemory(create=True, size=max(1, base.nbytes))
+    try:
+        shared = np.ndarray(base.shape, dtype=base.dtype, buffer=shm.buf)
+        shared[...] = base
+        del shared
+        spec = (shm.name, base.shape, base.dtype.str, engine.sampler)
+        tasks = [(chunk, cost_kwargs, spec, int(seed), None) for chunk, seed in zip(chunks, seeds)]
+        return _merge(list(pool.map(_evaluate_chunk, tasks)))
+    finally:
+        shm.close()
+        shm.unlink()
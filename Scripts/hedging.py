@@ -0,0 +1,245 @@
+"""LLM-RBDO 对冲请求（hedged requests）模块
+单个提供方偶发的慢回复决定了迭代耗时的尾部（p99）。对冲模式下：
+- 先向主提供方发出请求；
+- 若在对冲延迟内仍未得到可解析的结果（或主请求已失败），向备用提供方 / 模型发出同样的请求；
+- 先得到有效解析结果者胜出，另一请求被取消（已在进行中的 HTTP 请求无法中断，其结果被丢弃）。
+对冲延迟默认取主提供方历史延迟分布的某个分位数，延迟分布按 (provider, model) 以对数分桶直方图记录。
+每次成功调用的 token 用量记入 Scripts.metrics，并可累加到调用方传入的 stats 字典（按运行统计）。
+ahedged_completion 为 asyncio 版本（主 / 备用客户端均为异步客户端），落败的请求直接取消。
+"""
+
+import asyncio
+import bisect
+import math
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from Scripts.metrics import record_llm_usage
+
+# 对数分桶边界：50ms 起每档 ×1.25，覆盖到约 10 分钟
+_BUCKET_BOUNDS = tuple(0.05 * 1.25 ** i for i in range(43))
+
+
+class LatencyHistogram:
+    """线程安全的对数分桶延迟直方图，用于估计延迟分位数"""
+
+    def __init__(self):
+        self.counts = [0] * (len(_BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        """记录一次调用耗时（秒）"""
+        with self._lock:
+            self.counts[bisect.bisect_left(_BUCKET_BOUNDS, seconds)] += 1
+            self.count += 1
+            self.total += seconds
+
+    def percentile(self, q):
+        """返回第 q 百分位延迟的估计值（所在桶的上界，秒）；无记录时返回 None"""
+        with self._lock:
+            if self.count == 0:
+                return None
+            rank = max(1, math.ceil(self.count * q / 100.0))
+            seen = 0
+            for i, c in enumerate(self.counts):
+                seen += c
+                if seen >= rank:
+                    return _BUCKET_BOUNDS[min(i, len(_BUCKET_BOUNDS) - 1)]
+        return _BUCKET_BOUNDS[-1]
+
+    def snapshot(self):
+        """返回直方图快照：桶上界、各桶计数、总次数与总耗时"""
+        with self._lock:
+            return {"bounds": list(_BUCKET_BOUNDS), "counts": list(self.counts), "count": self.count, "sum": self.total}
+
+
+_HISTOGRAMS = {}
+_HISTOGRAMS_LOCK = threading.Lock()
+_STATS_LOCK = threading.Lock()
+
+
+def latency_histogram(provider, model):
+    """获取 (provider, model) 对应的延迟直方图（不存在时创建）"""
+    key = (provider or "unknown", model or "")
+    with _HISTOGRAMS_LOCK:
+        hist = _HISTOGRAMS.get(key)
+        if hist is None:
+            hist = _HISTOGRAMS[key] = LatencyHistogram()
+        return hist
+
+
+def latency_snapshot():
+    """返回所有 (provider, model) 延迟直方图的快照字典"""
+    with _HISTOGRAMS_LOCK:
+        items = list(_HISTOGRAMS.items())
+    return {key: hist.snapshot() for key, hist in items}
+
+
+def accumulate_stats(stats, **values):
+    """线程安全地把数值累加到 stats 字典（stats 为 None 时忽略）"""
+    if stats is None:
+        return
+    with _STATS_LOCK:
+        for key, value in values.items():
+            stats[key] = stats.get(key, 0) + value
+
+
+def timed_completion(client, model, stats=None, **request):
+    """调用 chat.completions.create，把成功调用的耗时记入对应直方图，token 用量记入指标与 stats"""
+    start = time.perf_counter()
+    response = client.chat.completions.create(model=model, **request)
+    _record_completion(client, model, stats, response, time.perf_counter() - start)
+    return response
+
+
+async def atimed_completion(client, model, stats=None, **request):
+    """timed_completion 的协程版本（client 为异步客户端）"""
+    start = time.perf_counter()
+    response = await client.chat.completions.create(model=model, **request)
+    _record_completion(client, model, stats, response, time.perf_counter() - start)
+    return response
+
+
+def _record_completion(client, model, stats, response, latency):
+    """记录一次成功调用：延迟直方图、token 用量指标与 stats"""
+    provider = getattr(client, "provider", None)
+    latency_histogram(provider, model).record(latency)
+    usage = getattr(response, "usage", None)
+    record_llm_usage(provider, model, usage)
+    accumulate_stats(
+        stats, llm_requests=1, llm_request_seconds=latency,
+        prompt_tokens=getattr(usage, "prompt_tokens", 0) or 0,
+        completion_tokens=getattr(usage, "completion_tokens", 0) or 0,
+        total_tokens=getattr(usage, "total_tokens", 0) or 0
+    )
+
+
+class HedgePolicy:
+    """对冲策略：备用提供方 / 模型与对冲延迟
+
+    参数：
+    - client: 备用提供方的客户端
+    - model: 备用模型名称
+    - percentile: 对冲延迟取主提供方延迟分布的百分位（默认 95）
+    - delay: 固定对冲延迟（秒）；给定时不再按分位数自动调整
+    - initial_delay: 主提供方样本不足时使用的对冲延迟（秒）
+    - min_samples: 按分位数估计前所需的最少延迟记录数
+    - min_delay / max_delay: 对冲延迟的上下限（秒）
+    """
+
+    def __init__(self, client, model, percentile=95.0, delay=None, initial_delay=5.0,
+                 min_samples=20, min_delay=0.2, max_delay=60.0):
+        self.client = client
+        self.model = model
+        self.percentile = float(percentile)
+        self.delay = delay
+        self.initial_delay = float(initial_delay)
+        self.min_samples = int(min_samples)
+        self.min_delay = float(min_delay)
+        self.max_delay = float(max_delay)
+
+    def hedge_delay(self, primary_client, primary_model):
+        """根据主提供方的延迟直方图计算本次对冲延迟（秒）"""
+        if self.delay is not None:
+            return float(self.delay)
+        hist = latency_histogram(getattr(primary_client, "provider", None), primary_model)
+        estimate = hist.percentile(self.percentile) if hist.count >= self.min_samples else None
+        if estimate is None:
+            estimate = self.initial_delay
+        return min(max(estimate, self.min_delay), self.max_delay)
+
+
+def _remaining_request(request, start):
+    """request 带 timeout（时间预算）时扣除自 start 起已经过的秒数：对冲请求晚于主请求发出，但须在同一时刻结束"""
+    timeout = request.get("timeout")
+    if not isinstance(timeout, (int, float)):
+        return request
+    return dict(request, timeout=max(0.0, timeout - (time.monotonic() - start)))
+
+
+def hedged_completion(client, model, request, parse, hedge=None, stats=None):
+    """
+    发出（可对冲的）补全请求并返回首个有效的解析结果。
+    参数：
+    - client: 主提供方客户端
+    - model: 主模型名称
+    - request: 透传给 chat.completions.create 的其余参数（messages、temperature 等）；
+      其中的 timeout 为整个对冲调用的时间预算
+    - parse: 解析函数 response -> 结果；格式不符时应抛出异常
+    - hedge: 可选的 HedgePolicy；None 表示不对冲
+    - stats: 可选字典，累加请求数、请求耗时与 token 用量（含对冲请求）
+    返回：
+    - parse 的返回值
+    异常：
+    - 主请求与对冲请求均失败（或均无法解析）时，抛出最后一个异常
+    """
+    start = time.monotonic()
+
+    def attempt(c, m):
+        return parse(timed_completion(c, m, stats, **_remaining_request(request, start)))
+
+    if hedge is None:
+        return attempt(client, model)
+
+    pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="llm-hedge")
+    try:
+        pending = {pool.submit(attempt, client, model)}
+        done, _ = wait(pending, timeout=hedge.hedge_delay(client, model))
+        hedged = False
+        error = None
+        while True:
+            for future in done:
+                pending.discard(future)
+                try:
+                    return future.result()
+                except Exception as e:
+                    error = e
+            if not hedged:
+                # 主请求超过对冲延迟仍未返回，或已失败：向备用提供方发出同样的请求
+                pending.add(pool.submit(attempt, hedge.client, hedge.model))
+                accumulate_stats(stats, hedged_requests=1)
+                hedged = True
+            if not pending:
+                raise error
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+    finally:
+        # 落败的请求不再等待，其结果被丢弃
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+async def ahedged_completion(client, model, request, parse, hedge=None, stats=None):
+    """hedged_completion 的协程版本（client 与 hedge.client 为异步客户端，参数与返回值相同）；落败的请求被取消"""
+    start = time.monotonic()
+
+    async def attempt(c, m):
+        return parse(await atimed_completion(c, m, stats, **_remaining_request(request, start)))
+
+    if hedge is None:
+        return await attempt(client, model)
+
+    pending = {asyncio.ensure_future(attempt(client, model))}
+    try:
+        done, _ = await asyncio.wait(pending, timeout=hedge.hedge_delay(client, model))
+        hedged = False
+        error = None
+        while True:
+            for task in done:
+                pending.discard(task)
+                try:
+                    return task.result()
+                except Exception as e:
+                    error = e
+            if not hedged:
+                # 主请求超过对冲延迟仍未返回，或已失败：向备用提供方发出同样的请求
+                pending.add(asyncio.ensure_future(attempt(hedge.client, hedge.model)))
+                accumulate_stats(stats, hedged_requests=1)
+                hedged = True
+            if not pending:
+                raise error
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in pending:
+            task.cancel()
@@ -0,0 +1,231 @@
+"""LLM-RBDO 后台优化任务管理模块
+优化运行不再绑定在 HTTP 生成器上：
+- 任务提交到有界工作池（max_workers 个并发运行 + max_queue 个排队），超出时拒绝（准入控制）
+- 每个任务的事件写入内存环形缓冲区并带递增序号 seq，客户端断线后可从任意 seq 重新订阅
+- 任务可随时取消：排队中的任务直接撤销，运行中的任务在迭代之间检查取消标志
+- 结束的任务保留 retention 秒后清理
+"""
+
+import threading
+import time
+import traceback
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+JOB_STATES = ("queued", "running", "finished", "failed", "cancelled")
+TERMINAL_STATES = ("finished", "failed", "cancelled")
+
+
+class JobQueueFull(RuntimeError):
+    """运行中与排队中的任务数已达上限"""
+
+
+class Job:
+    """单个优化任务：状态、取消标志与事件环形缓冲区
+
+    参数：
+    - job_id: 任务 id
+    - buffer_size: 环形缓冲区保留的最大事件数
+    - meta: 附加信息（如场景 id），随状态一同返回
+    """
+
+    def __init__(self, job_id, buffer_size=10000, meta=None):
+        self.id = job_id
+        self.meta = dict(meta or {})
+        self.status = "queued"
+        self.error = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.cancel_event = threading.Event()
+        self.future = None
+        self._events = deque(maxlen=int(buffer_size))
+        self._next_seq = 0
+        self._cond = threading.Condition()
+
+    @property
+    def done(self):
+        return self.status in TERMINAL_STATES
+
+    def append(self, event):
+        """追加事件并分配序号，唤醒等待中的订阅者"""
+        with self._cond:
+            event = dict(event, seq=self._next_seq)
+            self._next_seq += 1
+            self._events.append(event)
+            self._cond.notify_all()
+        return event
+
+    def set_status(self, status, error=None):
+        with self._cond:
+            self.status = status
+            if error is not None:
+                self.error = error
+            if status == "running":
+                self.started = time.time()
+            elif status in TERMINAL_STATES:
+                self.finished = time.time()
+            self._cond.notify_all()
+
+    def events(self, start=0, heartbeat=15.0):
+        """
+        从序号 start 起订阅事件，直到任务结束且事件读完。
+        参数：
+        - start: 起始序号；早于缓冲区中最早事件时先产出一个 gap 事件说明丢失的区间
+        - heartbeat: 无新事件时每隔多少秒产出一个 heartbeat 事件（便于检测断线）
+        返回：
+        - 生成器，逐个产出事件字典
+        """
+        seq = max(0, int(start))
+        while True:
+            with self._cond:
+                if self._next_seq <= seq and not self.done:
+                    self._cond.wait(timeout=heartbeat)
+                first = self._events[0]["seq"] if self._events else self._next_seq
+                gap = {"type": "gap", "from": seq, "to": first} if seq < first else None
+                seq = max(seq, first)
+                # 序号连续，可按偏移量直接定位
+                batch = list(islice(self._events, seq - first, None)) if seq < self._next_seq else []
+                seq = max(seq, self._next_seq)
+                finished = self.done
+                status = self.status
+            if gap:
+                yield gap
+            yield from batch
+            if finished and not batch:
+                return
+            if not gap and not batch:
+                yield {"type": "heartbeat", "status": status}
+
+    def describe(self):
+        """返回任务状态摘要"""
+        with self._cond:
+            return {
+                "job_id": self.id,
+                "status": self.status,
+                "cancel_requested": self.cancel_event.is_set(),
+                "error": self.error,
+                "created": self.created,
+                "started": self.started,
+                "finished": self.finished,
+                "next_seq": self._next_seq,
+                "oldest_seq": self._events[0]["seq"] if self._events else self._next_seq,
+                **self.meta,
+            }
+
+
+class JobManager:
+    """后台任务管理器
+
+    参数：
+    - max_workers: 同时运行的任务数上限
+    - max_queue: 排队等待的任务数上限（超出时 submit 抛出 JobQueueFull）
+    - buffer_size: 每个任务环形缓冲区保留的事件数
+    - retention: 结束的任务保留多少秒后清理
+    """
+
+    def __init__(self, max_workers=4, max_queue=16, buffer_size=10000, retention=3600.0):
+        self.max_workers = int(max_workers)
+        self.max_queue = int(max_queue)
+        self.buffer_size = int(buffer_size)
+        self.retention = float(retention)
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="rbdo-job")
+
+    def _purge(self):
+        """清理超过保留时间的已结束任务（调用方持有锁）"""
+        now = time.time()
+        expired = [jid for jid, job in self._jobs.items()
+                   if job.done and job.finished is not None and now - job.finished > self.retention]
+        for jid in expired:
+            del self._jobs[jid]
+
+    def active_count(self):
+        """排队中与运行中的任务数"""
+        with self._lock:
+            return sum(1 for job in self._jobs.values() if not job.done)
+
+    def submit(self, make_events, meta=None):
+        """
+        提交任务。
+        参数：
+        - make_events: 可调用对象 cancel_event -> 事件字典的可迭代对象（如 optimization_events 生成器）
+        - meta: 附加信息
+        返回：
+        - Job 实例
+        异常：
+        - JobQueueFull: 运行中与排队中的任务数已达 max_workers + max_queue
+        """
+        with self._lock:
+            self._purge()
+            active = sum(1 for job in self._jobs.values() if not job.done)
+            if active >= self.max_workers + self.max_queue:
+                raise JobQueueFull(f"too many active jobs ({active})")
+            job = Job(uuid.uuid4().hex, self.buffer_size, meta)
+            self._jobs[job.id] = job
+            job.future = self._pool.submit(self._run, job, make_events)
+        return job
+
+    def _run(self, job, make_events):
+        if job.cancel_event.is_set():
+            job.set_status("cancelled")
+            return
+        job.set_status("running")
+        events = None
+        try:
+            events = make_events(job.cancel_event)
+            for event in events:
+                job.append(event)
+            job.set_status("cancelled" if job.cancel_event.is_set() else "finished")
+        except Exception as e:
+            err_msg = f"Runtime Error: {str(e)}\n{traceback.format_exc()}"
+            print(err_msg)
+            job.append({"type": "log", "msg": err_msg})
+            job.set_status("failed", error=str(e))
+        finally:
+            close = getattr(events, "close", None)
+            if close is not None:
+                close()
+
+    def get(self, job_id):
+        """按 id 获取任务，不存在时返回 None"""
+        with self._lock:
+            self._purge()
+            return self._jobs.get(job_id)
+
+    def list(self):
+        """返回所有任务的状态摘要"""
+        with self._lock:
+            self._purge()
+            jobs = list(self._jobs.values())
+        return [job.describe() for job in jobs]
+
+    def cancel(self, job_id):
+        """
+        取消任务：排队中的任务直接撤销；运行中的任务设置取消标志，在下一次迭代前停止；
+        已结束的任务从管理器中删除。
+        返回：
+        - 任务状态摘要；任务不存在时返回 None
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            if job.done:
+                del self._jobs[job_id]
+                return job.describe()
+        job.cancel_event.set()
+        if job.future is not None and job.future.cancel():
+            job.set_status("cancelled")
+        return job.describe()
+
+    def shutdown(self):
+        """取消所有任务并关闭工作池"""
+        with self._lock:
+            jobs = list(self._jobs.values())
+        for job in jobs:
+            job.cancel_event.set()
+        self._pool.shutdown(wait=False, cancel_futures=True)
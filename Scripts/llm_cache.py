@@ -0,0 +1,170 @@
+"""LLM-RBDO 基于内容寻址的 LLM 回复磁盘缓存
+以 (model, 渲染后的提示消息, temperature, top_p, max_tokens, n) 的哈希为键，把回复保存为 JSON 文件，
+使基准测试与回归运行可复现，并可在无网络的环境中回放。
+模式：
+- record: 命中时直接返回缓存；未命中时调用真实客户端并写入缓存
+- replay: 只读缓存；未命中时抛出 ValueError，不发起任何网络请求
+- passthrough: 不读不写缓存，直接调用真实客户端
+AsyncCachedClient 以同样的方式包装异步客户端（ASGI 服务使用）。
+缓存根目录只由服务器端的 LLM_CACHE_DIR（默认 .llm_cache/）决定，请求只能按名称选择其下的子目录。
+"""
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+from types import SimpleNamespace
+
+CACHE_MODES = ("record", "replay", "passthrough")
+DEFAULT_CACHE_DIR = os.getenv("LLM_CACHE_DIR", ".llm_cache")
+_NAME_RE = re.compile(r"^[A-Za-z0-9_.-]+$")
+
+
+def cache_dir(name=None, root=None):
+    """
+    由缓存名称得到缓存目录；名称只允许字母、数字、下划线、点与连字符，防止路径穿越。
+    返回：
+    - <root>/<name>；name 为空时返回根目录本身
+    """
+    root = root or DEFAULT_CACHE_DIR
+    if not name:
+        return root
+    name = str(name)
+    if not _NAME_RE.match(name) or name in (".", ".."):
+        raise ValueError(f"无效的 LLM 缓存名称：{name!r}")
+    return os.path.join(root, name)
+
+
+def request_key(model, messages, temperature=None, top_p=None, max_tokens=None, n=1):
+    """计算请求的内容哈希（sha256 十六进制字符串）"""
+    payload = {
+        "model": model, "messages": messages, "temperature": temperature,
+        "top_p": top_p, "max_tokens": max_tokens, "n": n,
+    }
+    text = json.dumps(payload, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _to_record(response):
+    """把 ChatCompletion 对象转为可 JSON 序列化的字典（仅保留本项目用到的字段）"""
+    usage = getattr(response, "usage", None)
+    return {
+        "model": getattr(response, "model", None),
+        "choices": [{"content": c.message.content, "finish_reason": getattr(c, "finish_reason", None)}
+                    for c in response.choices],
+        "usage": None if usage is None else {
+            "prompt_tokens": usage.prompt_tokens,
+            "completion_tokens": usage.completion_tokens,
+            "total_tokens": usage.total_tokens,
+        },
+    }
+
+
+def _from_record(record):
+    """由缓存字典重建与 ChatCompletion 结构相同的对象"""
+    usage = record.get("usage")
+    return SimpleNamespace(
+        model=record.get("model"),
+        choices=[SimpleNamespace(index=i, finish_reason=c.get("finish_reason"),
+                                 message=SimpleNamespace(role="assistant", content=c["content"]))
+                 for i, c in enumerate(record["choices"])],
+        usage=None if usage is None else SimpleNamespace(**usage),
+    )
+
+
+class _CachedCompletions:
+    def __init__(self, owner):
+        self._owner = owner
+
+    def create(self, **kwargs):
+        return self._owner._create(**kwargs)
+
+
+class CachedClient:
+    """为任意 OpenAI 兼容客户端加上磁盘回复缓存
+
+    参数：
+    - client: 被包装的客户端（replay 模式下可为 None）
+    - cache_dir: 缓存目录
+    - mode: 'record' | 'replay' | 'passthrough'
+    """
+
+    def __init__(self, client, cache_dir=None, mode="record"):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"unsupported llm cache mode: {mode}")
+        self.client = client
+        self.cache_dir = cache_dir or DEFAULT_CACHE_DIR
+        self.mode = mode
+        self.provider = getattr(client, "provider", None)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()  # 多个候选请求可能在不同线程中同时更新命中计数
+        self.chat = SimpleNamespace(completions=_CachedCompletions(self))
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def _write(self, path, record):
+        """原子写入：先写临时文件再替换，避免并发请求读到半个文件"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(record, f, ensure_ascii=False)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    def _lookup(self, kwargs):
+        """查询缓存：返回 (缓存文件路径, 命中的回复或 None)；replay 模式未命中时抛出 ValueError"""
+        key = request_key(kwargs.get("model"), kwargs.get("messages"), kwargs.get("temperature"),
+                          kwargs.get("top_p"), kwargs.get("max_tokens"), kwargs.get("n", 1))
+        path = self._path(key)
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                record = json.load(f)
+            with self._lock:
+                self.hits += 1
+            return path, _from_record(record)
+        with self._lock:
+            self.misses += 1
+        if self.mode == "replay":
+            raise ValueError(f"LLM 回复缓存未命中（replay 模式）：{key}")
+        return path, None
+
+    def _create(self, **kwargs):
+        if self.mode == "passthrough":
+            return self.client.chat.completions.create(**kwargs)
+        path, response = self._lookup(kwargs)
+        if response is not None:
+            return response
+        response = self.client.chat.completions.create(**kwargs)
+        self._write(path, _to_record(response))
+        return response
+
+
+class _AsyncCachedCompletions(_CachedCompletions):
+    async def create(self, **kwargs):
+        return await self._owner._acreate(**kwargs)
+
+
+class AsyncCachedClient(CachedClient):
+    """CachedClient 的 asyncio 版本：包装异步客户端，`await chat.completions.create(...)`（参数同 CachedClient）"""
+
+    def __init__(self, client, cache_dir=None, mode="record"):
+        super().__init__(client, cache_dir, mode)
+        self.chat = SimpleNamespace(completions=_AsyncCachedCompletions(self))
+
+    async def _acreate(self, **kwargs):
+        if self.mode == "passthrough":
+            return await self.client.chat.completions.create(**kwargs)
+        path, response = self._lookup(kwargs)
+        if response is not None:
+            return response
+        response = await self.client.chat.completions.create(**kwargs)
+        self._write(path, _to_record(response))
+        return response
@@ -1,20 +1,174 @@
 """LLM-RBDO 优化操作模块
 包含功能：
 1. generate_new_point_with_llm: 迭代优化时的 LLM 生成
+   generate_new_points_with_llm: 每次迭代并发获取多个 LLM 候选点（可要求每个回复给出 k 个点）
+   （均支持可选的对冲请求 hedge，见 Scripts.hedging）
+   a 前缀的同名协程（agenerate_new_point_with_llm 等）使用异步客户端，供 ASGI 服务 await
 2. generate_initial_points_random: 随机均匀采样
 3. generate_initial_points_lhs: 拉丁超立方采样
 4. generate_initial_points_llm: 基于 LLM 的初始采样
 """
 
+import asyncio
+import os
+import threading
 import numpy as np
 import json
-from scipy.stats import qmc  
-from Scripts.mapping_utils import map_back_to_float_array
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
+from Scripts.hedging import accumulate_stats, ahedged_completion, hedged_completion
+from Scripts.design_space import as_design_space
 
 # ==============================================================================
 #                 1. 迭代优化生成 (Optimization Step)
 # ==============================================================================
-def generate_new_point_with_llm(messages, best_point_message, temperature, top_p, original_ranges, target_range, client, max_tokens, model, template_path, print_prompt=True):
+STEP_SYSTEM_PROMPT = "你是一个优化算法助手，目的是寻找到一组解让penalty为0的前提下尽可能降低objective。"
+MAX_PROPOSAL_WORKERS = int(os.getenv("LLM_PROPOSAL_WORKERS", "32"))
+
+_PROPOSAL_POOL = None
+_PROPOSAL_POOL_LOCK = threading.Lock()
+
+
+def _proposal_pool():
+    """所有运行共用的多候选请求线程池（工作线程数为 MAX_PROPOSAL_WORKERS），首次使用时创建"""
+    global _PROPOSAL_POOL
+    with _PROPOSAL_POOL_LOCK:
+        if _PROPOSAL_POOL is None:
+            _PROPOSAL_POOL = ThreadPoolExecutor(max_workers=MAX_PROPOSAL_WORKERS, thread_name_prefix="llm-proposal")
+    return _PROPOSAL_POOL
+
+
+def build_step_prompt(messages, best_point_message, original_ranges, target_range, template_path, num_points=1):
+    """根据历史消息、当前最优点与模板渲染迭代步提示词（参数含义同 generate_new_point_with_llm）；
+    num_points > 1 时输出格式为含多个点的 JSON 列表，并替换模板中的 <<NUM_POINTS>>"""
+    names = as_design_space(original_ranges, target_range).names
+    history_lines = ""
+    for m in messages:
+        history_lines += f"迭代次数{m['iteration']},生成点: {m['point']}, penalty: {m['penalty']},目标函数值: {m['objective']}\n"
+    best_section = f"生成点: {best_point_message['point']}, penalty: {best_point_message['penalty']},目标函数值: {best_point_message['objective']}\n"
+    ranges_lines = ""
+    for name in names:
+        ranges_lines += f"{name}: [{target_range[0]}, {target_range[1]}]\n"
+    item = "{" + ", ".join([f"\"{name}\": " for name in names]) + "}"
+    if num_points > 1:
+        schema = "[\n    " + item + ",\n    " + item + ",\n    ...\n]"
+    else:
+        schema = "[\n    " + item + "\n]"
+    with open(template_path, "r", encoding="utf-8") as f:
+        tpl = f.read()
+    tpl = tpl.replace("<<VARIABLE_NAMES>>", ", ".join(names))
+    tpl = tpl.replace("<<RANGES>>", ranges_lines.strip())
+    tpl = tpl.replace("<<HISTORY>>", history_lines.strip())
+    tpl = tpl.replace("<<BEST>>", best_section.strip())
+    tpl = tpl.replace("<<OUTPUT_SCHEMA>>", schema)
+    tpl = tpl.replace("<<NUM_POINTS>>", str(num_points))
+    return tpl
+
+def extract_json_objects(content):
+    """
+    宽松地从回复文本中逐个提取 JSON 对象：跳过说明文字、markdown 标记与被截断的尾部，
+    保留每个能完整解析的对象（外层对象不是设计点时继续在其内部查找）。
+    返回：
+    - 生成器，逐个产出 (字典, 起始位置)
+    """
+    decoder = json.JSONDecoder()
+    pos = 0
+    while True:
+        start = content.find("{", pos)
+        if start < 0:
+            return
+        try:
+            obj, end = decoder.raw_decode(content, start)
+        except json.JSONDecodeError:
+            pos = start + 1
+            continue
+        if isinstance(obj, dict):
+            yield obj, start
+        pos = start + 1 if isinstance(obj, dict) and not _is_flat(obj) else end
+
+def _is_flat(obj):
+    return not any(isinstance(v, (dict, list)) for v in obj.values())
+
+def parse_step_points(content, original_ranges, target_range, limit=None):
+    """
+    解析批量迭代步回复中的全部设计点：缺少变量、取值不是数字或超出整数区间的条目被丢弃，重复的点只保留一个。
+    参数：
+    - limit: 最多保留的点数（None 表示不限）
+    返回：
+    - 连续空间设计点列表（numpy.ndarray）
+    """
+    space = as_design_space(original_ranges, target_range)
+    lo, hi = min(target_range), max(target_range)
+    seen = set()
+    points = []
+    for obj, _ in extract_json_objects(content):
+        values = [obj.get(name) for name in space.names]
+        if not all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in values):
+            continue
+        if not all(lo <= v <= hi for v in values):
+            continue
+        key = tuple(values)
+        if key in seen:
+            continue
+        seen.add(key)
+        points.append(space.to_float(values))
+        if limit is not None and len(points) >= limit:
+            break
+    return points
+
+def parse_step_point(content, original_ranges, target_range):
+    """解析迭代步回复中最后一个 JSON 数组的首个点并映射回连续空间；格式不符时抛出异常"""
+    new_point_str = content.strip()
+    start = new_point_str.rindex('[')
+    end = new_point_str.rindex(']') + 1
+    new_point_json = new_point_str[start:end].strip()
+    new_point = json.loads(new_point_json)
+    return as_design_space(original_ranges, target_range).to_float(new_point[0])
+
+def _timed_step_prompt(messages, best_point_message, original_ranges, target_range, template_path, stats, num_points=1):
+    """渲染迭代步提示词，并把耗时累加到 stats['prompt_seconds']"""
+    start = time.perf_counter()
+    full_prompt = build_step_prompt(messages, best_point_message, original_ranges, target_range, template_path,
+                                    num_points=num_points)
+    accumulate_stats(stats, prompt_seconds=time.perf_counter() - start)
+    return full_prompt
+
+def _step_request(full_prompt, temperature, top_p, max_tokens):
+    """迭代步的补全请求参数"""
+    return dict(
+        messages=[{"role": "system", "content": STEP_SYSTEM_PROMPT},
+                  {"role": "user", "content": full_prompt}],
+        temperature=temperature,
+        top_p=top_p,
+        max_tokens=max_tokens
+    )
+
+def _choices_parser(original_ranges, target_range, batch_size):
+    """多候选点请求的解析函数：收集所有回复（choices）中可解析的点，一个都没有时抛出异常"""
+    def parse_choices(response):
+        points = []
+        for choice in response.choices:
+            try:
+                if batch_size > 1:
+                    points.extend(parse_step_points(choice.message.content, original_ranges, target_range, limit=batch_size))
+                else:
+                    points.append(parse_step_point(choice.message.content, original_ranges, target_range))
+            except Exception:
+                continue
+        if not points:
+            # 没有可解析的回复视为无效结果，对冲请求可继续竞争
+            raise ValueError("LLM 回复中没有可解析的设计点")
+        return points
+    return parse_choices
+
+def _unique_points(points):
+    """不同回复之间的重复点只保留一个（保持先后顺序）"""
+    unique = {}
+    for p in points:
+        unique.setdefault(tuple(p), p)
+    return list(unique.values())
+
+def generate_new_point_with_llm(messages, best_point_message, temperature, top_p, original_ranges, target_range, client, max_tokens, model, template_path, print_prompt=True, hedge=None, stats=None):
     """根据历史消息与当前最优点生成一个新的候选设计点
 
     参数：
@@ -22,85 +176,175 @@ def generate_new_point_with_llm(messages, best_point_message, temperature, top_p
     - best_point_message: 字典，描述最近的最优点（同样包含点、penalty 与 objective）
     - temperature: LLM 采样温度
     - top_p: 核采样阈值
-    - original_ranges: 设计空间范围字典，键形如 'x{i}_range'
+    - original_ranges: 设计空间范围字典，键形如 'x{i}_range'，或按运行构建好的 DesignSpace
     - target_range: 整数映射区间 [min, max]
     - client: OpenAI 兼容客户端实例
     - max_tokens: 生成长度上限
     - model: 模型名称
     - template_path: 提示模板路径
     - print_prompt: 是否打印提示信息
+    - hedge: 可选的 HedgePolicy；主请求超过对冲延迟未返回有效点时向备用提供方发出同样的请求
+    - stats: 可选字典，累加提示词构建耗时（prompt_seconds）、请求数与 token 用量
 
     返回：
     - numpy.ndarray，新生成的连续空间设计点（形如 [x1, x2, ...]）
     """
-    names = []
-    for k in sorted(original_ranges.keys(), key=lambda s: int("".join(filter(str.isdigit, s)) or "0")):
-        names.append(k.split("_")[0])
-    history_lines = ""
-    for m in messages:
-        history_lines += f"迭代次数{m['iteration']},生成点: {m['point']}, penalty: {m['penalty']},目标函数值: {m['objective']}\n"
-    best_section = f"生成点: {best_point_message['point']}, penalty: {best_point_message['penalty']},目标函数值: {best_point_message['objective']}\n"
-    ranges_lines = ""
-    for name in names:
-        ranges_lines += f"{name}: [{target_range[0]}, {target_range[1]}]\n"
-    schema = "[\n    {" + ", ".join([f"\"{name}\": " for name in names]) + "}\n]"
-    with open(template_path, "r", encoding="utf-8") as f:
-        tpl = f.read()
-    tpl = tpl.replace("<<VARIABLE_NAMES>>", ", ".join(names))
-    tpl = tpl.replace("<<RANGES>>", ranges_lines.strip())
-    tpl = tpl.replace("<<HISTORY>>", history_lines.strip())
-    tpl = tpl.replace("<<BEST>>", best_section.strip())
-    tpl = tpl.replace("<<OUTPUT_SCHEMA>>", schema)
-    full_prompt = tpl
+    full_prompt = _timed_step_prompt(messages, best_point_message, original_ranges, target_range, template_path, stats)
     if print_prompt:
         print("\n--- LLM Prompt ---")
         print(full_prompt)
         print("--- End of Prompt ---")
     try:
-        response = client.chat.completions.create(
-            model=model,
-            messages=[{"role": "system", "content": "你是一个优化算法助手，目的是寻找到一组解让penalty为0的前提下尽可能降低objective。"},
-                      {"role": "user", "content": full_prompt}],
-            temperature=temperature,
-            top_p=top_p,
-            max_tokens=max_tokens
+        request = _step_request(full_prompt, temperature, top_p, max_tokens)
+        return hedged_completion(
+            client, model, request,
+            lambda response: parse_step_point(response.choices[0].message.content, original_ranges, target_range),
+            hedge=hedge, stats=stats
         )
-        new_point_str = response.choices[0].message.content.strip()
-        start = new_point_str.rindex('[')
-        end = new_point_str.rindex(']') + 1
-        new_point_json = new_point_str[start:end].strip()
-        new_point = json.loads(new_point_json)
-        mapped_point = map_back_to_float_array(new_point[0], original_ranges, target_range)
-        return mapped_point
     except Exception:
-        mapped_best = map_back_to_float_array(best_point_message["point"], original_ranges, target_range)
+        mapped_best = as_design_space(original_ranges, target_range).to_float(best_point_message["point"])
         return mapped_best
 
+async def agenerate_new_point_with_llm(messages, best_point_message, temperature, top_p, original_ranges, target_range, client, max_tokens, model, template_path, print_prompt=True, hedge=None, stats=None):
+    """generate_new_point_with_llm 的协程版本：client 与 hedge.client 为异步客户端，参数与返回值相同"""
+    full_prompt = _timed_step_prompt(messages, best_point_message, original_ranges, target_range, template_path, stats)
+    if print_prompt:
+        print("\n--- LLM Prompt ---")
+        print(full_prompt)
+        print("--- End of Prompt ---")
+    try:
+        request = _step_request(full_prompt, temperature, top_p, max_tokens)
+        return await ahedged_completion(
+            client, model, request,
+            lambda response: parse_step_point(response.choices[0].message.content, original_ranges, target_range),
+            hedge=hedge, stats=stats
+        )
+    except Exception:
+        return as_design_space(original_ranges, target_range).to_float(best_point_message["point"])
+
+def generate_new_points_with_llm(num_proposals, messages, best_point_message, temperature, top_p, original_ranges, target_range, client, max_tokens, model, template_path, deadline=None, use_n=False, hedge=None, stats=None, batch_size=1):
+    """每次迭代获取多个 LLM 候选点：并发发出 num_proposals 个请求（或使用提供方的 n 参数一次返回多个回复），
+    按到达顺序收集，超过 deadline 秒后不再等待剩余请求；batch_size > 1 时每个回复包含 batch_size 个点。
+    请求在所有运行共用的有界线程池中执行；deadline 截止时刻的剩余时间作为每个请求的 timeout 传给客户端，
+    未完成的请求在截止时刻结束，尚未开始的请求被取消，不会在后台继续占用连接与并发名额
+
+    参数：
+    - num_proposals: 候选点数量 M
+    - deadline: 本次迭代等待 LLM 的最长秒数（None 表示等待全部完成）
+    - use_n: 是否使用 chat.completions 的 n 参数在一次请求中获取 M 个回复
+    - hedge: 可选的 HedgePolicy，对每个请求单独对冲
+    - stats: 可选字典，累加提示词构建耗时、请求数与 token 用量
+    - batch_size: 每个回复要求的设计点数 k（模板中的 <<NUM_POINTS>>）；k > 1 时回复用宽松的 JSON 提取器解析，
+      丢弃越界与重复的点，max_tokens 视为每个点的长度上限
+    - 其余参数同 generate_new_point_with_llm
+
+    返回：
+    - 列表，元素为成功解析的连续空间设计点（numpy.ndarray）；全部失败时为空列表
+    """
+    batch_size = max(1, int(batch_size))
+    full_prompt = _timed_step_prompt(messages, best_point_message, original_ranges, target_range, template_path, stats,
+                                     num_points=batch_size)
+    request = _step_request(full_prompt, temperature, top_p, max_tokens * batch_size)
+    parse_choices = _choices_parser(original_ranges, target_range, batch_size)
+    end = None if deadline is None else time.monotonic() + deadline
+
+    def attempt(req):
+        # 在池中排队的时间也计入 deadline
+        if end is not None:
+            req = dict(req, timeout=max(0.0, end - time.monotonic()))
+        return hedged_completion(client, model, req, parse_choices, hedge, stats)
+
+    pool = _proposal_pool()
+    if use_n:
+        futures = [pool.submit(attempt, dict(request, n=num_proposals))]
+    else:
+        futures = [pool.submit(attempt, request) for _ in range(num_proposals)]
+    try:
+        points = []
+        try:
+            for future in as_completed(futures, timeout=deadline):
+                try:
+                    points.extend(future.result())
+                except Exception:
+                    continue
+        except FuturesTimeoutError:
+            pass
+        if batch_size > 1:
+            points = _unique_points(points)
+        return points
+    finally:
+        # 超时未完成的请求不再等待（已开始的会因 timeout 在截止时刻自行结束），其结果被丢弃
+        for future in futures:
+            future.cancel()
+
+async def agenerate_new_points_with_llm(num_proposals, messages, best_point_message, temperature, top_p, original_ranges, target_range, client, max_tokens, model, template_path, deadline=None, use_n=False, hedge=None, stats=None, batch_size=1):
+    """generate_new_points_with_llm 的协程版本：client 与 hedge.client 为异步客户端，参数与返回值相同；
+    deadline 同时作为每个请求的 timeout，超过 deadline 秒仍未完成的请求被取消"""
+    batch_size = max(1, int(batch_size))
+    full_prompt = _timed_step_prompt(messages, best_point_message, original_ranges, target_range, template_path, stats,
+                                     num_points=batch_size)
+    request = _step_request(full_prompt, temperature, top_p, max_tokens * batch_size)
+    if deadline is not None:
+        request["timeout"] = deadline
+    parse_choices = _choices_parser(original_ranges, target_range, batch_size)
+    if use_n:
+        tasks = [asyncio.ensure_future(ahedged_completion(client, model, dict(request, n=num_proposals), parse_choices, hedge, stats))]
+    else:
+        tasks = [asyncio.ensure_future(ahedged_completion(client, model, request, parse_choices, hedge, stats))
+                 for _ in range(num_proposals)]
+    loop = asyncio.get_running_loop()
+    end = None if deadline is None else loop.time() + deadline
+    pending = set(tasks)
+    points = []
+    try:
+        while pending:
+            timeout = None if end is None else max(0.0, end - loop.time())
+            done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                break
+            # 同一批完成的请求按发出顺序收集
+            for task in sorted(done, key=tasks.index):
+                try:
+                    points.extend(task.result())
+                except Exception:
+                    continue
+    finally:
+        for task in pending:
+            task.cancel()
+    if batch_size > 1:
+        points = _unique_points(points)
+    return points
+
 # ==============================================================================
 #                 2. 初始点采样 (Initial Sampling Methods)
 # ==============================================================================
 
-def generate_initial_points_random(ranges_list, num_points):
+def generate_initial_points_random(ranges_list, num_points, rng=None):
     """
     随机均匀采样 (Numpy Uniform)
     ranges_list: [[min, max], [min, max], ...] 对应 x1, x2...
+    rng: 随机种子或 np.random.Generator（None 时使用随机熵）
     """
+    rng = np.random.default_rng(rng)
     points = []
     for _ in range(num_points):
         # 对每一维进行均匀采样
-        p = [np.random.uniform(r[0], r[1]) for r in ranges_list]
+        p = [rng.uniform(r[0], r[1]) for r in ranges_list]
         points.append(np.array(p))
     return points
 
-def generate_initial_points_lhs(ranges_list, num_points):
+def generate_initial_points_lhs(ranges_list, num_points, rng=None):
     """
     拉丁超立方采样 (LHS)
+    rng: 随机种子或 np.random.Generator（None 时使用随机熵）
     """
+    from scipy.stats import qmc  # 引入 LHS 采样工具（scipy.stats 导入较慢，仅在使用时导入）
+
     d = len(ranges_list)
     if d == 0: return []
     
     # 1. 生成 [0, 1] 区间的 LHS 样本
-    sampler = qmc.LatinHypercube(d=d)
+    sampler = qmc.LatinHypercube(d=d, rng=rng)
     sample = sampler.random(n=num_points)
     
     # 2. 缩放到实际物理范围
@@ -112,21 +356,16 @@ def generate_initial_points_lhs(ranges_list, num_points):
     # 转为 list of arrays 格式以保持一致性
     return [row for row in scaled_sample]
 
-def generate_initial_points_llm(original_ranges, target_range, num_points, client, model, template_path):
+def _init_request(original_ranges, target_range, num_points, template_path):
     """
-    通过 LLM 提示词一次性生成多个初始点 (Batch Generation)
+    构建初始采样的补全请求。
+    返回：
+    - (space, request, parse)；初始化模板不存在时 request 与 parse 为 None
     """
-    print(f">>> LLM Init: Generating {num_points} points using {model}...")
-    
     # 准备 Prompt 变量
-    names = []
+    space = as_design_space(original_ranges, target_range)
     ranges_lines = ""
-    # 排序保证 x1, x2...
-    sorted_keys = sorted(original_ranges.keys(), key=lambda s: int("".join(filter(str.isdigit, s)) or "0"))
-    
-    for k in sorted_keys:
-        name = k.split("_")[0]
-        names.append(name)
+    for name in space.names:
         ranges_lines += f"{name}: [{target_range[0]}, {target_range[1]}]\n"
     
     try:
@@ -134,25 +373,13 @@ def generate_initial_points_llm(original_ranges, target_range, num_points, clien
             base_tpl = f.read()
     except FileNotFoundError:
         print(f"[Error] Init template not found at {template_path}")
-        # 降级到 LHS
-        return generate_initial_points_lhs([original_ranges[k] for k in sorted_keys], num_points)
+        return space, None, None
 
     # 替换变量
     base_tpl = base_tpl.replace("<<RANGES>>", ranges_lines.strip())
     base_tpl = base_tpl.replace("<<NUM_POINTS>>", str(num_points))
     
-    points = []
-    
-    try:
-        response = client.chat.completions.create(
-            model=model,
-            messages=[
-                {"role": "system", "content": "You are a design sampler. Output strictly valid JSON."},
-                {"role": "user", "content": base_tpl}
-            ],
-            temperature=0.9, # 高温增加多样性
-            max_tokens=2048  # 增加 token 上限以容纳多个点
-        )
+    def parse_init(response):
         content = response.choices[0].message.content.strip()
         content = content.replace('```json', '').replace('```', '').strip()
         
@@ -162,26 +389,66 @@ def generate_initial_points_llm(original_ranges, target_range, num_points, clien
         json_str = content[start:end]
         data_list = json.loads(json_str) # [{"x1":...}, {"x1":...}]
         
-        print(f"  > LLM returned {len(data_list)} points.")
-        
         # 映射回物理空间
-        for item in data_list:
-            # 只取我们需要的变量，防止 LLM 发挥过度
-            p_float = map_back_to_float_array(item, original_ranges, target_range)
-            points.append(p_float)
-            
-        # 如果 LLM 生成的数量不够，用 Random 补齐
-        if len(points) < num_points:
-            missing = num_points - len(points)
-            print(f"  > Missing {missing} points, filling with Random.")
-            ranges_list = [original_ranges[k] for k in sorted_keys]
-            fill_points = generate_initial_points_random(ranges_list, missing)
-            points.extend(fill_points)
-            
-        # 如果生成多了，截断
-        return points[:num_points]
-            
+        # 只取我们需要的变量，防止 LLM 发挥过度
+        parsed = [space.to_float(item) for item in data_list
+                  if isinstance(item, dict) and all(name in item for name in space.names)]
+        if not parsed:
+            raise ValueError("LLM 未返回任何初始点")
+        return parsed
+
+    request = dict(
+        messages=[
+            {"role": "system", "content": "You are a design sampler. Output strictly valid JSON."},
+            {"role": "user", "content": base_tpl}
+        ],
+        temperature=0.9, # 高温增加多样性
+        max_tokens=2048  # 增加 token 上限以容纳多个点
+    )
+    return space, request, parse_init
+
+def _fill_initial_points(points, space, num_points, rng=None):
+    """LLM 返回的初始点不足时用 Random 补齐，多出时截断"""
+    print(f"  > LLM returned {len(points)} points.")
+        
+    # 如果 LLM 生成的数量不够，用 Random 补齐
+    if len(points) < num_points:
+        missing = num_points - len(points)
+        print(f"  > Missing {missing} points, filling with Random.")
+        fill_points = generate_initial_points_random(space.bounds, missing, rng=rng)
+        points.extend(fill_points)
+        
+    # 如果生成多了，截断
+    return points[:num_points]
+
+def generate_initial_points_llm(original_ranges, target_range, num_points, client, model, template_path, hedge=None, stats=None, rng=None):
+    """
+    通过 LLM 提示词一次性生成多个初始点 (Batch Generation)
+    hedge: 可选的 HedgePolicy，主请求慢或失败时向备用提供方发出同样的请求
+    stats: 可选字典，累加请求数与 token 用量
+    rng: 随机种子或 np.random.Generator，用于补齐与回退采样
+    """
+    print(f">>> LLM Init: Generating {num_points} points using {model}...")
+    space, request, parse_init = _init_request(original_ranges, target_range, num_points, template_path)
+    if request is None:
+        # 降级到 LHS
+        return generate_initial_points_lhs(space.bounds, num_points, rng=rng)
+    try:
+        points = hedged_completion(client, model, request, parse_init, hedge=hedge, stats=stats)
+        return _fill_initial_points(points, space, num_points, rng=rng)
+    except Exception as e:
+        print(f"[Error] LLM Init Failed ({e}), falling back to LHS.")
+        return generate_initial_points_lhs(space.bounds, num_points, rng=rng)
+
+async def agenerate_initial_points_llm(original_ranges, target_range, num_points, client, model, template_path, hedge=None, stats=None, rng=None):
+    """generate_initial_points_llm 的协程版本：client 与 hedge.client 为异步客户端，参数与返回值相同"""
+    print(f">>> LLM Init: Generating {num_points} points using {model}...")
+    space, request, parse_init = _init_request(original_ranges, target_range, num_points, template_path)
+    if request is None:
+        return generate_initial_points_lhs(space.bounds, num_points, rng=rng)
+    try:
+        points = await ahedged_completion(client, model, request, parse_init, hedge=hedge, stats=stats)
+        return _fill_initial_points(points, space, num_points, rng=rng)
     except Exception as e:
         print(f"[Error] LLM Init Failed ({e}), falling back to LHS.")
-        ranges_list = [original_ranges[k] for k in sorted_keys]
-        return generate_initial_points_lhs(ranges_list, num_points)
\ No newline at end of file
+        return generate_initial_points_lhs(space.bounds, num_points, rng=rng)
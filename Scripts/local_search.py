@@ -0,0 +1,69 @@
+"""LLM-RBDO 局部精化模块
+LLM 负责全局移动，局部精化在当前最优点附近用无导数的模式搜索（compass / GPS）廉价地收敛最后几个百分点：
+- 每轮沿各坐标轴正负方向各取一个试探点（共 2d 个），作为一组批量评估
+- 有改进时移动到最优试探点并放大步长，否则缩小步长
+- 每次迭代受评估预算（候选点数）约束；预算不足 2d 时按轮转顺序截取方向，各方向轮流被试探
+比较规则与主循环一致：可行点优于不可行点；均可行时比较目标函数值，均不可行时比较惩罚。
+"""
+
+import numpy as np
+
+
+def is_better(candidate, incumbent):
+    """候选结果是否优于当前最优结果（结果字典含 penalty 与 cost）"""
+    if candidate["penalty"] == 0:
+        return incumbent["penalty"] > 0 or candidate["cost"] < incumbent["cost"]
+    return incumbent["penalty"] > 0 and candidate["penalty"] < incumbent["penalty"]
+
+
+def pattern_search(evaluate, incumbent, space, step, budget, expand=2.0, contract=0.5, min_step=None):
+    """
+    以 incumbent 为起点的批量模式搜索。
+    参数：
+    - evaluate: 批量评估函数，设计点列表 -> 结果字典列表（含 design_point、penalty、cost）
+    - incumbent: 当前最优结果字典
+    - space: DesignSpace（试探点截断到上下界内）
+    - step: 初始步长（标量或长度为 d 的数组；为 0 的维度不搜索）
+    - budget: 评估预算（候选点数）
+    - expand / contract: 改进 / 未改进时的步长缩放系数
+    - min_step: 各维步长均小于该值时停止（默认上下界宽度的 1e-6 倍）
+    返回：
+    - (best, info)：最优结果字典与统计信息 {"evaluations", "polls", "improvements", "step"}
+    """
+    best = incumbent
+    x = np.asarray(incumbent["design_point"], dtype=float)
+    d = x.shape[0]
+    step = np.array(np.broadcast_to(np.asarray(step, dtype=float), (d,)))
+    min_step = space.span * 1e-6 if min_step is None else np.broadcast_to(np.asarray(min_step, dtype=float), (d,))
+    axes = np.flatnonzero(step > 0)
+    info = {"evaluations": 0, "polls": 0, "improvements": 0}
+    budget = int(budget)
+    while info["evaluations"] < budget and axes.size > 0 and np.any(step[axes] >= min_step[axes]):
+        # 试探方向：+e_i, -e_i；按已评估数轮转起点，预算不足时各方向轮流被截取
+        directions = np.zeros((2 * axes.size, d))
+        directions[np.arange(axes.size), axes] = step[axes]
+        directions[axes.size + np.arange(axes.size), axes] = -step[axes]
+        directions = np.roll(directions, -info["evaluations"], axis=0)
+        trial = space.clip(x + directions)
+        trial = trial[np.any(trial != x, axis=1)]
+        _, first = np.unique(trial, axis=0, return_index=True)
+        trial = trial[np.sort(first)]
+        trial = trial[:budget - info["evaluations"]]
+        if trial.shape[0] == 0:
+            break
+        results = evaluate(list(trial))
+        info["evaluations"] += trial.shape[0]
+        info["polls"] += 1
+        winner = results[0]
+        for r in results[1:]:
+            if is_better(r, winner):
+                winner = r
+        if is_better(winner, best):
+            best = winner
+            x = np.asarray(winner["design_point"], dtype=float)
+            step = np.minimum(step * expand, space.span)
+            info["improvements"] += 1
+        else:
+            step = step * contract
+    info["step"] = step
+    return best, info
@@ -0,0 +1,164 @@
+"""LLM-RBDO 服务器级运行指标（Prometheus 文本格式）
+跨运行累计计数器与直方图，供 /metrics 接口导出，用于生产环境的性能回归告警：
+- rbdo_runs_total / rbdo_iterations_total：运行数与迭代数
+- rbdo_iteration_seconds / rbdo_evaluation_seconds / rbdo_llm_step_seconds：各阶段耗时直方图
+- rbdo_candidates_total / rbdo_constraint_evaluations_total：候选点数与约束函数调用行数
+- rbdo_llm_tokens_total / rbdo_llm_requests_total：LLM token 用量与请求数（按提供方与模型）
+- rbdo_llm_request_seconds：LLM 单次请求延迟（导出 Scripts.hedging 中按提供方记录的延迟直方图）
+"""
+
+import math
+import threading
+
+# 秒级耗时直方图的默认桶上界
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_text(names, values, extra=None):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    """按标签累计的单调计数器"""
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1.0, **labels):
+        key = tuple(labels.get(n, "") for n in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_label_text(self.labels, key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    """按标签累计的直方图（累积桶计数、总和与总次数）"""
+
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(n, "") for n in self.labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # [各桶累积计数, 总次数, 总和]
+                state = self._values[key] = [[0] * len(self.buckets), 0, 0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+            state[1] += 1
+            state[2] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((k, (list(v[0]), v[1], v[2])) for k, v in self._values.items())
+        for key, (cumulative, count, total) in items:
+            lines.extend(_histogram_lines(self.name, self.labels, key, self.buckets, cumulative, count, total))
+        return lines
+
+
+def _histogram_lines(name, label_names, label_values, bounds, cumulative, count, total):
+    lines = []
+    for bound, c in zip(bounds, cumulative):
+        le = 'le="%s"' % _format_value(bound)
+        lines.append(f"{name}_bucket{_label_text(label_names, label_values, le)} {c}")
+    inf = 'le="+Inf"'
+    lines.append(f"{name}_bucket{_label_text(label_names, label_values, inf)} {count}")
+    lines.append(f"{name}_sum{_label_text(label_names, label_values)} {_format_value(total)}")
+    lines.append(f"{name}_count{_label_text(label_names, label_values)} {count}")
+    return lines
+
+
+RUNS = Counter("rbdo_runs_total", "Optimization runs started.", ("scenario",))
+ITERATIONS = Counter("rbdo_iterations_total", "Optimization iterations completed.", ("scenario",))
+CANDIDATES = Counter("rbdo_candidates_total", "Candidate design points evaluated.", ("scenario",))
+CONSTRAINT_EVALUATIONS = Counter("rbdo_constraint_evaluations_total",
+                                 "Constraint function rows evaluated (Monte Carlo samples, MPP search points).",
+                                 ("scenario",))
+LLM_REQUESTS = Counter("rbdo_llm_requests_total", "LLM completion requests that returned a response.", ("provider", "model"))
+LLM_TOKENS = Counter("rbdo_llm_tokens_total", "LLM tokens used.", ("provider", "model", "kind"))
+ITERATION_SECONDS = Histogram("rbdo_iteration_seconds", "Wall time per optimization iteration.", ("scenario",))
+EVALUATION_SECONDS = Histogram("rbdo_evaluation_seconds", "Wall time spent evaluating candidates per iteration.", ("scenario",))
+LLM_STEP_SECONDS = Histogram("rbdo_llm_step_seconds", "Wall time of the LLM proposal step per iteration.", ("scenario",))
+
+_METRICS = (RUNS, ITERATIONS, CANDIDATES, CONSTRAINT_EVALUATIONS, LLM_REQUESTS, LLM_TOKENS,
+            ITERATION_SECONDS, EVALUATION_SECONDS, LLM_STEP_SECONDS)
+
+
+def record_llm_usage(provider, model, usage):
+    """记录一次 LLM 请求及其 token 用量（usage 为响应中的 usage 对象，可为 None）"""
+    provider = provider or "unknown"
+    model = model or ""
+    LLM_REQUESTS.inc(provider=provider, model=model)
+    if usage is None:
+        return
+    for kind in ("prompt_tokens", "completion_tokens"):
+        value = getattr(usage, kind, None)
+        if value:
+            LLM_TOKENS.inc(value, provider=provider, model=model, kind=kind.split("_")[0])
+
+
+def _llm_latency_lines():
+    """把 Scripts.hedging 的对数分桶延迟直方图导出为 Prometheus 直方图"""
+    # 延迟导入：hedging 在记录 token 用量时依赖本模块
+    from Scripts.hedging import latency_snapshot
+
+    name = "rbdo_llm_request_seconds"
+    lines = [f"# HELP {name} LLM request latency per provider and model.", f"# TYPE {name} histogram"]
+    for (provider, model), snap in sorted(latency_snapshot().items()):
+        cumulative = []
+        running = 0
+        for c in snap["counts"][:len(snap["bounds"])]:
+            running += c
+            cumulative.append(running)
+        lines.extend(_histogram_lines(name, ("provider", "model"), (provider, model), snap["bounds"],
+                                      cumulative, snap["count"], snap["sum"]))
+    return lines
+
+
+def render_metrics(extra_gauges=None):
+    """
+    渲染全部指标为 Prometheus 文本格式。
+    参数：
+    - extra_gauges: 可选字典 {指标名: (说明, 数值)}，如评估缓存的命中数与条目数
+    返回：
+    - 文本字符串（以换行结尾）
+    """
+    lines = []
+    for metric in _METRICS:
+        lines.extend(metric.render())
+    lines.extend(_llm_latency_lines())
+    for name, (help_text, value) in sorted((extra_gauges or {}).items()):
+        lines.extend([f"# HELP {name} {help_text}", f"# TYPE {name} gauge", f"{name} {_format_value(value)}"])
+    return "\n".join(lines) + "\n"
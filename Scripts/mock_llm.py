@@ -0,0 +1,160 @@
+"""LLM-RBDO 离线模拟 LLM 提供方（provider="mock"）
+无需网络即可运行完整优化流程，用于基准测试、回归测试与高并发压测：
+- 迭代步提示：解析提示中的最优点（<<BEST>> 渲染出的“生成点: [...]”），返回其带种子的随机扰动
+- 初始采样提示：解析所需点数（<<NUM_POINTS>>）与变量范围（<<RANGES>>），返回均匀分布的整数点
+- 相同的（种子, 模型, 提示, 温度）总是得到相同的回复；可配置人工延迟模拟真实调用耗时，
+  延迟超过请求的 timeout 时在 timeout 秒后抛出 TimeoutError
+- AsyncMockClient 为 asyncio 版本（`await chat.completions.create(...)`），人工延迟期间不占用线程
+环境变量：
+- `MOCK_LLM_SEED`：随机种子（默认 0）
+- `MOCK_LLM_LATENCY`：每次调用的平均人工延迟秒数（默认 0）
+- `MOCK_LLM_JITTER`：延迟抖动的相对幅度，延迟在 latency × [1 - jitter, 1 + jitter] 内均匀取值（默认 0.5）
+"""
+
+import hashlib
+import json
+import os
+import asyncio
+import re
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+_BEST_RE = re.compile(r"^\s*生成点:\s*\[([^\]]*)\]", re.MULTILINE)
+_RANGE_RE = re.compile(r"\b(x\d+):\s*\[\s*(-?[\d.]+)\s*,\s*(-?[\d.]+)\s*\]", re.MULTILINE)
+_NAME_RE = re.compile(r'"(x\d+)"\s*:')
+_COUNT_RE = re.compile(r"(\d+)\s*个")
+
+
+def _variable_names(prompt, dimension=None):
+    """从范围说明 / 输出格式中提取变量名（x1, x2, ...）；都没有时按维度生成"""
+    # 范围说明优先：初始化模板的输出格式示例只列出了 x1、x2
+    names = [m[0] for m in _RANGE_RE.findall(prompt)] or _NAME_RE.findall(prompt)
+    if not names and dimension:
+        names = [f"x{i + 1}" for i in range(dimension)]
+    return sorted(set(names), key=lambda s: int(s[1:]))
+
+
+def _target_range(prompt):
+    """读取提示中的整数区间（<<RANGES>>），没有时使用默认区间 [0, 100]"""
+    ranges = _RANGE_RE.findall(prompt)
+    if ranges:
+        return float(ranges[0][1]), float(ranges[0][2])
+    return 0.0, 100.0
+
+
+class _MockCompletions:
+    def __init__(self, owner):
+        self._owner = owner
+
+    def create(self, model=None, messages=None, temperature=1.0, top_p=1.0, max_tokens=None, n=1, timeout=None, **kwargs):
+        return self._owner.complete(model, messages or [], temperature, int(n or 1), timeout)
+
+
+class MockClient:
+    """确定性的离线 LLM 客户端，接口与 OpenAI 客户端的 `chat.completions.create(...)` 一致
+
+    参数：
+    - seed: 随机种子
+    - latency: 每次调用的平均人工延迟（秒）
+    - jitter: 延迟抖动的相对幅度
+    """
+
+    provider = "mock"
+
+    def __init__(self, seed=None, latency=None, jitter=None):
+        self.seed = int(seed if seed is not None else os.getenv("MOCK_LLM_SEED", "0"))
+        self.latency = float(latency if latency is not None else os.getenv("MOCK_LLM_LATENCY", "0"))
+        self.jitter = float(jitter if jitter is not None else os.getenv("MOCK_LLM_JITTER", "0.5"))
+        self.chat = SimpleNamespace(completions=_MockCompletions(self))
+
+    def close(self):
+        pass
+
+    def _rng(self, model, prompt, temperature):
+        text = json.dumps([self.seed, model, prompt, temperature], ensure_ascii=False)
+        return np.random.default_rng(int(hashlib.sha256(text.encode("utf-8")).hexdigest()[:16], 16))
+
+    def _step_point(self, rng, prompt, temperature):
+        """在最优点附近做扰动（提示要求多个点时生成多个），步长随温度增大；无最优点时在区间内均匀取点"""
+        lo, hi = _target_range(prompt)
+        best = _BEST_RE.findall(prompt)
+        best = [float(v) for v in best[-1].split(",") if v.strip()] if best else []
+        names = _variable_names(prompt, len(best))
+        if len(best) != len(names):
+            best = rng.uniform(lo, hi, size=len(names))
+        scale = max(1.0, (hi - lo) * 0.05 * max(float(temperature), 0.1))
+        # 批量模板要求一次给出多个点（"k个"），否则只给一个
+        count = _COUNT_RE.search(prompt)
+        count = int(count.group(1)) if count else 1
+        points = [np.clip(np.rint(np.asarray(best) + rng.normal(0.0, scale, size=len(names))), lo, hi)
+                  for _ in range(count)]
+        return json.dumps([{name: int(v) for name, v in zip(names, point)} for point in points])
+
+    def _init_points(self, rng, prompt):
+        """按提示要求的数量在区间内均匀生成整数点"""
+        lo, hi = _target_range(prompt)
+        names = _variable_names(prompt)
+        count = _COUNT_RE.search(prompt)
+        count = int(count.group(1)) if count else 5
+        points = rng.integers(int(lo), int(hi) + 1, size=(count, len(names)))
+        return json.dumps([{name: int(v) for name, v in zip(names, row)} for row in points])
+
+    def _delay(self, rng):
+        """本次调用的人工延迟秒数"""
+        return self.latency * rng.uniform(1.0 - self.jitter, 1.0 + self.jitter) if self.latency > 0 else 0.0
+
+    def complete(self, model, messages, temperature, n=1, timeout=None):
+        """生成 n 个确定性回复，返回与 OpenAI ChatCompletion 结构相同的对象；人工延迟超过 timeout 秒时抛出 TimeoutError"""
+        prompt = messages[-1]["content"] if messages else ""
+        rng = self._rng(model, prompt, temperature)
+        delay = self._delay(rng)
+        if timeout is not None and delay > timeout:
+            time.sleep(max(0.0, timeout))
+            raise TimeoutError("模拟 LLM 请求超时")
+        if delay > 0:
+            time.sleep(delay)
+        return self._respond(rng, model, messages, prompt, temperature, n)
+
+    def _respond(self, rng, model, messages, prompt, temperature, n):
+        is_step = bool(_BEST_RE.search(prompt))
+        contents = [self._step_point(rng, prompt, temperature) if is_step else self._init_points(rng, prompt)
+                    for _ in range(n)]
+        prompt_tokens = sum(len(m.get("content", "")) for m in messages) // 4
+        completion_tokens = sum(len(c) for c in contents) // 4
+        return SimpleNamespace(
+            model=model,
+            choices=[SimpleNamespace(index=i, finish_reason="stop", message=SimpleNamespace(role="assistant", content=c))
+                     for i, c in enumerate(contents)],
+            usage=SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                                  total_tokens=prompt_tokens + completion_tokens)
+        )
+
+
+class _AsyncMockCompletions(_MockCompletions):
+    async def create(self, model=None, messages=None, temperature=1.0, top_p=1.0, max_tokens=None, n=1, timeout=None, **kwargs):
+        return await self._owner.acomplete(model, messages or [], temperature, int(n or 1), timeout)
+
+
+class AsyncMockClient(MockClient):
+    """MockClient 的 asyncio 版本：回复与 MockClient 完全相同，人工延迟用 asyncio.sleep 等待"""
+
+    def __init__(self, seed=None, latency=None, jitter=None):
+        super().__init__(seed, latency, jitter)
+        self.chat = SimpleNamespace(completions=_AsyncMockCompletions(self))
+
+    async def close(self):
+        pass
+
+    async def acomplete(self, model, messages, temperature, n=1, timeout=None):
+        """complete 的协程版本"""
+        prompt = messages[-1]["content"] if messages else ""
+        rng = self._rng(model, prompt, temperature)
+        delay = self._delay(rng)
+        if timeout is not None and delay > timeout:
+            await asyncio.sleep(max(0.0, timeout))
+            raise TimeoutError("模拟 LLM 请求超时")
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return self._respond(rng, model, messages, prompt, temperature, n)
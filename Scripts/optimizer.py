@@ -0,0 +1,829 @@
+"""LLM-RBDO 优化主循环模块
+把 app.py 中的流式优化循环抽取为可复用的生成器，供 Flask 接口与基准测试（benchmarks）共用：
+1. build_llm_client: 按运行配置创建 LLM 客户端（含对冲请求与回复缓存）
+2. validate_run / generate_init_points: 运行前校验，按配置生成初始点（LHS / 随机 / LLM）
+3. optimization_events: 优化主循环，逐个产出事件字典（log / update，可选 timing）
+   可选地按迭代写入检查点（Scripts.checkpoint），并可从检查点恢复继续优化
+4. async_optimization_events: 同一主循环的 asyncio 驱动（ASGI 服务使用）
+主循环本身是与 I/O 无关的生成器：LLM 调用（LLMRequest）、计算密集的批量评估（Compute）与检查点文件读写（BlockingIO）
+以“效果”对象产出，由驱动执行后把结果送回。同步驱动直接调用；异步驱动 await 异步 LLM 客户端，
+并把评估与文件读写交给线程，不阻塞事件循环。
+每次迭代的阶段耗时、候选点数与约束调用次数同时记入服务器级指标（Scripts.metrics）。
+每次运行使用由 config['random_seed'] 派生的独立随机数生成器（不使用进程级的全局随机状态），
+并发运行互不干扰，给出种子时运行可复现；生成器状态随检查点保存。
+"""
+
+import asyncio
+import os
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+from Scripts.api_client import create_async_client, create_client
+from Scripts.checkpoint import OptimizerState, checkpoint_path, load_checkpoint, save_checkpoint
+from Scripts.design_space import DesignSpace
+from Scripts.executor import evaluate_points
+from Scripts.eval_cache import settings_digest
+from Scripts.hedging import HedgePolicy
+from Scripts.llm_cache import AsyncCachedClient, CachedClient, cache_dir
+from Scripts.local_search import pattern_search
+from Scripts.llm_ops import (
+    agenerate_initial_points_llm,
+    agenerate_new_point_with_llm,
+    agenerate_new_points_with_llm,
+    generate_new_point_with_llm,
+    generate_new_points_with_llm,
+    generate_initial_points_random,
+    generate_initial_points_lhs,
+    generate_initial_points_llm
+)
+from Scripts import metrics
+from Scripts.perturbation import generate_perturbations
+from Scripts.problems import PROBLEM_REGISTRY
+from Scripts.racing import race, ranking_key
+from Scripts.rbdo_utils import DEFAULT_MAX_BATCH_SAMPLES
+from Scripts.sampling import SamplingEngine
+from Scripts.surrogate import ActiveLearningSurrogate
+
+MAX_PROPOSALS = int(os.getenv("LLM_MAX_PROPOSALS", "16"))  # 每次迭代并发 LLM 候选请求数的上限
+INIT_TEMPLATE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "prompt_template_Init.md")
+BATCH_TEMPLATE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "prompt_template_Chinese_Batch.md")
+
+
+def process_std_input(val):
+    """解析标准差参数：列表转为数组，标量转为浮点数，无法解析时回退到 0.05"""
+    if isinstance(val, list):
+        return np.array(val)
+    try:
+        return float(val)
+    except:
+        return 0.05 # Fallback
+
+
+def _run_rng(config, stream):
+    """
+    本次运行的随机数生成器：由 config['random_seed'] 派生的独立子流（未给出种子时使用随机熵）。
+    参数：
+    - stream: 0 为初始点采样，1 为优化主循环（扰动、蒙特卡洛样本等）
+    """
+    return np.random.default_rng(np.random.SeedSequence(config.get('random_seed')).spawn(2)[stream])
+
+
+@contextmanager
+def _phase(timings, name):
+    """把代码块耗时（秒）累加到 timings[name]；timings 为 None 时不计时"""
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = timings.get(name, 0.0) + time.perf_counter() - start
+
+
+class Compute:
+    """主循环产出的计算密集工作（批量评估等）：同步驱动直接调用，异步驱动交给线程池"""
+
+    def __init__(self, fn, *args):
+        self.fn = fn
+        self.args = args
+
+    def run(self, client, hedge):
+        return self.fn(*self.args)
+
+    async def arun(self, client, hedge, executor):
+        return await asyncio.get_running_loop().run_in_executor(executor, self.fn, *self.args)
+
+
+class BlockingIO(Compute):
+    """主循环产出的阻塞文件读写（检查点保存 / 加载）：同步驱动直接调用，异步驱动用 asyncio.to_thread 移出事件循环"""
+
+    async def arun(self, client, hedge, executor):
+        return await asyncio.to_thread(self.fn, *self.args)
+
+
+class LLMRequest:
+    """主循环产出的 LLM 调用：fn / afn 为 Scripts.llm_ops 中的同步函数与对应协程，client 与 hedge 由驱动传入"""
+
+    def __init__(self, fn, afn, **kwargs):
+        self.fn = fn
+        self.afn = afn
+        self.kwargs = kwargs
+
+    def run(self, client, hedge):
+        return self.fn(client=client, hedge=hedge, **self.kwargs)
+
+    async def arun(self, client, hedge, executor):
+        return await self.afn(client=client, hedge=hedge, **self.kwargs)
+
+
+def build_llm_client(config):
+    """
+    按运行配置创建 LLM 客户端。
+    参数：
+    - config: 运行配置字典（provider、api_key、base_url、llm_timeout、hedge_*、llm_cache 等）
+    返回：
+    - (client, hedge)：客户端与可选的 HedgePolicy（未开启对冲时为 None）
+    """
+    return _build_client(config, create_client, CachedClient)
+
+
+def build_async_llm_client(config):
+    """build_llm_client 的异步版本（须在事件循环中调用）：返回异步客户端与对冲策略（其 client 同为异步客户端）"""
+    return _build_client(config, create_async_client, AsyncCachedClient)
+
+
+def _build_client(config, create, cached_client):
+    # LLM 回复磁盘缓存（可选）：record 录制 / replay 离线回放 / passthrough 直通
+    # replay 模式只读缓存，不创建真实客户端，也不需要密钥与网络
+    # 缓存目录位于服务器端的 LLM_CACHE_DIR 下，请求只能通过 llm_cache_name 选择其中的子目录
+    llm_cache_mode = config.get('llm_cache')
+    llm_cache_dir = cache_dir(config.get('llm_cache_name')) if llm_cache_mode else None
+    hedge = None
+    if llm_cache_mode == 'replay':
+        return cached_client(None, llm_cache_dir, llm_cache_mode), hedge
+    client = create(
+        config.get('provider'), config.get('api_key'), config.get('base_url'),
+        timeout=config.get('llm_timeout'), max_retries=config.get('llm_max_retries')
+    )
+    # 对冲请求（可选）：主提供方超过延迟分位数仍未返回时，向备用提供方 / 模型发出同样的请求
+    if config.get('hedge_provider') or config.get('hedge_model'):
+        hedge_client = create(
+            config.get('hedge_provider') or config.get('provider'),
+            config.get('hedge_api_key') or (None if config.get('hedge_provider') else config.get('api_key')),
+            config.get('hedge_base_url') or (None if config.get('hedge_provider') else config.get('base_url')),
+            timeout=config.get('llm_timeout'), max_retries=config.get('llm_max_retries')
+        )
+        hedge = HedgePolicy(
+            hedge_client, config.get('hedge_model') or config.get('model'),
+            percentile=float(config.get('hedge_percentile', 95)),
+            delay=config.get('hedge_delay'),
+            initial_delay=float(config.get('hedge_initial_delay', 5.0))
+        )
+    if llm_cache_mode:
+        client = cached_client(client, llm_cache_dir, llm_cache_mode)
+        if hedge is not None:
+            hedge.client = cached_client(hedge.client, llm_cache_dir, llm_cache_mode)
+    return client, hedge
+
+
+def validate_run(config, ranges_raw):
+    """
+    运行前校验场景、设计变量范围与检查点名称（Flask 与 ASGI 接口共用），
+    并把每次迭代的 LLM 候选请求数 llm_proposals 限制在 [1, MAX_PROPOSALS]。
+    返回：
+    - 错误信息字符串（前端直接显示）；通过校验时返回 None
+    """
+    scenario_id = config.get('problem_scenario', 'math_2d_real')
+    if scenario_id not in PROBLEM_REGISTRY:
+        return f"Unknown scenario: {scenario_id}"
+    try:
+        # 按键排序 x1, x2...，并检查范围格式
+        DesignSpace(ranges_raw)
+    except Exception as e:
+        return f"Range parsing failed: {str(e)}"
+    try:
+        config['llm_proposals'] = min(max(1, int(config.get('llm_proposals', 1))), MAX_PROPOSALS)
+    except (TypeError, ValueError):
+        return f"Invalid llm_proposals: {config.get('llm_proposals')}"
+    # 检查点名称（resume_from 必须指向已存在的检查点）
+    try:
+        if config.get('checkpoint_name'):
+            checkpoint_path(config['checkpoint_name'])
+        if config.get('resume_from') and not os.path.exists(checkpoint_path(config['resume_from'])):
+            raise ValueError(f"checkpoint not found: {config['resume_from']}")
+    except ValueError as e:
+        return f"Checkpoint: {str(e)}"
+    return None
+
+
+def generate_init_points(config, ranges_raw, client, hedge=None):
+    """
+    按配置生成初始点（支持三种模式：'lhs'（默认）| 'random' | 'llm'）。
+    返回：
+    - (init_points, sampling_log_msg)；从检查点恢复（config['resume_from']）时不生成初始点
+    """
+    if config.get('resume_from'):
+        return [], f"Resuming from checkpoint '{config['resume_from']}'."
+    init_sampling_method = config.get('initial_sampling_method', 'lhs') # 默认 LHS
+    num_init = int(config.get('num_initial_points', 20))
+    target_range = [config.get('target_range_min', 0), config.get('target_range_max', 100)]
+    # 准备 range_list (用于 Random 和 LHS)
+    ranges_list = DesignSpace(ranges_raw).bounds
+    rng = _run_rng(config, 0)
+
+    if init_sampling_method == 'llm':
+        # LLM Prompt Sampling
+        # 需要特定的初始化模板路径
+        init_points = generate_initial_points_llm(
+            ranges_raw, target_range, num_init, 
+            client, config['model'], INIT_TEMPLATE_PATH, hedge=hedge, rng=rng
+        )
+        return init_points, f"Initialized with LLM Prompt ({len(init_points)} points)."
+    if init_sampling_method == 'random':
+        # Random Uniform
+        init_points = generate_initial_points_random(ranges_list, num_init, rng=rng)
+        return init_points, f"Initialized with Random Uniform ({num_init} points)."
+    # Default: LHS
+    init_points = generate_initial_points_lhs(ranges_list, num_init, rng=rng)
+    return init_points, f"Initialized with Latin Hypercube Sampling ({num_init} points)."
+
+
+async def agenerate_init_points(config, ranges_raw, client, hedge=None):
+    """generate_init_points 的异步版本：'llm' 模式 await 异步客户端，其余模式同步生成"""
+    if config.get('resume_from') or config.get('initial_sampling_method', 'lhs') != 'llm':
+        return generate_init_points(config, ranges_raw, client, hedge)
+    num_init = int(config.get('num_initial_points', 20))
+    target_range = [config.get('target_range_min', 0), config.get('target_range_max', 100)]
+    init_points = await agenerate_initial_points_llm(
+        ranges_raw, target_range, num_init,
+        client, config['model'], INIT_TEMPLATE_PATH, hedge=hedge, rng=_run_rng(config, 0)
+    )
+    return init_points, f"Initialized with LLM Prompt ({len(init_points)} points)."
+
+
+def optimization_events(config, ranges_raw, init_points, client, hedge=None, sampling_log_msg="", eval_cache=None, timings=None, cancel=None):
+    """
+    LLM-RBDO 优化主循环：评估初始点后迭代地由 LLM 提出候选点、生成扰动并批量评估。
+    参数：
+    - config: 运行配置字典（同 /run_optimization 的 config）
+    - ranges_raw: 设计变量范围字典，键形如 'x{i}_range'
+    - init_points: 初始设计点列表
+    - client: LLM 客户端
+    - hedge: 可选的 HedgePolicy
+    - sampling_log_msg: 初始采样说明（作为第二条日志输出）
+    - eval_cache: 可选的 EvaluationCache（config['eval_cache'] 为真时使用）
+    - timings: 可选字典，按阶段（'llm' | 'perturbation' | 'evaluation' | 'local_search'）累加耗时秒数
+    - cancel: 可选的 threading.Event；每次迭代开始前检查，置位后停止优化
+    检查点（可选）：
+    - config['checkpoint_name']: 每 config['checkpoint_every']（默认 1）次迭代及优化结束时写入该名称的检查点
+    - config['resume_from']: 从该名称的检查点恢复（跳过初始点评估，从检查点记录的迭代继续）
+    返回：
+    - 生成器，逐个产出事件字典：{"type": "log", "msg": ...} 或 {"type": "update", ...}；
+      config['timing_events'] 为真时，每次迭代的 update 之后追加一个 {"type": "timing", ...} 事件
+    """
+    steps = _optimization_steps(config, ranges_raw, init_points, sampling_log_msg, eval_cache, timings, cancel)
+    value, error = None, None
+    try:
+        while True:
+            try:
+                item = steps.throw(error) if error is not None else steps.send(value)
+            except StopIteration:
+                return
+            value, error = None, None
+            if isinstance(item, (Compute, LLMRequest)):
+                try:
+                    value = item.run(client, hedge)
+                except Exception as e:
+                    error = e
+            else:
+                yield item
+    finally:
+        steps.close()
+
+
+async def async_optimization_events(config, ranges_raw, init_points, client, hedge=None, sampling_log_msg="", eval_cache=None, timings=None, cancel=None, executor=None):
+    """
+    optimization_events 的 asyncio 驱动（异步生成器，事件与同步版本相同）：
+    LLM 调用 await 异步客户端（client / hedge 来自 build_async_llm_client），批量评估在 executor 中运行
+    （None 时使用事件循环的默认线程池），检查点读写用 asyncio.to_thread，等待期间事件循环可服务其他连接。
+    参数同 optimization_events，另加：
+    - executor: 运行蒙特卡洛评估的 concurrent.futures.Executor
+    """
+    steps = _optimization_steps(config, ranges_raw, init_points, sampling_log_msg, eval_cache, timings, cancel)
+    value, error = None, None
+    try:
+        while True:
+            try:
+                item = steps.throw(error) if error is not None else steps.send(value)
+            except StopIteration:
+                return
+            value, error = None, None
+            if isinstance(item, (Compute, LLMRequest)):
+                try:
+                    value = await item.arun(client, hedge, executor)
+                except Exception as e:
+                    error = e
+            else:
+                yield item
+    finally:
+        steps.close()
+
+
+def _build_surrogate(config, con_fn, current_std):
+    """代理模式（可选）：可靠性分析在按 U 学习函数主动补充训练点的高斯过程模型上进行，真实约束只在训练点上调用；未开启时返回 None"""
+    if not config.get('surrogate', False):
+        return None
+    return ActiveLearningSurrogate(
+        con_fn, current_std, threshold=config['threshold'],
+        initial_samples=config.get('surrogate_initial_samples'),
+        enrich_per_step=int(config.get('surrogate_enrich', 50)),
+        candidates=int(config.get('surrogate_candidates', 500)),
+        u_stop=float(config.get('surrogate_u_stop', 2.0)),
+        max_samples=int(config.get('surrogate_max_samples', 1000)),
+        background=bool(config.get('surrogate_background', True)),
+        seed=config.get('random_seed')
+    )
+
+
+def _optimization_steps(config, ranges_raw, init_points, sampling_log_msg="", eval_cache=None, timings=None, cancel=None):
+    """优化主循环（参数同 optimization_events）：产出事件字典与 Compute / BlockingIO / LLMRequest 效果，效果的结果由驱动 send 回来"""
+    problem_def = PROBLEM_REGISTRY[config.get('problem_scenario', 'math_2d_real')]
+    surrogate = _build_surrogate(config, problem_def['con'], process_std_input(config.get('std', 0.05)))
+    # 代理模型的后台训练线程在任何退出路径（正常结束、异常、取消、客户端断开）都要关闭
+    try:
+        yield from _optimization_loop(config, ranges_raw, init_points, sampling_log_msg, eval_cache, timings, cancel, surrogate)
+    finally:
+        if surrogate is not None:
+            surrogate.close()
+
+
+def _optimization_loop(config, ranges_raw, init_points, sampling_log_msg, eval_cache, timings, cancel, surrogate):
+    """_optimization_steps 的主体；surrogate 为可选的代理模型，由调用方创建并关闭"""
+    scenario_id = config.get('problem_scenario', 'math_2d_real')
+    problem_def = PROBLEM_REGISTRY[scenario_id]
+    obj_fn = problem_def['obj']
+    con_fn = problem_def['con']
+    expand_point = problem_def['expand']
+    current_std = process_std_input(config.get('std', 0.05))
+    current_adition_std = process_std_input(config.get('adition_point_std', 0.1))
+    target_range = [config['target_range_min'], config['target_range_max']]
+    space = DesignSpace(ranges_raw, target_range)
+    d_design = space.d
+
+    # 每次迭代的耗时事件（可选）：LLM 延迟、token 用量、评估耗时与吞吐等
+    timing_events = bool(config.get('timing_events', False))
+    metrics.RUNS.inc(scenario=scenario_id)
+
+    def timing_event(iteration, phases, llm_stats, results, iteration_seconds):
+        """汇总一次迭代的耗时与吞吐；同时记入服务器级指标"""
+        evaluations = int(sum(r["n_samples"] for r in results))
+        evaluation_seconds = phases.get("evaluation", 0.0)
+        metrics.CANDIDATES.inc(len(results), scenario=scenario_id)
+        metrics.CONSTRAINT_EVALUATIONS.inc(evaluations, scenario=scenario_id)
+        metrics.EVALUATION_SECONDS.observe(evaluation_seconds, scenario=scenario_id)
+        if iteration > 0:
+            metrics.ITERATIONS.inc(scenario=scenario_id)
+            metrics.ITERATION_SECONDS.observe(iteration_seconds, scenario=scenario_id)
+            metrics.LLM_STEP_SECONDS.observe(phases.get("llm", 0.0), scenario=scenario_id)
+        if timings is not None:
+            for name, value in phases.items():
+                timings[name] = timings.get(name, 0.0) + value
+        return {
+            "type": "timing",
+            "iteration": iteration,
+            "iteration_seconds": iteration_seconds,
+            "llm_seconds": phases.get("llm", 0.0),
+            "prompt_seconds": llm_stats.get("prompt_seconds", 0.0),
+            "llm_requests": llm_stats.get("llm_requests", 0),
+            "hedged_requests": llm_stats.get("hedged_requests", 0),
+            "prompt_tokens": llm_stats.get("prompt_tokens", 0),
+            "completion_tokens": llm_stats.get("completion_tokens", 0),
+            "total_tokens": llm_stats.get("total_tokens", 0),
+            "perturbation_seconds": phases.get("perturbation", 0.0),
+            "local_search_seconds": phases.get("local_search", 0.0),
+            "candidates": len(results),
+            "constraint_evaluations": evaluations,
+            "evaluation_seconds": evaluation_seconds,
+            "samples_per_sec": evaluations / evaluation_seconds if evaluation_seconds > 0 else None,
+        }
+
+    yield {"type": "log", "msg": f"Scenario '{scenario_id}' loaded. Init method: {config.get('initial_sampling_method', 'lhs')}"}
+    yield {"type": "log", "msg": f">>> {sampling_log_msg}"}
+    
+    current_points = np.array(init_points)
+    messages = []
+    rng = _run_rng(config, 1)
+    
+    # 公共随机数 (CRN)：同一运行内所有候选点共享标准正态基矩阵，降低候选点间比较的蒙特卡洛噪声
+    # 采样器：'mc' 伪随机数，或 'sobol' / 'halton' / 'lhs' 随机化低差异序列 (QMC)
+    sampler = config.get('sampler', 'mc')
+    engine = None
+    if config.get('common_random_numbers', False):
+        engine = SamplingEngine(seed=config.get('random_seed'), refresh_every=config.get('crn_refresh_every', 0), sampler=sampler)
+    # 自适应序贯蒙特卡洛：远离约束边界的候选点提前停止采样
+    adaptive = bool(config.get('adaptive_sampling', False))
+    
+    def local_expand(p):
+        if expand_point: return expand_point(p)
+        return p
+
+    reliability_method = config.get('reliability_method', 'mc')
+    # 筛选方法（如 'form'）：扰动组先用快速方法筛选，仅对胜出点用 reliability_method 复核
+    screening_method = config.get('screening_method')
+
+    eval_settings = dict(
+        N=int(config['N']), 
+        threshold=config['threshold'], 
+        reliability_target=config['reliability_target'], 
+        constraint_source=con_fn, 
+        objective_fn=obj_fn, 
+        std=current_std, 
+        penalty_weight=config['penalty_weight'],
+        is_samples=int(config.get('is_samples', 2000)),
+        sorm=bool(config.get('sorm', False)),
+        sampler=sampler,
+        replicates=int(config.get('qmc_replicates', 1)),
+        adaptive=adaptive,
+        confidence=float(config.get('adaptive_confidence', 0.95)),
+        initial_samples=int(config.get('adaptive_initial_samples', 1000)),
+        # 流式分块：单次约束调用的样本行数上限，峰值内存与 N 无关；可选 float32 评估
+        max_batch_samples=int(config.get('chunk_size', DEFAULT_MAX_BATCH_SAMPLES)),
+        dtype=np.float32 if config.get('float32', False) else None,
+        seed=rng
+    )
+    # 评估缓存：重复提出的设计点直接复用此前的评估结果（代理模型随训练点变化，代理模式下不使用缓存）
+    use_cache = bool(config.get('eval_cache', False)) and eval_cache is not None and surrogate is None
+    cache_stats = {"hits": 0, "misses": 0}
+
+    def evaluate_group(points_design, method=None, n_samples=None):
+        """批量评估一组设计点：所有候选点的样本合并为一次向量化约束调用，命中缓存的点跳过评估；n_samples 覆盖 N（竞速使用）"""
+        points_full = np.array([local_expand(p) for p in points_design])
+        method = method or reliability_method
+        group_settings = eval_settings if n_samples is None else dict(eval_settings, N=int(n_samples))
+        results = [None] * len(points_full)
+        keys = [None] * len(points_full)
+        pending = {}
+        if use_cache:
+            digest = settings_digest(dict(
+                group_settings, method=method, scenario=scenario_id,
+                constraint_source=None, objective_fn=None, seed=None,
+                common_random_numbers=engine is not None, random_seed=config.get('random_seed')
+            ))
+            for i, p_full in enumerate(points_full):
+                keys[i] = key = eval_cache.make_key(p_full, digest)
+                if key in pending:
+                    pending[key].append(i)
+                    continue
+                cached = eval_cache.get(key)
+                if cached is not None:
+                    cache_stats["hits"] += 1
+                    results[i] = cached[:3] + (0,) + cached[4:]
+                else:
+                    cache_stats["misses"] += 1
+                    pending[key] = [i]
+            eval_idx = [idxs[0] for idxs in pending.values()]
+        else:
+            eval_idx = list(range(len(points_full)))
+
+        if eval_idx:
+            settings = group_settings
+            if surrogate is not None:
+                surrogate.enrich(points_full[eval_idx])
+                settings = dict(group_settings, constraint_source=surrogate.models)
+            penalties, objectives, reliabilities, info = evaluate_points(
+                points_full[eval_idx], 
+                kind=config.get('executor', 'serial'),
+                workers=config.get('workers'),
+                engine=engine,
+                method=method,
+                **settings
+            )
+            for j, i in enumerate(eval_idx):
+                value = (float(penalties[j]), float(objectives[j]), reliabilities[j], int(info["n_samples"][j]),
+                         info["ci_lower"][j], info["ci_upper"][j])
+                results[i] = value
+                if use_cache:
+                    eval_cache.put(keys[i], value)
+                    for dup in pending[keys[i]][1:]:
+                        results[dup] = value[:3] + (0,) + value[4:]
+        return [{
+            "point": p_full, 
+            "design_point": p_full[:d_design], 
+            "penalty": p, 
+            "cost": c, 
+            "reliabilities": rels,
+            "n_samples": n,
+            "ci_lower": lower,
+            "ci_upper": upper
+        } for p_full, (p, c, rels, n, lower, upper) in zip(points_full, results)]
+
+    def surrogate_log(label):
+        return {"type": "log", "msg": f"{label}: surrogate trained on {surrogate.true_evaluations} true constraint evaluations."}
+
+    def samples_log(results, label):
+        used = sum(r["n_samples"] for r in results)
+        budget = len(results) * int(config['N'])
+        return {"type": "log", "msg": f"{label}: adaptive MC used {used}/{budget} samples ({used / budget:.1%})"}
+        
+    # 检查点：保存 / 恢复循环状态（最优点、历史消息、停滞计数、随机数状态）
+    checkpoint_name = config.get('checkpoint_name')
+    checkpoint_every = max(1, int(config.get('checkpoint_every', 1)))
+    resume_from = config.get('resume_from')
+
+    def snapshot(iteration):
+        return OptimizerState(
+            scenario_id, iteration, best_point_design, best_cost, best_penalty, best_reliabilities,
+            current_point_design, messages, stagnation_count,
+            random_state=rng.bit_generator.state,
+            engine_state=engine.get_state() if engine is not None else None,
+            cache_stats=cache_stats
+        )
+
+    def write_checkpoint(iteration):
+        """写入检查点（以 BlockingIO 效果产出，用 yield from 调用）；失败时只记录日志，不中断优化"""
+        try:
+            yield BlockingIO(save_checkpoint, snapshot(iteration), checkpoint_name)
+        except (OSError, ValueError) as e:
+            return {"type": "log", "msg": f"Checkpoint Error: {e}"}
+        return None
+
+    stagnation_count = 0
+    start_iter = 0
+    if resume_from:
+        # --- 从检查点恢复 ---
+        state = yield BlockingIO(load_checkpoint, resume_from)
+        if state.scenario != scenario_id:
+            raise ValueError(f"检查点场景 {state.scenario} 与当前场景 {scenario_id} 不一致")
+        if len(state.best_point) != d_design:
+            raise ValueError(f"检查点设计变量维度 {len(state.best_point)} 与当前维度 {d_design} 不一致")
+        best_point_design = state.best_point
+        current_point_design = state.current_point
+        best_cost = state.best_cost
+        best_penalty = state.best_penalty
+        best_reliabilities = state.best_reliabilities
+        messages = state.messages
+        stagnation_count = state.stagnation_count
+        cache_stats.update(state.cache_stats)
+        start_iter = state.iteration
+        if state.random_state is not None:
+            rng.bit_generator.state = state.random_state
+        if engine is not None and state.engine_state is not None:
+            engine.set_state(state.engine_state)
+        yield {"type": "log", "msg": f"Resumed from checkpoint '{resume_from}' at iteration {start_iter}."}
+        yield {
+            "type": "update",
+            "iteration": start_iter,
+            "cost": best_cost,
+            "penalty": best_penalty,
+            "point": best_point_design.tolist(),
+            "reliabilities": best_reliabilities.tolist(),
+            **({"cache": dict(cache_stats, size=eval_cache.stats()["size"])} if use_cache else {})
+        }
+    else:
+        # --- Phase 1: 评估初始点 ---
+        yield {"type": "log", "msg": f"Evaluating {len(current_points)} init points..."}
+        iter_start = time.perf_counter()
+        phases = {}
+        with _phase(phases, "evaluation"):
+            penalty_objective_list = yield Compute(evaluate_group, current_points)
+        timing = timing_event(0, phases, {}, penalty_objective_list, time.perf_counter() - iter_start)
+        if adaptive:
+            yield samples_log(penalty_objective_list, "Init")
+        if surrogate is not None:
+            yield surrogate_log("Init")
+        
+        penalties = [x["penalty"] for x in penalty_objective_list]
+        objectives = [x["cost"] for x in penalty_objective_list]
+    
+        valid_indices = [i for i, p in enumerate(penalties) if p == 0]
+        if valid_indices:
+            valid_objectives = [objectives[i] for i in valid_indices]
+            best_idx = valid_indices[np.argmin(valid_objectives)]
+        else:
+            best_idx = np.argmin(penalties)
+
+        best_point_design = penalty_objective_list[best_idx]["design_point"]
+        current_point_design = best_point_design
+        best_cost = penalty_objective_list[best_idx]["cost"]
+        best_penalty = penalty_objective_list[best_idx]["penalty"]
+        best_reliabilities = penalty_objective_list[best_idx]["reliabilities"]
+    
+        yield {
+            "type": "update", 
+            "iteration": 0,
+            "cost": best_cost,
+            "penalty": best_penalty,
+            "point": best_point_design.tolist(), 
+            "reliabilities": best_reliabilities.tolist() if hasattr(best_reliabilities, "tolist") else best_reliabilities,
+            **({"cache": dict(cache_stats, size=eval_cache.stats()["size"])} if use_cache else {})
+        }
+        if timing_events:
+            yield timing
+
+    completed = last_saved = start_iter
+    if checkpoint_name and not resume_from:
+        error = yield from write_checkpoint(0)
+        if error:
+            yield error
+    
+    max_iter = int(config['max_iterations'])
+    num_proposals = max(1, int(config.get('llm_proposals', 1)))
+    # 批量输出（可选）：每个 LLM 回复给出 k 个互不相同的点，使用服务器端的批量模板（含 <<NUM_POINTS>>），不接受请求指定的路径
+    batch_size = max(1, int(config.get('llm_batch_size', 1)))
+    step_template = BATCH_TEMPLATE_PATH if batch_size > 1 else config['template_path']
+    # 扰动方法：'reject'（默认，丢弃越界点）| 'truncnorm' | 'reflect' | 'sobol'（后三者保证恰好生成 adition_point_number 个界内点）
+    perturbation_method = config.get('perturbation', 'reject')
+    perturbation_radius = float(config.get('perturbation_radius', 2.0))
+    # 局部精化（可选）：每次迭代在当前最优点附近做至多 local_search_budget 次评估的批量模式搜索，
+    # 初始步长为扰动标准差的 local_search_step 倍
+    local_budget = int(config.get('local_search_budget', 0))
+    local_std = current_adition_std[:d_design] if np.ndim(current_adition_std) > 0 else current_adition_std
+    local_step = np.asarray(local_std, dtype=float) * float(config.get('local_search_step', 0.5))
+    # 竞速（可选）：扰动组先以少量样本评估，按可靠性置信区间与可行优先排序逐轮淘汰，
+    # 幸存点以 racing_eta 倍样本数重新评估，只有胜出点以完整 N 评估（仅适用于蒙特卡洛评估）
+    screening = screening_method and screening_method != reliability_method
+    racing = bool(config.get('racing', False))
+    if racing and (screening or reliability_method != 'mc'):
+        racing = False
+        yield {"type": "log", "msg": "Racing disabled: requires reliability_method 'mc' without screening."}
+
+    def evaluate_candidates(points):
+        """评估一次迭代的候选组并选出胜出点；返回 (胜出点, 组内结果, 本组全部评估结果, 竞速轮次)"""
+        if racing:
+            best, results, schedule = race(
+                lambda pts, n: evaluate_group(pts, n_samples=n), points, int(config['N']),
+                config['reliability_target'], config['penalty_weight'],
+                initial_samples=config.get('racing_initial_samples'), eta=float(config.get('racing_eta', 2.0))
+            )
+            return best, results, list(results), schedule
+        results = evaluate_group(points, method=screening_method if screening else None)
+        evaluated = list(results)
+        best = min(results, key=ranking_key)
+        if screening:
+            best = evaluate_group([best["design_point"]])[0]
+            evaluated.append(best)
+        return best, results, evaluated, None
+    
+    # --- Phase 2: 迭代循环 ---
+    for i in range(start_iter, max_iter):
+        iter_num = i + 1
+        if cancel is not None and cancel.is_set():
+            yield {"type": "log", "msg": "Stop: Cancelled."}
+            break
+        iter_start = time.perf_counter()
+        phases = {}
+        llm_stats = {}
+        if engine is not None:
+            engine.step()
+        
+        mapped_current = space.to_int(current_point_design).tolist()
+        msg_item = {
+            "iteration": iter_num, 
+            "point": mapped_current, 
+            "penalty": best_penalty, 
+            "objective": best_cost
+        }
+        messages.append(msg_item)
+        if len(messages) > int(config.get('retain_number', 5)): 
+            messages = messages[-int(config.get('retain_number', 5)):]
+        
+        latest_best_int = space.to_int(best_point_design).tolist()
+        best_point_msg = {
+            "iteration": iter_num, 
+            "point": latest_best_int, 
+            "penalty": best_penalty, 
+            "objective": best_cost
+        }
+        
+        llm_logs = []
+        with _phase(phases, "llm"):
+            try:
+                if num_proposals > 1 or batch_size > 1:
+                    # 并发获取多个 LLM 候选点，全部失败时回退到当前最优点
+                    llm_points = yield LLMRequest(
+                        generate_new_points_with_llm, agenerate_new_points_with_llm,
+                        num_proposals=num_proposals, messages=messages, best_point_message=best_point_msg,
+                        temperature=config['temperature'], top_p=config['top_p'],
+                        original_ranges=space, target_range=target_range, max_tokens=config['max_tokens'],
+                        model=config['model'], template_path=step_template,
+                        deadline=config.get('llm_deadline'), use_n=bool(config.get('llm_use_n', False)),
+                        stats=llm_stats, batch_size=batch_size
+                    )
+                    llm_logs.append({"type": "log", "msg": f"Iter {iter_num}: {len(llm_points)}/{num_proposals * batch_size} LLM proposals received."})
+                    if not llm_points:
+                        llm_points = [best_point_design]
+                else:
+                    llm_points = [(yield LLMRequest(
+                        generate_new_point_with_llm, agenerate_new_point_with_llm,
+                        messages=messages, best_point_message=best_point_msg,
+                        temperature=config['temperature'], top_p=config['top_p'],
+                        original_ranges=space, target_range=target_range, max_tokens=config['max_tokens'],
+                        model=config['model'], template_path=config['template_path'], print_prompt=False,
+                        stats=llm_stats
+                    ))]
+            except Exception as e:
+                llm_logs.append({"type": "log", "msg": f"LLM Error: {e}"})
+                llm_points = [best_point_design]
+
+        for event in llm_logs:
+            yield event
+        new_point_llm = llm_points[0]
+        
+        # --- 扰动生成（围绕每个 LLM 候选点）---
+        with _phase(phases, "perturbation"):
+            adition_num = int(config.get('adition_point_number', 10))
+            addition_points = []
+        
+            if np.ndim(current_adition_std) > 0 and len(current_adition_std) > d_design:
+                pert_std_design = current_adition_std[:d_design]
+            else:
+                pert_std_design = current_adition_std
+
+            for llm_point in llm_points:
+                llm_point = np.asarray(llm_point, dtype=float)
+                addition_points.append(llm_point)
+                addition_points.extend(generate_perturbations(
+                    llm_point, pert_std_design, adition_num, space,
+                    method=perturbation_method, radius=perturbation_radius, rng=rng
+                ))
+        
+            if len(addition_points) == 0:
+                 addition_points.append(space.clip(new_point_llm))
+
+        # --- 批量评估 ---
+        with _phase(phases, "evaluation"):
+            best_grp, group_results, evaluated, schedule = yield Compute(evaluate_candidates, addition_points)
+        if racing:
+            used = sum(r["n_samples"] for r in group_results)
+            budget = len(addition_points) * int(config['N'])
+            rounds = " -> ".join(f"{k}x{n}" for n, k in schedule)
+            yield {"type": "log", "msg": f"Iter {iter_num}: Racing used {used}/{budget} samples ({used / budget:.1%}; {rounds})."}
+        elif adaptive:
+            yield samples_log(group_results, f"Iter {iter_num}")
+        if surrogate is not None:
+            yield surrogate_log(f"Iter {iter_num}")
+            
+        current_point_design = best_grp["design_point"]
+        
+        updated = False
+        candidate = best_grp
+        
+        # Rule 1: 如果候选点可行
+        if candidate["penalty"] == 0:
+            if best_penalty > 0: # 之前的最优解不可行 -> 更新
+                updated = True
+            elif candidate["cost"] < best_cost: # 之前的也可行，但现在的成本函数更低 -> 更新
+                updated = True
+        
+        # Rule 2: 如果候选点不可行，但比之前更接近可行 (且允许接受不可行点)
+        elif best_penalty > 0:
+            if candidate["penalty"] < best_penalty: # 都在不可行区，选惩罚小的
+                updated = True
+        
+        if updated:
+            best_point_design = candidate["design_point"]
+            best_cost = candidate["cost"]
+            best_penalty = candidate["penalty"]
+            best_reliabilities = candidate["reliabilities"]
+            stagnation_count = 0
+            yield {"type": "log", "msg": f"Iter {iter_num}: Improvement! Cost={best_cost:.4f}, Pen={best_penalty:.4f}"}
+        else:
+            stagnation_count += 1
+
+        # --- 局部精化（可选）：LLM 负责全局移动，模式搜索在最优点附近廉价收敛 ---
+        if local_budget > 0:
+            incumbent = {"design_point": best_point_design, "cost": best_cost, "penalty": best_penalty,
+                         "reliabilities": best_reliabilities}
+            local_results = []
+
+            def local_evaluate(points):
+                results = evaluate_group(points)
+                local_results.extend(results)
+                return results
+
+            with _phase(phases, "local_search"):
+                refined, local_info = yield Compute(pattern_search, local_evaluate, incumbent, space, local_step, local_budget)
+            evaluated.extend(local_results)
+            yield {"type": "log", "msg": f"Iter {iter_num}: Local search used {local_info['evaluations']}/{local_budget} evaluations "
+                                         f"({local_info['polls']} polls, {local_info['improvements']} improvements)."}
+            if refined is not incumbent:
+                # 精化后的点同时作为当前点，下一次迭代的提示词与扰动都以它为中心
+                best_point_design = current_point_design = refined["design_point"]
+                best_cost = refined["cost"]
+                best_penalty = refined["penalty"]
+                best_reliabilities = refined["reliabilities"]
+                stagnation_count = 0
+                yield {"type": "log", "msg": f"Iter {iter_num}: Local refinement! Cost={best_cost:.4f}, Pen={best_penalty:.4f}"}
+        timing = timing_event(iter_num, phases, llm_stats, evaluated, time.perf_counter() - iter_start)
+        
+        yield {
+            "type": "update",
+            "iteration": iter_num,
+            "cost": best_cost,
+            "penalty": best_penalty,
+            "point": best_point_design.tolist(),
+            "reliabilities": best_reliabilities.tolist() if hasattr(best_reliabilities, "tolist") else best_reliabilities,
+            **({"cache": dict(cache_stats, size=eval_cache.stats()["size"])} if use_cache else {})
+        }
+        if timing_events:
+            yield timing
+        completed = iter_num
+        if checkpoint_name and iter_num % checkpoint_every == 0:
+            error = yield from write_checkpoint(iter_num)
+            last_saved = iter_num
+            if error:
+                yield error
+        
+        if stagnation_count >= int(config['stagnation_limit']):
+            yield {"type": "log", "msg": "Stop: Stagnation limit reached."}
+            break
+            
+    if checkpoint_name and last_saved != completed:
+        # 优化结束（含取消）时保存最后一次完成迭代的状态
+        error = yield from write_checkpoint(completed)
+        if error:
+            yield error
+    yield {"type": "log", "msg": "=== Optimization Finished ==="}
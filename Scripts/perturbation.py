@@ -0,0 +1,88 @@
+"""LLM-RBDO 扰动候选点生成模块
+围绕 LLM 候选点一次性向量化生成 n 个扰动点（各维标准差可不同）：
+- 'reject': 正态扰动后丢弃越界点（原有行为，返回的点数可能少于 n）
+- 'truncnorm': 截断正态分布（逆 CDF 法），恰好 n 个且全部在界内
+- 'reflect': 正态扰动后在边界处镜像反射回界内，恰好 n 个
+- 'sobol': 以 radius 倍标准差为半径的椭球内的 scrambled Sobol 点（越界部分同样反射），恰好 n 个
+所有方法都从调用方传入的 np.random.Generator（本次运行的生成器，随检查点保存）取随机数，不使用全局随机状态。
+"""
+
+import warnings
+
+import numpy as np
+
+PERTURBATION_METHODS = ("reject", "truncnorm", "reflect", "sobol")
+
+
+def _truncated_normal(center, std, lower, upper, size, rng):
+    """逆 CDF 法生成截断在 [lower, upper] 内的正态样本；中心位于上尾时翻转计算以保持精度"""
+    from scipy.special import ndtr, ndtri
+
+    safe_std = np.where(std > 0, std, 1.0)
+    a = (lower - center) / safe_std
+    b = (upper - center) / safe_std
+    flip = a > 0
+    a, b = np.where(flip, -b, a), np.where(flip, -a, b)
+    lo_p, hi_p = ndtr(a), ndtr(b)
+    u = lo_p + rng.uniform(size=size) * (hi_p - lo_p)
+    z = np.clip(ndtri(u), a, b)
+    z = np.where(flip, -z, z)
+    return np.where(std > 0, center + std * z, np.clip(center, lower, upper))
+
+
+def _reflect(points, lower, upper):
+    """把点按边界镜像反射回 [lower, upper]（多次越界时按周期 2·宽度 折返）"""
+    width = upper - lower
+    safe_width = np.where(width > 0, width, 1.0)
+    y = np.mod(points - lower, 2.0 * safe_width)
+    y = safe_width - np.abs(y - safe_width)
+    return np.where(width > 0, lower + y, lower)
+
+
+def _sobol_ball(d, n, radius, rng):
+    """单位球内半径 radius 的 scrambled Sobol 点：前 d 维经正态逆 CDF 给出方向，最后一维给出半径"""
+    from scipy.special import ndtri
+    from scipy.stats import qmc
+
+    with warnings.catch_warnings():
+        # n 不是 2 的幂时 Sobol 平衡性略差，不影响使用
+        warnings.simplefilter("ignore", UserWarning)
+        u = qmc.Sobol(d + 1, scramble=True, rng=rng).random(n)
+    u = np.clip(u, 1e-12, 1.0 - 1e-12)
+    direction = ndtri(u[:, :d])
+    direction /= np.maximum(np.linalg.norm(direction, axis=1, keepdims=True), 1e-12)
+    r = radius * u[:, d:] ** (1.0 / d)
+    return r * direction
+
+
+def generate_perturbations(center, std, n, space, method="reject", radius=2.0, rng=None):
+    """
+    围绕 center 生成扰动候选点。
+    参数：
+    - center: 中心设计点，形状 (d,)
+    - std: 扰动标准差（标量或长度为 d 的数组）
+    - n: 扰动点数量
+    - space: DesignSpace（提供上下界）
+    - method: 'reject' | 'truncnorm' | 'reflect' | 'sobol'
+    - radius: method='sobol' 时椭球半径（标准差的倍数）
+    - rng: 随机种子或 np.random.Generator（None 时使用随机熵）
+    返回：
+    - 形状 (k, d) 的扰动点矩阵；除 'reject' 外 k 恰为 n 且全部位于界内
+    """
+    if method not in PERTURBATION_METHODS:
+        raise ValueError(f"不支持的扰动方法：{method}")
+    center = np.asarray(center, dtype=float)
+    d = center.shape[0]
+    n = int(n)
+    std = np.broadcast_to(np.asarray(std, dtype=float), (d,))
+    rng = np.random.default_rng(rng)
+    if n <= 0:
+        return np.empty((0, d))
+    if method == "reject":
+        perturbed = center + rng.normal(0, std, size=(n, d))
+        return perturbed[space.contains(perturbed)]
+    if method == "truncnorm":
+        return _truncated_normal(center, std, space.lower, space.upper, (n, d), rng)
+    if method == "reflect":
+        return _reflect(center + rng.normal(0, std, size=(n, d)), space.lower, space.upper)
+    return _reflect(center + std * _sobol_ball(d, n, float(radius), rng), space.lower, space.upper)
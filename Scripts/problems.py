@@ -1,3 +1,9 @@
+import importlib
+import os
+import threading
+from collections.abc import Mapping
+from importlib.metadata import entry_points
+
 import numpy as np
 
 # ==============================================================================
@@ -66,7 +72,106 @@ def car_crash_con_raw(X):
 #                 注册表 (Registry)
 # ==============================================================================
 
-PROBLEM_REGISTRY = {
+# 入口点组：已安装的包可在 pyproject.toml 中声明
+#   [project.entry-points."rbdo.problems"]
+#   my_problem = "my_package.problems:MY_PROBLEM"
+ENTRY_POINT_GROUP = "rbdo.problems"
+# 环境变量：逗号分隔的 "场景 id=module:attr" 列表，无需打包即可加载本地问题模块
+PROBLEMS_ENV_VAR = "RBDO_PROBLEMS"
+
+
+def _load_problem(problem_id, spec):
+    """把注册项解析为问题定义字典；spec 为 "module:attr" 引用时此时才导入对应模块"""
+    problem = spec
+    if isinstance(problem, str):
+        module_name, _, attr = problem.partition(":")
+        problem = importlib.import_module(module_name)
+        for part in filter(None, attr.split(".")):
+            problem = getattr(problem, part)
+    if callable(problem):
+        problem = problem()
+    if not isinstance(problem, Mapping) or "obj" not in problem or "con" not in problem:
+        raise ValueError(f"问题 {problem_id} 的定义必须是包含 'obj' 与 'con' 的字典")
+    problem = dict(problem)
+    problem.setdefault("expand", None)
+    return problem
+
+
+class ProblemRegistry(Mapping):
+    """场景 id -> 问题定义（{'obj', 'con', 'expand'}）的惰性注册表
+
+    注册项可以是问题定义字典、返回该字典的可调用对象，或 "module:attr" 形式的引用。
+    除内置问题外，还会发现入口点组 rbdo.problems 与环境变量 RBDO_PROBLEMS 中登记的问题；
+    列出、判断场景是否存在只读取场景 id，问题模块在首次取用该场景时才导入。
+
+    参数：
+    - problems: 初始注册项 {场景 id: 注册项}
+    - group: 入口点组名（None 表示不发现入口点）
+    - env_var: 环境变量名（None 表示不读取）
+    """
+
+    def __init__(self, problems=None, group=ENTRY_POINT_GROUP, env_var=PROBLEMS_ENV_VAR):
+        self._specs = dict(problems or {})
+        self._loaded = {}
+        self._group = group
+        self._env_var = env_var
+        self._discovered = False
+        self._lock = threading.Lock()
+
+    def register(self, problem_id, problem):
+        """登记（或替换）一个问题；problem 为问题定义字典、可调用对象或 "module:attr" 引用"""
+        with self._lock:
+            self._specs[problem_id] = problem
+            self._loaded.pop(problem_id, None)
+
+    def __setitem__(self, problem_id, problem):
+        self.register(problem_id, problem)
+
+    def _discover(self):
+        """首次访问时收集入口点与环境变量中的注册项（只读元数据，不导入问题模块）；已有的场景 id 优先"""
+        if self._discovered:
+            return
+        with self._lock:
+            if self._discovered:
+                return
+            found = []
+            if self._group:
+                found.extend((ep.name, ep.value) for ep in entry_points(group=self._group))
+            for item in os.getenv(self._env_var, "").split(",") if self._env_var else ():
+                item = item.strip()
+                if not item:
+                    continue
+                problem_id, sep, spec = item.partition("=")
+                if not sep or ":" not in spec:
+                    raise ValueError(f"{self._env_var} 条目格式应为 场景id=module:attr：{item}")
+                found.append((problem_id.strip(), spec.strip()))
+            for problem_id, spec in found:
+                self._specs.setdefault(problem_id, spec)
+            self._discovered = True
+
+    def __getitem__(self, problem_id):
+        self._discover()
+        problem = self._loaded.get(problem_id)
+        if problem is None:
+            problem = _load_problem(problem_id, self._specs[problem_id])
+            with self._lock:
+                problem = self._loaded.setdefault(problem_id, problem)
+        return problem
+
+    def __contains__(self, problem_id):
+        self._discover()
+        return problem_id in self._specs
+
+    def __iter__(self):
+        self._discover()
+        return iter(list(self._specs))
+
+    def __len__(self):
+        self._discover()
+        return len(self._specs)
+
+
+PROBLEM_REGISTRY = ProblemRegistry({
     'math_2d_real': {
         'obj': math_2d_obj,
         'con': math_2d_con,
@@ -77,4 +182,15 @@ PROBLEM_REGISTRY = {
         'con': car_crash_con_raw,
         'expand': expand_9d_to_11d_scalar
     }
-}
\ No newline at end of file
+})
+
+
+def list_problems():
+    """返回前端使用的问题列表：[{"id": 场景 id, "name": 显示名称}, ...]"""
+    problems = []
+    for key in PROBLEM_REGISTRY.keys():
+        display_name = key.replace('_', ' ').title()
+        if key == 'math_2d_real': display_name = "2D Math Case (Real)"
+        if key == 'car_crash_real': display_name = "Car Crash (11D Real)"
+        problems.append({"id": key, "name": display_name})
+    return problems
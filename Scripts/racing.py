@@ -0,0 +1,83 @@
+"""LLM-RBDO 候选点竞速（successive halving）模块
+扰动组中的大多数候选点在少量样本下就已明显劣于其他点，没有必要都用完整的 N 个样本评估：
+- 先以小样本数 n₀ 评估全部候选点，用可靠性置信区间得到每个点惩罚的乐观 / 悲观界
+- 按“可行优先”排序剔除被明确支配的点，再保留排名前 1/eta 的点
+- 幸存点以 eta 倍的样本数重新评估，直至只剩一个点或达到完整 N；胜出点总是以完整 N 评估
+"""
+
+import math
+
+import numpy as np
+
+from Scripts.rbdo_utils import compute_penalty
+
+
+def ranking_key(result):
+    """可行优先的排序键：可行点按目标函数值，不可行点按惩罚（与主循环的组内选择一致）"""
+    if result["penalty"] == 0:
+        return 0, result["cost"]
+    return 1, result["penalty"]
+
+
+def penalty_bounds(results, reliability_target, penalty_weight):
+    """
+    由可靠性置信区间得到惩罚的乐观 / 悲观界。
+    返回：
+    - (lower, upper)：可靠性取置信上界 / 下界时的惩罚，长度为候选点数的数组
+    """
+    ci_lower = np.array([r["ci_lower"] for r in results], dtype=float)
+    ci_upper = np.array([r["ci_upper"] for r in results], dtype=float)
+    return (compute_penalty(ci_upper, reliability_target, penalty_weight),
+            compute_penalty(ci_lower, reliability_target, penalty_weight))
+
+
+def dominated(results, reliability_target, penalty_weight):
+    """
+    判断候选点是否被明确支配：存在另一点的悲观惩罚低于其乐观惩罚（惩罚确定更小），
+    或存在确定可行（悲观惩罚为 0）且目标函数值更低的点。
+    返回：
+    - 长度为候选点数的布尔数组
+    """
+    lower, upper = penalty_bounds(results, reliability_target, penalty_weight)
+    cost = np.array([r["cost"] for r in results], dtype=float)
+    beats = (upper[:, None] < lower[None, :]) | ((upper[:, None] == 0) & (cost[:, None] < cost[None, :]))
+    return np.any(beats, axis=0)
+
+
+def race(evaluate, points, N, reliability_target, penalty_weight, initial_samples=None, eta=2.0, min_samples=100):
+    """
+    对一组候选点做 successive halving 竞速，返回以完整 N 评估的胜出点。
+    参数：
+    - evaluate: 批量评估函数 (设计点列表, 样本数) -> 结果字典列表（含 penalty、cost、ci_lower、ci_upper）
+    - points: 候选设计点列表
+    - N: 完整样本数（胜出点的评估精度）
+    - reliability_target / penalty_weight: 与惩罚计算相同的可靠性目标与罚权重
+    - initial_samples: 首轮样本数；None 时取 N / eta^⌈log_eta K⌉（不低于 min_samples）
+    - eta: 每轮保留比例的倒数与样本数增长倍数（> 1）
+    - min_samples: 自动确定首轮样本数时的下限
+    返回：
+    - (winner, evaluated, schedule)：胜出点结果字典、各轮全部结果字典列表、[(样本数, 候选点数), ...]
+    """
+    if eta <= 1:
+        raise ValueError("eta 必须大于 1")
+    N = int(N)
+    K = len(points)
+    if initial_samples is None:
+        rounds = math.ceil(math.log(K) / math.log(eta)) if K > 1 else 0
+        initial_samples = max(int(min_samples), int(N / eta ** rounds))
+    n = min(N, max(1, int(initial_samples)))
+    alive = list(range(K))
+    evaluated = []
+    schedule = []
+    while True:
+        results = evaluate([points[i] for i in alive], n)
+        evaluated.extend(results)
+        schedule.append((n, len(alive)))
+        if n >= N:
+            return min(results, key=ranking_key), evaluated, schedule
+        # 剔除被明确支配的点，再按可行优先排序保留前 1/eta
+        keep = math.ceil(len(alive) / eta)
+        out = dominated(results, reliability_target, penalty_weight)
+        order = sorted((j for j in range(len(alive)) if not out[j]), key=lambda j: ranking_key(results[j]))
+        alive = [alive[j] for j in order[:keep]]
+        n = min(N, int(math.ceil(n * eta))) if len(alive) > 1 else N
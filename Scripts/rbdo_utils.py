@@ -1,17 +1,40 @@
 import numpy as np
-from pydantic.type_adapter import P
+from statistics import NormalDist
+from Scripts.sampling import SamplingEngine
 
-def generate_samples(x0, stdx, N):
+# 单次约束函数调用允许的最大样本行数（批量评估时按设计点与样本区间分块，峰值内存与 N 无关）
+DEFAULT_MAX_BATCH_SAMPLES = 32_768
+
+def generate_samples(x0, stdx, N, engine=None, rng=None):
     """
     生成围绕设计点的正态随机样本。
     参数：
     - x0: 设计点数组（形如 [x1, x2, ...]）
     - stdx: 每个设计变量的标准差数组（与 x0 同维）
     - N: 样本数量
+    - engine: 可选的 SamplingEngine；提供时复用其公共随机数基矩阵
+    - rng: 随机种子或 np.random.Generator（None 时使用随机熵）
     返回：
     - 形状为 (N, len(x0)) 的样本矩阵
     """
-    return np.random.normal(x0, stdx, (N, len(x0)))
+    if engine is not None:
+        return engine.samples(np.asarray(x0, dtype=float)[None, :], stdx, N)
+    return np.random.default_rng(rng).normal(x0, stdx, (N, len(x0)))
+
+def generate_samples_batch(points, stdx, N, rng=None):
+    """
+    为多个设计点一次性生成正态随机样本。
+    参数：
+    - points: 设计点矩阵，形状 (K, d)
+    - stdx: 标准差（标量或长度为 d 的数组）
+    - N: 每个设计点的样本数量
+    - rng: 随机种子或 np.random.Generator（None 时使用随机熵）
+    返回：
+    - 形状为 (K, N, d) 的样本张量，第 k 个切片围绕 points[k]
+    """
+    points = np.asarray(points, dtype=float)
+    K, d = points.shape
+    return np.random.default_rng(rng).normal(points[:, None, :], stdx, (K, N, d))
 
 def compute_constraints(constraint_source, X):
     """
@@ -24,7 +47,237 @@ def compute_constraints(constraint_source, X):
     preds = [m.predict(X) for m in constraint_source]
     return np.column_stack(preds)
 
-def reliability_analysis(x, N, std, threshold, constraint_source, objective_fn, verbose=False):
+def _per_constraint(value, m, name):
+    """将标量或向量参数展开为长度为约束数量 m 的数组"""
+    arr = np.asarray(value, dtype=float)
+    if arr.ndim == 0:
+        return np.full(m, float(arr))
+    if arr.shape[0] != m:
+        raise ValueError(f"{name} 的长度必须等于约束数量")
+    return arr
+
+def _evaluate_objective(objective_fn, x):
+    """目标函数可接受向量 x 或解包后的 *x"""
+    try:
+        return objective_fn(x)
+    except TypeError:
+        return objective_fn(*x)
+
+def wilson_interval(successes, n, confidence=0.95):
+    """
+    二项比例的 Wilson 置信区间。
+    参数：
+    - successes: 成功次数（可为数组）
+    - n: 试验次数（可为数组，需可与 successes 广播）
+    - confidence: 置信水平
+    返回：
+    - (lower, upper)，与输入广播后同形状
+    """
+    z = NormalDist().inv_cdf(0.5 + confidence / 2.0)
+    n = np.asarray(n, dtype=float)
+    p = np.asarray(successes, dtype=float) / n
+    denom = 1.0 + z * z / n
+    center = (p + z * z / (2.0 * n)) / denom
+    half = z * np.sqrt(p * (1.0 - p) / n + z * z / (4.0 * n * n)) / denom
+    return np.clip(center - half, 0.0, 1.0), np.clip(center + half, 0.0, 1.0)
+
+def _count_satisfied(points, n, std, threshold, constraint_source, max_batch_samples, engine=None, offset=0, dtype=None, rng=None):
+    """
+    为每个设计点生成 n 个样本，统计各约束“响应 ≥ 阈值”的样本数。
+    样本按块流式生成与评估，只保留累计计数：n 不超过 max_batch_samples 时多个设计点的样本
+    堆叠为一次约束调用；否则单个设计点的 n 个样本再按 max_batch_samples 行切分。
+    峰值内存为 O(max_batch_samples)，与 n 无关。
+    返回：
+    - 形状为 (K, m) 的整数计数矩阵
+    """
+    K, d = points.shape
+    rows = max(1, int(max_batch_samples))
+    if n <= rows:
+        block = rows // int(n)
+        tasks = [(start, min(K, start + block), 0, n) for start in range(0, K, block)]
+    else:
+        tasks = [(k, k + 1, s, min(rows, n - s)) for k in range(K) for s in range(0, n, rows)]
+    counts = None
+    threshold_arr = None
+    for start, stop, s, n_chunk in tasks:
+        chunk = points[start:stop]
+        k = stop - start
+        if engine is not None:
+            samples = engine.samples(chunk, std, n_chunk, offset=offset + s, dtype=dtype)
+        else:
+            samples = generate_samples_batch(chunk, std, n_chunk, rng=rng).reshape(k * n_chunk, d)
+            if dtype is not None:
+                samples = samples.astype(dtype, copy=False)
+        ceq = compute_constraints(constraint_source, samples)
+        if ceq.ndim == 1:
+            ceq = ceq[:, None]
+        m = ceq.shape[1]
+        if counts is None:
+            counts = np.zeros((K, m), dtype=np.int64)
+            threshold_arr = _per_constraint(threshold, m, "threshold")
+        counts[start:stop] += np.count_nonzero((ceq >= threshold_arr).reshape(k, n_chunk, m), axis=1)
+    return counts
+
+def _sequential_counts(points, N, std, threshold, constraint_source, max_batch_samples, engine=None, dtype=None,
+                       adaptive=False, reliability_target=None, confidence=0.95, initial_samples=1000, growth=2.0, rng=None):
+    """
+    统计各设计点的约束满足样本数；自适应模式下逐批追加样本直至置信区间可判定。
+    返回：
+    - (counts, n_used)，形状分别为 (K, m) 与 (K,)
+    """
+    K = points.shape[0]
+    if not adaptive:
+        counts = _count_satisfied(points, N, std, threshold, constraint_source, max_batch_samples, engine=engine, dtype=dtype,
+                                  rng=rng)
+        return counts, np.full(K, N)
+    if reliability_target is None:
+        raise ValueError("自适应采样需要提供 reliability_target")
+    if growth <= 1:
+        raise ValueError("growth 必须大于 1")
+    counts = None
+    n_used = np.zeros(K, dtype=int)
+    active = np.arange(K)
+    n_next = min(N, max(1, int(initial_samples)))
+    while True:
+        n_done = int(n_used[active[0]])
+        new_counts = _count_satisfied(points[active], n_next - n_done, std, threshold, constraint_source,
+                                      max_batch_samples, engine=engine, offset=n_done, dtype=dtype, rng=rng)
+        if counts is None:
+            counts = np.zeros((K, new_counts.shape[1]), dtype=np.int64)
+            target_arr = _per_constraint(reliability_target, new_counts.shape[1], "reliability_target")
+        counts[active] += new_counts
+        n_used[active] = n_next
+        if n_next >= N:
+            break
+        lower, upper = wilson_interval(counts[active], n_next, confidence)
+        decided = np.all((lower >= target_arr) | (upper < target_arr), axis=1)
+        active = active[~decided]
+        if active.size == 0:
+            break
+        n_next = min(N, int(np.ceil(n_next * growth)))
+    return counts, n_used
+
+def reliability_analysis_batch(points, N, std, threshold, constraint_source, max_batch_samples=DEFAULT_MAX_BATCH_SAMPLES, engine=None,
+                               adaptive=False, reliability_target=None, confidence=0.95, initial_samples=1000, growth=2.0,
+                               sampler="mc", replicates=1, seed=None, method="mc", is_samples=2000, sorm=False, dtype=None,
+                               return_info=False):
+    """
+    多设计点批量可靠性分析：把 K 个设计点各自的 N 个样本堆叠为 (K*N, d)，
+    一次向量化调用约束函数；当 K*N 超过 max_batch_samples 时按设计点（及单点的样本区间）分块流式评估，
+    只保留各约束的累计满足计数，峰值内存为 O(max_batch_samples)，与 N 无关。
+    自适应模式下按 initial_samples、initial_samples*growth、... 逐批追加样本，
+    当某设计点每条约束可靠性的 Wilson 置信区间都完全位于 reliability_target 之上或之下时停止，
+    最多使用 N 个样本。
+    sampler 为 'sobol' / 'halton' / 'lhs' 时使用随机化低差异序列经正态逆 CDF 映射得到样本；
+    replicates > 1 时将 N 平分为若干独立随机化的重复，以重复间的离散程度给出误差估计。
+    method='is' 时改用以 MPP 为中心的重要性抽样（见 Scripts.reliability_methods），
+    适用于 0.999 以上的高可靠性目标，此时 N、sampler、adaptive 等蒙特卡洛选项不生效。
+    method='form' 时用 FORM（可选 SORM 修正）解析近似，仅需少量约束调用；
+    任一约束 MPP 搜索未收敛的设计点回退为蒙特卡洛（info['fallback'] 标记）。
+    参数：
+    - points: 设计点矩阵，形状 (K, d)
+    - N: 每个设计点的采样数量（自适应模式下为上限）
+    - std: 采样标准差（标量或长度为 d 的数组）
+    - threshold: 判定阈值（标量或长度为约束数量的数组）
+    - constraint_source: 约束函数或代理模型列表
+    - max_batch_samples: 单次约束调用的最大样本行数（流式分块大小）
+    - engine: 可选的 SamplingEngine；提供时所有设计点共享其标准正态基矩阵（公共随机数），
+      此时由 engine 自身的 sampler 决定样本来源，sampler / replicates / seed 不再生效
+    - adaptive: 是否启用自适应序贯采样
+    - reliability_target: 可靠性目标（自适应模式必需）
+    - confidence: 置信区间的置信水平
+    - initial_samples: 自适应模式首批样本数
+    - growth: 自适应模式每批累计样本数的增长倍数（> 1）
+    - sampler: 'mc' | 'sobol' | 'halton' | 'lhs'
+    - replicates: 低差异序列的独立随机化重复次数（不可与 adaptive 同时使用）
+    - seed: 随机种子或 np.random.Generator（蒙特卡洛样本、低差异序列随机化与重要性抽样共用；None 时使用随机熵）
+    - method: 'mc'（蒙特卡洛）| 'is'（重要性抽样）| 'form'（一次/二次可靠性方法）
+    - is_samples: 重要性抽样时每条约束的样本数
+    - sorm: method='form' 时是否施加 SORM 曲率修正
+    - dtype: 蒙特卡洛样本的数据类型（如 np.float32，可减半内存与带宽；None 为 float64）
+    - return_info: 是否同时返回采样信息
+    返回：
+    - 形状为 (K, m) 的可靠性矩阵；return_info=True 时返回 (reliabilities, info)，
+      info 含 n_samples (K,)、ci_lower / ci_upper / ci_width (K, m)，
+      使用重复估计时另含 std_error (K, m)
+    """
+    points = np.atleast_2d(np.asarray(points, dtype=float))
+    if method == "is":
+        from Scripts.reliability_methods import importance_sampling_batch
+        reliabilities, info = importance_sampling_batch(points, std, threshold, constraint_source, n_samples=is_samples,
+                                                        confidence=confidence, max_batch_samples=max_batch_samples,
+                                                        engine=engine, seed=seed)
+        return (reliabilities, info) if return_info else reliabilities
+    if method == "form":
+        from Scripts.reliability_methods import form_reliability_batch
+        reliabilities, info = form_reliability_batch(points, std, threshold, constraint_source, sorm=sorm,
+                                                     max_batch_samples=max_batch_samples)
+        fallback = ~np.all(info["converged"], axis=1)
+        if fallback.any():
+            rel_mc, info_mc = reliability_analysis_batch(
+                points[fallback], N, std, threshold, constraint_source, max_batch_samples=max_batch_samples, engine=engine,
+                adaptive=adaptive, reliability_target=reliability_target, confidence=confidence,
+                initial_samples=initial_samples, growth=growth, sampler=sampler, replicates=replicates, seed=seed,
+                dtype=dtype, return_info=True)
+            reliabilities[fallback] = rel_mc
+            info["n_samples"][fallback] += info_mc["n_samples"]
+            for key in ("ci_lower", "ci_upper", "ci_width"):
+                info[key][fallback] = info_mc[key]
+        info["fallback"] = fallback
+        return (reliabilities, info) if return_info else reliabilities
+    if method != "mc":
+        raise ValueError(f"unsupported method: {method}")
+    N = int(N)
+    options = dict(dtype=dtype, adaptive=adaptive, reliability_target=reliability_target, confidence=confidence,
+                   initial_samples=initial_samples, growth=growth)
+    std_error = None
+    rng = np.random.default_rng(seed)
+    if engine is None and sampler != "mc":
+        R = max(1, int(replicates))
+        if adaptive and R > 1:
+            raise ValueError("自适应采样不支持多次重复估计 (replicates > 1)")
+        n_rep = max(1, N // R)
+        rep_counts = []
+        for _ in range(R):
+            rep_engine = SamplingEngine(seed=rng, sampler=sampler)
+            counts_r, n_used = _sequential_counts(points, n_rep, std, threshold, constraint_source, max_batch_samples,
+                                                  engine=rep_engine, **options)
+            rep_counts.append(counts_r)
+        counts = np.sum(rep_counts, axis=0)
+        n_used = n_used * R
+        if R > 1:
+            rep_rel = np.stack(rep_counts) / n_rep
+            std_error = rep_rel.std(axis=0, ddof=1) / np.sqrt(R)
+    else:
+        counts, n_used = _sequential_counts(points, N, std, threshold, constraint_source, max_batch_samples,
+                                            engine=engine, rng=rng, **options)
+    reliabilities = counts / n_used[:, None]
+    if not return_info:
+        return reliabilities
+    lower, upper = wilson_interval(counts, n_used[:, None], confidence)
+    info = {"n_samples": n_used, "ci_lower": lower, "ci_upper": upper, "ci_width": upper - lower}
+    if std_error is not None:
+        info["std_error"] = std_error
+    return reliabilities, info
+
+def compute_penalty(reliabilities, reliability_target, penalty_weight):
+    """
+    按二次罚计算可靠性不足的惩罚。
+    参数：
+    - reliabilities: 可靠性数组，形状 (m,) 或 (K, m)
+    - reliability_target: 可靠性目标（标量或长度为约束数量的数组）
+    - penalty_weight: 罚权重（标量或长度为约束数量的数组）
+    返回：
+    - 惩罚值（输入为 (K, m) 时返回长度为 K 的数组）
+    """
+    reliabilities = np.asarray(reliabilities, dtype=float)
+    m = reliabilities.shape[-1]
+    target_arr = _per_constraint(reliability_target, m, "reliability_target")
+    weight_arr = _per_constraint(penalty_weight, m, "penalty_weight")
+    deficit = np.clip(target_arr - reliabilities, 0.0, None)
+    return np.sum(weight_arr * deficit ** 2, axis=-1)
+
+def reliability_analysis(x, N, std, threshold, constraint_source, objective_fn, verbose=False, return_info=False, **analysis_options):
     """
     基于代理模型进行可靠性分析：在设计点 x 附近生成样本，
     以“约束响应 ≥ 阈值”的比例估计每条约束的可靠性，并计算目标函数值。
@@ -36,28 +289,23 @@ def reliability_analysis(x, N, std, threshold, constraint_source, objective_fn,
     - threshold: 判定阈值（标量或长度为约束数量的数组）
     - models: 约束代理模型列表
     - objective_fn: 目标函数，可接受向量 x 或解包后的 *x
+    - return_info: 是否同时返回采样信息（实际样本数、置信区间宽度）
+    - analysis_options: 透传给 reliability_analysis_batch 的选项（engine、adaptive、sampler 等）
     返回：
-    - (reliabilities, objective)，其中 reliabilities 为长度为约束数量的数组
-    """
-    samples = generate_samples(x, std, N)
-    ceq = compute_constraints(constraint_source, samples)
-    m = ceq.shape[1]
-    threshold_arr = np.asarray(threshold)
-    if threshold_arr.ndim == 0:
-        threshold_arr = np.full(m, float(threshold_arr))
-    else:
-        if threshold_arr.shape[0] != m:
-            raise ValueError("threshold 的长度必须等于约束数量")
-    reliabilities = np.mean(ceq >= threshold_arr, axis=0)
-    try:
-        obj = objective_fn(x)
-    except TypeError:
-        obj = objective_fn(*x)
+    - (reliabilities, objective)，其中 reliabilities 为长度为约束数量的数组；
+      return_info=True 时返回 (reliabilities, objective, info)
+    """
+    reliabilities, info = reliability_analysis_batch(np.asarray(x, dtype=float)[None, :], N, std, threshold, constraint_source,
+                                                     return_info=True, **analysis_options)
+    reliabilities = reliabilities[0]
+    obj = _evaluate_objective(objective_fn, x)
     if verbose:
         print(f"point{x}: reliabilities: {reliabilities}, objective: {obj}")# 打印可靠性和目标函数值
+    if return_info:
+        return reliabilities, obj, {key: value[0] for key, value in info.items()}
     return reliabilities, obj
 
-def penalized_cost(x, N, threshold, reliability_target, constraint_source, objective_fn, std, penalty_weight, verbose=False, return_reliabilities=False):
+def penalized_cost(x, N, threshold, reliability_target, constraint_source, objective_fn, std, penalty_weight, verbose=False, return_reliabilities=False, return_info=False, **analysis_options):
     """
     计算带罚的成本：若任一约束可靠性低于目标值，则按二次罚累加；
     同时返回目标函数值，便于后续“可行优先，再优化目标”的选择策略。
@@ -71,25 +319,40 @@ def penalized_cost(x, N, threshold, reliability_target, constraint_source, objec
     - objective_fn: 目标函数
     - std: 采样标准差数组
     - penalty_weight: 罚权重（标量或长度为约束数量的数组）
+    - return_info: 是否追加返回采样信息 info（n_samples、ci_width 等）
+    - analysis_options: 透传给 reliability_analysis_batch 的选项（engine、adaptive 等）
     返回：
-    - (penalty, objective)
+    - (penalty, objective)；return_reliabilities / return_info 为真时依次追加 reliabilities、info
     """
-    reliabilities, objective = reliability_analysis(x, N, std, threshold, constraint_source, objective_fn, verbose=verbose)
-    m = len(reliabilities)
-    target_arr = np.asarray(reliability_target)
-    if target_arr.ndim == 0:
-        target_arr = np.full(m, float(target_arr))
-    else:
-        if target_arr.shape[0] != m:
-            raise ValueError("reliability_target 的长度必须等于约束数量")
-    weight_arr = np.asarray(penalty_weight)
-    if weight_arr.ndim == 0:
-        weight_arr = np.full(m, float(weight_arr))
-    else:
-        if weight_arr.shape[0] != m:
-            raise ValueError("penalty_weight 的长度必须等于约束数量")
-    deficit = np.clip(target_arr - reliabilities, 0.0, None)
-    penalty = float(np.sum(weight_arr * deficit ** 2))
+    reliabilities, objective, info = reliability_analysis(x, N, std, threshold, constraint_source, objective_fn, verbose=verbose,
+                                                          return_info=True, reliability_target=reliability_target, **analysis_options)
+    penalty = float(compute_penalty(reliabilities, reliability_target, penalty_weight))
+    result = (penalty, objective)
     if return_reliabilities:
-        return penalty, objective, reliabilities
-    return penalty, objective
+        result += (reliabilities,)
+    if return_info:
+        result += (info,)
+    return result
+
+def penalized_cost_batch(points, N, threshold, reliability_target, constraint_source, objective_fn, std, penalty_weight, verbose=False, return_info=False, **analysis_options):
+    """
+    penalized_cost 的批量版本：一次评估 K 个候选点，约束函数按分块向量化调用。
+    参数：
+    - points: 候选点矩阵，形状 (K, d)
+    - 其余参数同 penalized_cost
+    - analysis_options: 透传给 reliability_analysis_batch 的选项（max_batch_samples、engine、adaptive 等）
+    返回：
+    - (penalties, objectives, reliabilities)，形状分别为 (K,)、(K,)、(K, m)；
+      return_info=True 时追加 info
+    """
+    points = np.atleast_2d(np.asarray(points, dtype=float))
+    reliabilities, info = reliability_analysis_batch(points, N, std, threshold, constraint_source,
+                                                     reliability_target=reliability_target, return_info=True, **analysis_options)
+    objectives = np.array([_evaluate_objective(objective_fn, x) for x in points], dtype=float)
+    penalties = compute_penalty(reliabilities, reliability_target, penalty_weight)
+    if verbose:
+        for x, rel, obj in zip(points, reliabilities, objectives):
+            print(f"point{x}: reliabilities: {rel}, objective: {obj}")
+    if return_info:
+        return penalties, objectives, reliabilities, info
+    return penalties, objectives, reliabilities
@@ -0,0 +1,289 @@
+"""LLM-RBDO 基于最可能失效点 (MPP) 的可靠性方法
+包含功能：
+1. find_mpp_batch: 改进 HL-RF (iHL-RF) 迭代在标准正态空间中批量搜索各 (设计点, 约束) 的 MPP
+2. importance_sampling_batch: 以 MPP 为中心的重要性抽样，用于高可靠性目标 (3-4 sigma)
+3. form_reliability_batch: FORM 解析可靠性（可选 SORM Breitung 曲率修正）
+
+约定：设计变量 X = x + std * U，U 为标准正态向量；
+第 j 条约束的极限状态函数 g_j(U) = c_j(X) - threshold_j，g_j ≥ 0 为满足，g_j < 0 为失效。
+"""
+
+from statistics import NormalDist
+
+import numpy as np
+
+from Scripts.rbdo_utils import DEFAULT_MAX_BATCH_SAMPLES, _per_constraint, compute_constraints
+
+
+def _constraint_matrix(constraint_source, X):
+    """计算约束响应并保证返回二维矩阵 (n, m)"""
+    ceq = compute_constraints(constraint_source, X)
+    if ceq.ndim == 1:
+        ceq = ceq[:, None]
+    return ceq
+
+
+def _evaluate_pairs(X, pair_constraints, threshold_arr, constraint_source, max_batch_samples):
+    """
+    对若干 (设计点, 约束) 对的样本批量计算极限状态函数值。
+    参数：
+    - X: 样本张量，形状 (P, r, d)，第 p 个切片属于第 p 个约束对
+    - pair_constraints: 每个约束对对应的约束序号，形状 (P,)
+    - threshold_arr: 各约束阈值，形状 (m,)
+    返回：
+    - 极限状态函数值，形状 (P, r)
+    """
+    P, r, d = X.shape
+    block = max(1, int(max_batch_samples) // r)
+    g = np.empty((P, r))
+    for start in range(0, P, block):
+        stop = min(P, start + block)
+        ceq = _constraint_matrix(constraint_source, X[start:stop].reshape(-1, d)).reshape(stop - start, r, -1)
+        js = pair_constraints[start:stop]
+        g[start:stop] = ceq[np.arange(stop - start), :, js] - threshold_arr[js][:, None]
+    return g
+
+
+def find_mpp_batch(points, std, threshold, constraint_source, max_iter=50, tol=1e-4, step=1e-4,
+                   max_batch_samples=DEFAULT_MAX_BATCH_SAMPLES):
+    """
+    改进 HL-RF 迭代批量搜索最可能失效点：所有设计点与约束组成的 K×m 个约束对同时迭代，
+    每步用前向差分求梯度，一个迭代步内所有活跃约束对的 (d+1) 个扰动点合并为一次约束调用；
+    随后沿 HL-RF 方向对步长 1, 1/2, 1/4, 1/8 做一次批量线搜索（价值函数 ½‖u‖² + c|g|），
+    抑制非线性极限状态下标准 HL-RF 的振荡。
+    参数：
+    - points: 设计点矩阵，形状 (K, d)
+    - std: 标准差（标量或长度为 d 的数组）
+    - threshold: 判定阈值（标量或长度为约束数量的数组）
+    - constraint_source: 约束函数或代理模型列表
+    - max_iter: 最大迭代次数
+    - tol: 收敛容差（相邻两步 U 的相对变化）
+    - step: 标准正态空间中的差分步长
+    - max_batch_samples: 单次约束调用的最大样本行数
+    返回：
+    - 字典：u (K, m, d) MPP 坐标，beta (K, m) 可靠性指标（均值处满足约束时为正），
+      converged (K, m) 是否收敛，flat (K, m) 约束与随机变量无关（梯度为零），
+      g0 (K, m) 均值处极限状态值，n_evals (K,) 约束调用的样本行数
+    """
+    points = np.atleast_2d(np.asarray(points, dtype=float))
+    K, d = points.shape
+    std_arr = np.broadcast_to(np.asarray(std, dtype=float), (d,))
+    ceq0 = _constraint_matrix(constraint_source, points)
+    m = ceq0.shape[1]
+    threshold_arr = _per_constraint(threshold, m, "threshold")
+    g0 = (ceq0 - threshold_arr).reshape(-1)
+
+    pair_points = np.repeat(np.arange(K), m)
+    pair_constraints = np.tile(np.arange(m), K)
+    P = K * m
+    u = np.zeros((P, d))
+    converged = np.zeros(P, dtype=bool)
+    flat_pairs = np.zeros(P, dtype=bool)
+    done = np.zeros(P, dtype=bool)
+    n_evals = np.ones(K, dtype=np.int64)
+    offsets = np.vstack([np.zeros(d), step * np.eye(d)])
+    step_sizes = 0.5 ** np.arange(4)
+
+    for _ in range(max_iter):
+        idx = np.flatnonzero(~done)
+        if idx.size == 0:
+            break
+        U = u[idx][:, None, :] + offsets[None, :, :]
+        X = points[pair_points[idx]][:, None, :] + std_arr * U
+        G = _evaluate_pairs(X, pair_constraints[idx], threshold_arr, constraint_source, max_batch_samples)
+        np.add.at(n_evals, pair_points[idx], d + 1)
+        g = G[:, 0]
+        grad = (G[:, 1:] - G[:, :1]) / step
+        norm2 = np.sum(grad ** 2, axis=1)
+        flat = norm2 <= 0.0
+        # 约束与随机变量无关（梯度为零）时无法定义 MPP，直接结束
+        done[idx[flat]] = True
+        flat_pairs[idx[flat]] = True
+        ok = ~flat
+        idx, g, grad, norm2 = idx[ok], g[ok], grad[ok], norm2[ok]
+        u_old = u[idx]
+        direction = ((np.sum(grad * u_old, axis=1) - g) / norm2)[:, None] * grad - u_old
+        conv = np.linalg.norm(direction, axis=1) <= tol * (1.0 + np.linalg.norm(u_old + direction, axis=1))
+
+        # 批量线搜索：取价值函数不增的最大步长，均不满足时取最小步长
+        penalty_c = 2.0 * np.linalg.norm(u_old, axis=1) / np.sqrt(norm2) + 10.0
+        trials = u_old[:, None, :] + step_sizes[None, :, None] * direction[:, None, :]
+        X = points[pair_points[idx]][:, None, :] + std_arr * trials
+        G_trial = _evaluate_pairs(X, pair_constraints[idx], threshold_arr, constraint_source, max_batch_samples)
+        np.add.at(n_evals, pair_points[idx], step_sizes.size)
+        merit_old = 0.5 * np.sum(u_old ** 2, axis=1) + penalty_c * np.abs(g)
+        merit_trial = 0.5 * np.sum(trials ** 2, axis=2) + penalty_c[:, None] * np.abs(G_trial)
+        accept = merit_trial <= merit_old[:, None]
+        choice = np.where(accept.any(axis=1), np.argmax(accept, axis=1), step_sizes.size - 1)
+        u[idx] = trials[np.arange(idx.size), choice]
+        converged[idx[conv]] = True
+        done[idx[conv]] = True
+
+    beta = np.where(g0 >= 0, 1.0, -1.0) * np.linalg.norm(u, axis=1)
+    return {
+        "u": u.reshape(K, m, d),
+        "beta": beta.reshape(K, m),
+        "converged": converged.reshape(K, m),
+        "flat": flat_pairs.reshape(K, m),
+        "g0": g0.reshape(K, m),
+        "n_evals": n_evals,
+    }
+
+
+def importance_sampling_batch(points, std, threshold, constraint_source, n_samples=2000, confidence=0.95,
+                              max_batch_samples=DEFAULT_MAX_BATCH_SAMPLES, engine=None, seed=None, mpp=None):
+    """
+    以 MPP 为中心的重要性抽样：对每个 (设计点, 约束) 对，从 N(u*, I) 抽取 n_samples 个样本，
+    按似然比 φ(U)/φ(U-u*) 加权估计失效概率。MPP 未收敛的约束对退化为以均值为中心的普通蒙特卡洛；
+    均值已处于失效域（beta < 0）的约束对同样退化为普通蒙特卡洛：此时 u* 在失效域之外，
+    以其为中心的权重极小，会把接近 1 的失效概率估计为 0，而可靠性不高于约 0.5 时普通蒙特卡洛已足够精确。
+    参数：
+    - points: 设计点矩阵，形状 (K, d)
+    - std: 标准差（标量或长度为 d 的数组）
+    - threshold: 判定阈值（标量或长度为约束数量的数组）
+    - constraint_source: 约束函数或代理模型列表
+    - n_samples: 每个约束对的重要性抽样样本数
+    - confidence: 置信区间的置信水平（正态近似）
+    - max_batch_samples: 单次约束调用的最大样本行数
+    - engine: 可选的 SamplingEngine；提供时使用其标准正态基矩阵（公共随机数）
+    - seed: 未提供 engine 时的随机种子
+    - mpp: 可选的 find_mpp_batch 结果，避免重复搜索
+    返回：
+    - (reliabilities, info)：reliabilities 形状 (K, m)；
+      info 含 n_samples (K,)、ci_lower / ci_upper / ci_width / std_error (K, m)、beta / converged (K, m)
+    """
+    points = np.atleast_2d(np.asarray(points, dtype=float))
+    K, d = points.shape
+    std_arr = np.broadcast_to(np.asarray(std, dtype=float), (d,))
+    if mpp is None:
+        mpp = find_mpp_batch(points, std, threshold, constraint_source, max_batch_samples=max_batch_samples)
+    m = mpp["beta"].shape[1]
+    threshold_arr = _per_constraint(threshold, m, "threshold")
+    n = int(n_samples)
+    if engine is not None:
+        Z = engine.base(n, d)
+    else:
+        Z = np.random.default_rng(seed).standard_normal((n, d))
+
+    use_mpp = mpp["converged"] & (mpp["g0"] >= 0)
+    u_star = np.where(use_mpp[..., None], mpp["u"], 0.0).reshape(K * m, d)
+    pair_points = np.repeat(np.arange(K), m)
+    pair_constraints = np.tile(np.arange(m), K)
+    P = K * m
+    pf = np.empty(P)
+    se = np.empty(P)
+    block = max(1, int(max_batch_samples) // n)
+    for start in range(0, P, block):
+        stop = min(P, start + block)
+        centers = u_star[start:stop]
+        U = centers[:, None, :] + Z[None, :, :]
+        X = points[pair_points[start:stop]][:, None, :] + std_arr * U
+        g = _evaluate_pairs(X, pair_constraints[start:stop], threshold_arr, constraint_source, max_batch_samples)
+        log_w = -np.einsum("pnd,pd->pn", U, centers) + 0.5 * np.sum(centers ** 2, axis=1)[:, None]
+        estimate = (g < 0) * np.exp(log_w)
+        pf[start:stop] = estimate.mean(axis=1)
+        se[start:stop] = estimate.std(axis=1, ddof=1) / np.sqrt(n)
+
+    reliabilities = np.clip(1.0 - pf, 0.0, 1.0).reshape(K, m)
+    std_error = se.reshape(K, m)
+    z = NormalDist().inv_cdf(0.5 + confidence / 2.0)
+    lower = np.clip(reliabilities - z * std_error, 0.0, 1.0)
+    upper = np.clip(reliabilities + z * std_error, 0.0, 1.0)
+    info = {
+        "n_samples": mpp["n_evals"] + m * n,
+        "ci_lower": lower,
+        "ci_upper": upper,
+        "ci_width": upper - lower,
+        "std_error": std_error,
+        "beta": mpp["beta"],
+        "converged": mpp["converged"],
+    }
+    return reliabilities, info
+
+
+def _sorm_curvature_factors(points, std, threshold_arr, constraint_source, mpp, step=1e-3,
+                            max_batch_samples=DEFAULT_MAX_BATCH_SAMPLES):
+    """
+    在 MPP 处用有限差分求极限状态函数的梯度与 Hessian，计算 Breitung 公式中的主曲率乘积因子
+    Π (1 + |β| s κ_i)^(-1/2)，其中 κ_i 为切平面上的主曲率，s = sign(β)。
+    返回：
+    - (factors, valid, n_evals)：factors / valid 形状 (K, m)；valid 为假时表示曲率修正不适用
+    """
+    K, m, d = mpp["u"].shape
+    std_arr = np.broadcast_to(np.asarray(std, dtype=float), (d,))
+    iu, ju = np.triu_indices(d)
+    eye = np.eye(d)
+    # 偏移量：0, h*e_i (d 个), h*(e_i + e_j) (i ≤ j)
+    offsets = np.vstack([np.zeros(d), step * eye, step * (eye[iu] + eye[ju])])
+    u = mpp["u"].reshape(K * m, d)
+    pair_points = np.repeat(np.arange(K), m)
+    pair_constraints = np.tile(np.arange(m), K)
+    X = points[pair_points][:, None, :] + std_arr * (u[:, None, :] + offsets[None, :, :])
+    G = _evaluate_pairs(X, pair_constraints, threshold_arr, constraint_source, max_batch_samples)
+    g0, g_i, g_ij = G[:, 0], G[:, 1:d + 1], G[:, d + 1:]
+    grad = (g_i - g0[:, None]) / step
+    H = np.empty((K * m, d, d))
+    H[:, iu, ju] = (g_ij - g_i[:, iu] - g_i[:, ju] + g0[:, None]) / step ** 2
+    H[:, ju, iu] = H[:, iu, ju]
+
+    grad_norm = np.linalg.norm(grad, axis=1)
+    safe_norm = np.where(grad_norm > 0, grad_norm, 1.0)
+    a = grad / safe_norm[:, None]
+    proj = eye[None, :, :] - a[:, :, None] * a[:, None, :]
+    B = proj @ H @ proj / safe_norm[:, None, None]
+    kappa = np.linalg.eigvalsh(B)
+    beta = mpp["beta"].reshape(-1)
+    terms = 1.0 + np.abs(beta)[:, None] * np.sign(beta)[:, None] * kappa
+    valid = (grad_norm > 0) & np.all(terms > 0, axis=1)
+    factors = np.where(valid, np.prod(np.where(terms > 0, terms, 1.0), axis=1) ** -0.5, 1.0)
+    n_evals = np.full(K, m * offsets.shape[0], dtype=np.int64)
+    return factors.reshape(K, m), valid.reshape(K, m), n_evals
+
+
+def form_reliability_batch(points, std, threshold, constraint_source, sorm=False, max_iter=50, tol=1e-4,
+                           max_batch_samples=DEFAULT_MAX_BATCH_SAMPLES, mpp=None):
+    """
+    一次二阶矩法 (FORM)：由 HL-RF 求得的可靠性指标 β 给出 R = Φ(β)；
+    sorm=True 时对小概率一侧（β>0 为失效概率，β<0 为满足概率）施加 Breitung 曲率修正。
+    与随机变量无关的约束直接按均值处是否满足给出 0/1 可靠性。
+    参数：
+    - points: 设计点矩阵，形状 (K, d)
+    - std: 标准差（标量或长度为 d 的数组）
+    - threshold: 判定阈值（标量或长度为约束数量的数组）
+    - constraint_source: 约束函数或代理模型列表
+    - sorm: 是否施加 SORM 曲率修正
+    - max_iter / tol: HL-RF 迭代参数
+    - max_batch_samples: 单次约束调用的最大样本行数
+    - mpp: 可选的 find_mpp_batch 结果
+    返回：
+    - (reliabilities, info)：reliabilities 形状 (K, m)；
+      info 含 n_samples (K,)、beta / converged (K, m)，
+      ci_lower / ci_upper 等于估计值、ci_width 为 0（解析近似，无抽样误差）
+    """
+    points = np.atleast_2d(np.asarray(points, dtype=float))
+    if mpp is None:
+        mpp = find_mpp_batch(points, std, threshold, constraint_source, max_iter=max_iter, tol=tol,
+                             max_batch_samples=max_batch_samples)
+    beta = mpp["beta"]
+    K, m = beta.shape
+    n_evals = mpp["n_evals"].copy()
+    minority = np.vectorize(NormalDist().cdf)(-np.abs(beta))
+    if sorm:
+        threshold_arr = _per_constraint(threshold, m, "threshold")
+        factors, valid, sorm_evals = _sorm_curvature_factors(points, std, threshold_arr, constraint_source, mpp,
+                                                             max_batch_samples=max_batch_samples)
+        minority = np.where(valid & mpp["converged"], np.clip(minority * factors, 0.0, 0.5), minority)
+        n_evals += sorm_evals
+    reliabilities = np.where(beta >= 0, 1.0 - minority, minority)
+    flat = mpp["flat"]
+    reliabilities = np.where(flat, (mpp["g0"] >= 0).astype(float), reliabilities)
+    converged = mpp["converged"] | flat
+    info = {
+        "n_samples": n_evals,
+        "ci_lower": reliabilities.copy(),
+        "ci_upper": reliabilities.copy(),
+        "ci_width": np.zeros_like(reliabilities),
+        "beta": beta,
+        "converged": converged,
+    }
+    return reliabilities, info
@@ -0,0 +1,207 @@
+"""LLM-RBDO 采样引擎模块
+提供按运行（run）维护的公共随机数（Common Random Numbers, CRN）采样引擎：
+- 持有带种子的 numpy.random.Generator
+- 所有设计点共享同一标准正态基矩阵 Z，每个设计点的样本为 x + std * Z
+- Z 不整体缓存：任意行区间都可由引擎密钥单独重建，流式分块评估的峰值内存为 O(块大小)，与 N 无关
+  （mc 按 BLOCK_ROWS 行分块，第 b 块由以 (key, b) 为种子的独立随机流生成；
+  sobol / halton 由以 key 随机化的序列快进到所需行；LHS 不是可快进的序列，仍按 N 行整体生成并缓存）
+- 样本写入预分配缓冲区
+- 可选每 k 次迭代刷新一次 Z，避免整个优化过程依赖同一组随机数
+- Z 可由伪随机数（mc）或随机化低差异序列（sobol / halton / lhs）经正态逆 CDF 映射得到
+"""
+
+import warnings
+
+import numpy as np
+
+SAMPLERS = ("mc", "sobol", "halton", "lhs")
+BLOCK_ROWS = 1 << 14  # mc 基矩阵的分块行数
+
+
+def _make_qmc_engine(sampler, d, rng):
+    """构造随机化（scrambled）的低差异序列生成器"""
+    from scipy.stats import qmc  # scipy.stats 导入较慢，仅在使用低差异序列时导入
+
+    if sampler == "sobol":
+        return qmc.Sobol(d=d, scramble=True, rng=rng)
+    if sampler == "halton":
+        return qmc.Halton(d=d, scramble=True, rng=rng)
+    if sampler == "lhs":
+        return qmc.LatinHypercube(d=d, rng=rng)
+    raise ValueError(f"unsupported sampler: {sampler}")
+
+
+def qmc_standard_normal(qmc_engine, n):
+    """从低差异序列生成器取 n 个点，并经正态逆 CDF 映射为标准正态样本 (n, d)"""
+    from scipy.special import ndtri
+
+    with warnings.catch_warnings():
+        # Sobol 序列在 n 非 2 的幂时会提示平衡性下降，这里允许任意 n
+        warnings.simplefilter("ignore", UserWarning)
+        u = qmc_engine.random(n)
+    eps = np.finfo(float).eps
+    return ndtri(np.clip(u, eps, 1.0 - eps))
+
+
+class SamplingEngine:
+    """公共随机数采样引擎
+
+    参数：
+    - seed: 随机种子（None 表示使用系统熵）
+    - refresh_every: 每隔多少次迭代刷新基矩阵 Z（0 或 None 表示不刷新）
+    - sampler: 基矩阵来源，'mc' | 'sobol' | 'halton' | 'lhs'
+    """
+
+    def __init__(self, seed=None, refresh_every=0, sampler="mc"):
+        if sampler not in SAMPLERS:
+            raise ValueError(f"unsupported sampler: {sampler}")
+        self.rng = np.random.default_rng(seed)
+        self.refresh_every = int(refresh_every or 0)
+        self.sampler = sampler
+        self.iteration = 0
+        self.key = None
+        self._base = None
+        self._qmc = None
+        self._block = None
+        self._buffer = None
+
+    @classmethod
+    def from_base(cls, base, sampler="mc"):
+        """用已有基矩阵构造引擎（如并行评估中共享内存里的 Z），缓冲区独立"""
+        engine = cls(sampler=sampler)
+        engine._base = base
+        return engine
+
+    @property
+    def streamed(self):
+        """Z 是否按行区间由密钥重建（否则使用整体缓存的基矩阵：LHS、from_base 或旧检查点）"""
+        return self._base is None and self.sampler != "lhs"
+
+    def spawn(self):
+        """返回生成相同 Z 的独立引擎（缓冲区独立），供并行评估的各工作者使用；整体缓存的基矩阵共享引用"""
+        engine = SamplingEngine(sampler=self.sampler)
+        engine.key = self._get_key() if self.streamed else None
+        engine._base = self._base
+        return engine
+
+    def _get_key(self):
+        """当前基矩阵的密钥；首次使用或刷新后从随机数生成器抽取"""
+        if self.key is None:
+            self.key = int(self.rng.integers(2 ** 63))
+        return self.key
+
+    def _draw(self, n, d):
+        """生成 n 行新的标准正态样本（整体缓存模式）；低差异序列在同一基矩阵内连续取点"""
+        if self.sampler == "mc":
+            return self.rng.standard_normal((n, d))
+        if self._qmc is None:
+            self._qmc = _make_qmc_engine(self.sampler, d, self.rng)
+        return qmc_standard_normal(self._qmc, n)
+
+    def _mc_block(self, index, d):
+        """mc 基矩阵的第 index 块（BLOCK_ROWS 行）；缓存最近一块，重复取同一区间时不重新生成"""
+        cached = self._block
+        if cached is None or cached[0] != index or cached[1] != d:
+            z = np.random.default_rng([self._get_key(), index]).standard_normal((BLOCK_ROWS, d))
+            cached = self._block = (index, d, z)
+        return cached[2]
+
+    def rows(self, start, n, d):
+        """返回 Z 的第 start 行起的 n 行，形状 (n, d)"""
+        if not self.streamed:
+            return self.base(start + n, d)[start:]
+        if n <= 0:
+            return np.empty((0, d))
+        if self.sampler != "mc":
+            engine = _make_qmc_engine(self.sampler, d, np.random.default_rng(self._get_key()))
+            if start:
+                engine.fast_forward(start)
+            return qmc_standard_normal(engine, n)
+        first, last = start // BLOCK_ROWS, (start + n - 1) // BLOCK_ROWS
+        parts = []
+        for index in range(first, last + 1):
+            lo = max(start, index * BLOCK_ROWS) - index * BLOCK_ROWS
+            hi = min(start + n, (index + 1) * BLOCK_ROWS) - index * BLOCK_ROWS
+            parts.append(self._mc_block(index, d)[lo:hi])
+        return parts[0] if len(parts) == 1 else np.concatenate(parts, axis=0)
+
+    def base(self, N, d):
+        """返回形状为 (N, d) 的标准正态基矩阵；整体缓存模式下 d 变化时重新生成，行数不足时在末尾追加"""
+        if self.streamed:
+            return self.rows(0, N, d)
+        if self._base is None or self._base.shape[1] != d:
+            self._qmc = None
+            self._base = self._draw(N, d)
+        elif self._base.shape[0] < N:
+            extra = self._draw(N - self._base.shape[0], d)
+            self._base = np.concatenate([self._base, extra], axis=0)
+        return self._base[:N]
+
+    def refresh(self):
+        """丢弃当前基矩阵（抽取新密钥，低差异序列重新随机化），下次取样时重新生成"""
+        self.key = None
+        self._base = None
+        self._qmc = None
+        self._block = None
+
+    def step(self):
+        """迭代计数加一；达到 refresh_every 的整数倍时刷新基矩阵"""
+        self.iteration += 1
+        if self.refresh_every and self.iteration % self.refresh_every == 0:
+            self.refresh()
+
+    def get_state(self):
+        """导出引擎状态（随机数生成器状态、迭代计数、基矩阵密钥与整体缓存的基矩阵），用于检查点保存"""
+        return {
+            "rng": self.rng.bit_generator.state,
+            "sampler": self.sampler,
+            "refresh_every": self.refresh_every,
+            "iteration": self.iteration,
+            "key": self.key,
+            "base": None if self._base is None else np.array(self._base),
+        }
+
+    def set_state(self, state):
+        """
+        恢复 get_state 导出的状态。
+        低差异序列生成器本身不保存：整体缓存的基矩阵需要扩展或刷新时从恢复后的随机数生成器重新随机化。
+        """
+        self.rng.bit_generator.state = state["rng"]
+        self.sampler = state.get("sampler", self.sampler)
+        self.refresh_every = int(state.get("refresh_every", self.refresh_every) or 0)
+        self.iteration = int(state.get("iteration", 0))
+        self.key = state.get("key")
+        self._base = state.get("base")
+        self._qmc = None
+        self._block = None
+        self._buffer = None
+
+    def _get_buffer(self, rows, d, dtype=None):
+        """取得至少 rows×d 的预分配缓冲区（不足或类型不同时重新分配）"""
+        dtype = np.dtype(dtype or np.float64)
+        if (self._buffer is None or self._buffer.shape[0] < rows or self._buffer.shape[1] != d
+                or self._buffer.dtype != dtype):
+            self._buffer = np.empty((rows, d), dtype=dtype)
+        return self._buffer[:rows]
+
+    def samples(self, points, std, N, offset=0, dtype=None):
+        """
+        为多个设计点生成共享同一基矩阵 Z 的样本。
+        参数：
+        - points: 设计点矩阵，形状 (K, d)
+        - std: 标准差（标量或长度为 d 的数组）
+        - N: 每个设计点的样本数量
+        - offset: 使用 Z 的第 offset 行起的 N 行（用于序贯追加样本、流式分块）
+        - dtype: 输出样本的数据类型（默认 float64）
+        返回：
+        - 形状为 (K*N, d) 的样本矩阵（第 k 段 N 行对应 points[k]）。
+          该矩阵是引擎内部缓冲区的视图，下一次调用时会被覆盖。
+        """
+        points = np.atleast_2d(np.asarray(points, dtype=float))
+        K, d = points.shape
+        z = self.rows(offset, N, d)
+        out = self._get_buffer(K * N, d, dtype)
+        view = out.reshape(K, N, d)
+        np.multiply(z[None, :, :], std, out=view)
+        view += points[:, None, :]
+        return out
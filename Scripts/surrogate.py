@@ -0,0 +1,269 @@
+"""LLM-RBDO 主动学习代理模型模块
+昂贵约束（仿真器封装等）下 N=1e5 量级的蒙特卡洛不可承受。代理模式下：
+- 每条约束训练一个高斯过程（Kriging）模型，蒙特卡洛 / FORM / IS 均在代理模型上进行
+  （compute_constraints 接受带 predict 方法的模型列表）
+- 真实约束函数只在训练点上调用：先在初始候选点附近做拉丁超立方初始设计，
+  之后每次评估前在候选点的样本云中按 U 学习函数 U = |μ - 阈值| / σ 挑选代理最不确定、
+  最靠近极限状态的样本补充真实评估（AK-MCS 思路）
+- 补充样本后模型增量重训：沿用已有核超参数同步更新（只重新分解协方差矩阵），
+  每隔 reoptimize_every 次重训在后台线程中重新优化超参数，完成后用于后续重训
+"""
+
+import threading
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+
+class GPConstraintModel:
+    """单条约束的高斯过程代理模型（输入按固定的中心与尺度标准化）
+
+    参数：
+    - x_center / x_scale: 输入标准化所用的中心与尺度（长度为 d 的数组）
+    - kernel: 初始核；None 时使用 常数 × 各向异性 RBF + 白噪声
+    """
+
+    def __init__(self, x_center, x_scale, kernel=None):
+        self.x_center = np.asarray(x_center, dtype=float)
+        self.x_scale = np.asarray(x_scale, dtype=float)
+        d = self.x_center.shape[0]
+        if kernel is None:
+            # scikit-learn 导入较慢，仅在启用代理模型时导入
+            from sklearn.gaussian_process.kernels import RBF, ConstantKernel, WhiteKernel
+
+            kernel = (ConstantKernel(1.0, (1e-3, 1e3)) * RBF(np.ones(d), (1e-2, 1e3))
+                      + WhiteKernel(1e-6, (1e-10, 1e-2)))
+        self.kernel = kernel
+        self.gp = None
+
+    def fit(self, X, y, optimize=True):
+        """训练模型；optimize=False 时固定核超参数，只重新分解协方差矩阵"""
+        from sklearn.exceptions import ConvergenceWarning
+        from sklearn.gaussian_process import GaussianProcessRegressor
+
+        y = np.asarray(y, dtype=float)
+        # 输出标准化在本类中完成，便于 predict 的快速均值路径直接使用 alpha_
+        self.y_mean = float(y.mean())
+        self.y_scale = float(y.std()) or 1.0
+        gp = GaussianProcessRegressor(
+            kernel=self.kernel, optimizer="fmin_l_bfgs_b" if optimize else None, n_restarts_optimizer=0
+        )
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", ConvergenceWarning)
+            gp.fit((np.asarray(X, dtype=float) - self.x_center) / self.x_scale, (y - self.y_mean) / self.y_scale)
+        self.gp = gp
+        self.kernel = gp.kernel_
+        # 快速均值路径：μ(x) = c · exp(-½‖(x - xᵢ)/ℓ‖²) · α，白噪声项对新样本无贡献
+        product = gp.kernel_.k1
+        self._amplitude = float(product.k1.constant_value)
+        self._length_scale = np.asarray(product.k2.length_scale, dtype=float)
+        self._train = gp.X_train_ / self._length_scale
+        self._train_sq = np.sum(self._train ** 2, axis=1)
+        return self
+
+    def predict(self, X, return_std=False, block_rows=8192):
+        """
+        预测约束响应（均值）；return_std=True 时同时返回预测标准差。
+        只求均值时（蒙特卡洛热路径）按 block_rows 行分块直接计算核矩阵与 α 的乘积。
+        """
+        Xs = (np.asarray(X, dtype=float) - self.x_center) / self.x_scale
+        if return_std:
+            mean, sd = self.gp.predict(Xs, return_std=True)
+            return mean * self.y_scale + self.y_mean, sd * self.y_scale
+        mean = np.empty(Xs.shape[0])
+        for start in range(0, Xs.shape[0], block_rows):
+            Z = Xs[start:start + block_rows] / self._length_scale
+            sq = np.sum(Z ** 2, axis=1)[:, None] + self._train_sq[None, :] - 2.0 * (Z @ self._train.T)
+            K = self._amplitude * np.exp(-0.5 * np.maximum(sq, 0.0))
+            mean[start:start + block_rows] = K @ self.gp.alpha_
+        return mean * self.y_scale + self.y_mean
+
+
+class ActiveLearningSurrogate:
+    """按 U 学习函数主动补充训练点、增量重训的约束代理模型集合
+
+    参数：
+    - constraint_fn: 真实约束函数 X (n, d) -> (n, m)
+    - std: 随机变量标准差（标量或长度为 d 的数组），决定样本云与初始设计的范围
+    - threshold: 约束判定阈值（标量或长度为 m 的数组），响应 ≥ 阈值为满足
+    - initial_samples: 初始拉丁超立方设计的真实评估次数
+    - enrich_per_step: 每次评估前最多补充的真实评估次数
+    - candidates: 每个设计点用于计算 U 函数的候选样本数
+    - u_stop: 所有候选样本 U ≥ u_stop 时不再补充（默认 2，对应约 97.7% 的符号判定置信度）
+    - max_samples: 真实评估总次数上限
+    - reoptimize_every: 每隔多少次重训重新优化核超参数（其余重训沿用上次的超参数）
+    - background: 是否在后台线程中重新优化超参数（False 时同步进行，结果可复现）
+    - seed: 候选样本与初始设计的随机种子
+    """
+
+    def __init__(self, constraint_fn, std, threshold=0.0, initial_samples=None, enrich_per_step=50, candidates=500,
+                 u_stop=2.0, max_samples=1000, reoptimize_every=5, background=True, seed=None):
+        self.constraint_fn = constraint_fn
+        self.std = std
+        self.threshold = threshold
+        self.initial_samples = initial_samples
+        self.enrich_per_step = int(enrich_per_step)
+        self.candidates = int(candidates)
+        self.u_stop = float(u_stop)
+        self.max_samples = int(max_samples)
+        self.reoptimize_every = max(1, int(reoptimize_every))
+        self.background = bool(background)
+        self.rng = np.random.default_rng(seed)
+        self.X = None
+        self.Y = None
+        self.true_evaluations = 0
+        self.refits = 0
+        self.updates = 0
+        self._models = None
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rbdo-surrogate") if self.background else None
+        self._kernels = None
+        self._future = None
+
+    @property
+    def models(self):
+        """当前可用的模型列表（可直接作为 constraint_source）"""
+        return self._models
+
+    @property
+    def n_train(self):
+        return 0 if self.X is None else self.X.shape[0]
+
+    def _std_array(self, d):
+        std = np.broadcast_to(np.asarray(self.std, dtype=float), (d,))
+        return np.where(std > 0, std, 1.0)
+
+    def _evaluate(self, X):
+        """调用真实约束函数并追加到训练集"""
+        Y = np.asarray(self.constraint_fn(X), dtype=float)
+        if Y.ndim == 1:
+            Y = Y[:, None]
+        with self._lock:
+            self.X = X if self.X is None else np.vstack([self.X, X])
+            self.Y = Y if self.Y is None else np.vstack([self.Y, Y])
+            self.true_evaluations += X.shape[0]
+
+    def _fit(self, optimize):
+        """
+        用当前训练集重训所有约束模型。
+        optimize=False 时沿用当前核超参数（只重新分解协方差矩阵，代价低）；
+        optimize=True 时重新优化超参数，训练期间训练集若有增长，只保留优化得到的核供下次重训使用。
+        """
+        with self._lock:
+            X, Y = self.X.copy(), self.Y.copy()
+            self.refits += 1
+        previous = self._models
+        if previous is None:
+            center = X.mean(axis=0)
+            scale = self._std_array(X.shape[1]) * 3.0
+            previous = [GPConstraintModel(center, scale) for _ in range(Y.shape[1])]
+        kernels = self._kernels or [m.kernel for m in previous]
+        models = [GPConstraintModel(old.x_center, old.x_scale, kernel).fit(X, Y[:, j], optimize=optimize)
+                  for j, (old, kernel) in enumerate(zip(previous, kernels))]
+        with self._lock:
+            if optimize:
+                self._kernels = [m.kernel for m in models]
+            if self.X.shape[0] == X.shape[0]:
+                self._models = models
+
+    def _reoptimize(self):
+        self._fit(optimize=True)
+        with self._lock:
+            self._future = None
+
+    def _update(self):
+        """补充样本后的重训：先以现有超参数同步更新模型，按 reoptimize_every 安排超参数重新优化（可在后台）"""
+        self._fit(optimize=False)
+        self.updates += 1
+        if self.updates % self.reoptimize_every:
+            return
+        if self._pool is None:
+            self._fit(optimize=True)
+            return
+        with self._lock:
+            # 上一次超参数优化尚未完成时跳过本次
+            if self._future is not None:
+                return
+            self._future = self._pool.submit(self._reoptimize)
+
+    def initialize(self, points):
+        """
+        在设计点附近做拉丁超立方初始设计并同步训练首个模型。
+        参数：
+        - points: 设计点矩阵 (K, d)；初始设计覆盖所有设计点 ±3σ 的包围盒
+        """
+        from scipy.stats import qmc
+
+        points = np.atleast_2d(np.asarray(points, dtype=float))
+        d = points.shape[1]
+        n = int(self.initial_samples or 5 * (d + 1))
+        spread = 3.0 * np.broadcast_to(np.asarray(self.std, dtype=float), (d,))
+        lower = points.min(axis=0) - spread
+        upper = points.max(axis=0) + spread
+        upper = np.where(upper > lower, upper, lower + 1e-12)
+        X = qmc.scale(qmc.LatinHypercube(d=d, rng=self.rng).random(n), lower, upper)
+        self._evaluate(X)
+        self._fit(optimize=True)
+
+    def learning_function(self, X):
+        """U 学习函数：各约束 |μ - 阈值| / σ 的最小值（越小越可能被代理模型误判）"""
+        threshold = np.broadcast_to(np.asarray(self.threshold, dtype=float), (len(self._models),))
+        U = None
+        for model, t in zip(self._models, threshold):
+            mean, sd = model.predict(X, return_std=True)
+            u = np.abs(mean - t) / np.maximum(sd, 1e-12)
+            U = u if U is None else np.minimum(U, u)
+        return U
+
+    def enrich(self, points):
+        """
+        按 U 学习函数补充真实评估：每轮为每个设计点从其样本云中挑选 U 最小的样本
+        （与已有训练点的标准化距离不小于 0.5σ），评估后立即增量重训；
+        所有候选样本 U ≥ u_stop 或达到本步上限 enrich_per_step 时停止。
+        参数：
+        - points: 即将评估的设计点矩阵 (K, d)
+        返回：
+        - 本次补充的真实评估次数
+        """
+        points = np.atleast_2d(np.asarray(points, dtype=float))
+        if self._models is None:
+            self.initialize(points)
+        budget = min(self.enrich_per_step, self.max_samples - self.n_train)
+        K, d = points.shape
+        std = np.asarray(self.std, dtype=float)
+        scale = self._std_array(d)
+        cloud = points[:, None, :] + std * self.rng.standard_normal((K, self.candidates, d))
+        added = 0
+        while added < budget:
+            U = self.learning_function(cloud.reshape(-1, d)).reshape(K, self.candidates)
+            existing = self.X / scale
+            chosen = []
+            for k in range(K):
+                for idx in np.argsort(U[k]):
+                    if U[k, idx] >= self.u_stop:
+                        break
+                    x = cloud[k, idx] / scale
+                    # 避免补充点与训练点聚集
+                    if np.min(np.sum((existing - x) ** 2, axis=1)) >= 0.25:
+                        chosen.append(cloud[k, idx])
+                        existing = np.vstack([existing, x])
+                        break
+            if not chosen:
+                break
+            chosen = np.array(chosen[:budget - added])
+            self._evaluate(chosen)
+            self._update()
+            added += chosen.shape[0]
+        return added
+
+    def wait(self):
+        """等待进行中的后台超参数优化完成"""
+        future = self._future
+        if future is not None:
+            future.result()
+
+    def close(self):
+        """关闭后台重训线程"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
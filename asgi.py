@@ -0,0 +1,206 @@
+"""
+LLM-RBDO ASGI Server (asyncio-native entry point)
+与 app.py 提供相同的 /get_problems 与 /run_optimization NDJSON 协议（以及 /metrics），前端无需改动。
+每个优化流不再独占一个线程：LLM 调用在事件循环中 await（AsyncOpenAI），
+蒙特卡洛评估交给有界线程池（RBDO_ASGI_WORKERS，默认 CPU 核数），单进程可同时服务数百个优化流。
+后台任务接口（/jobs）仍由 app.py 提供。
+运行：uvicorn asgi:app --port 5000
+"""
+
+import asyncio
+import json
+import os
+import sys
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+# 确保能导入 Scripts 模块
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(current_dir)
+
+from Scripts.api_client import aclose_clients
+from Scripts.eval_cache import EvaluationCache
+from Scripts.metrics import render_metrics
+from Scripts.optimizer import (
+    agenerate_init_points,
+    async_optimization_events,
+    build_async_llm_client,
+    validate_run
+)
+from Scripts.problems import list_problems
+
+# 服务器级设计点评估缓存（LRU，按条目数淘汰），由 config['eval_cache'] 按运行开启
+EVAL_CACHE = EvaluationCache(max_entries=int(os.getenv("RBDO_EVAL_CACHE_SIZE", "4096")))
+
+# 蒙特卡洛评估线程池：numpy 大数组运算释放 GIL，线程数限制同时进行的评估数
+EXECUTOR = ThreadPoolExecutor(
+    max_workers=int(os.getenv("RBDO_ASGI_WORKERS", "0")) or os.cpu_count() or 1,
+    thread_name_prefix="rbdo-asgi"
+)
+
+# 与 flask-cors 的默认配置一致：允许任意来源
+CORS_HEADERS = [(b"access-control-allow-origin", b"*")]
+
+
+async def _read_body(receive):
+    """读取完整的请求体"""
+    body = b""
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            break
+        body += message.get("body", b"")
+        if not message.get("more_body", False):
+            break
+    return body
+
+
+async def _send_response(send, status, body, content_type=b"application/json", headers=()):
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", content_type)] + CORS_HEADERS + list(headers),
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _send_json(send, status, data):
+    await _send_response(send, status, json.dumps(data).encode("utf-8"))
+
+
+async def _stream(receive, send, events):
+    """
+    以 NDJSON 流式发送事件；客户端断开时取消事件生成（优化循环随之关闭）。
+    主循环中的异常作为一条 log 事件发给前端（与 app.py 相同）。
+    """
+    await send({
+        "type": "http.response.start",
+        "status": 200,
+        "headers": [(b"content-type", b"application/x-ndjson")] + CORS_HEADERS,
+    })
+
+    async def produce():
+        try:
+            async for event in events:
+                await send({"type": "http.response.body", "body": (json.dumps(event) + "\n").encode("utf-8"), "more_body": True})
+        except Exception as e:
+            # 捕获主循环中的错误并发送给前端
+            err_msg = f"Runtime Error: {str(e)}\n{traceback.format_exc()}"
+            print(err_msg)
+            await send({"type": "http.response.body", "body": (json.dumps({"type": "log", "msg": err_msg}) + "\n").encode("utf-8"), "more_body": True})
+        finally:
+            await events.aclose()
+        await send({"type": "http.response.body", "body": b""})
+
+    async def wait_disconnect():
+        while (await receive())["type"] != "http.disconnect":
+            pass
+
+    producer = asyncio.ensure_future(produce())
+    watcher = asyncio.ensure_future(wait_disconnect())
+    done, pending = await asyncio.wait({producer, watcher}, return_when=asyncio.FIRST_COMPLETED)
+    for task in pending:
+        task.cancel()
+    await asyncio.gather(*pending, return_exceptions=True)
+    if producer in done:
+        producer.result()
+
+
+# --- 获取所有可用问题 ---
+async def get_problems(scope, receive, send):
+    await _send_json(send, 200, list_problems())
+
+
+# --- 服务器级指标（Prometheus 文本格式），跨运行累计 ---
+async def get_metrics(scope, receive, send):
+    cache = EVAL_CACHE.stats()
+    text = render_metrics({
+        "rbdo_eval_cache_hits": ("Evaluation cache hits since start.", cache["hits"]),
+        "rbdo_eval_cache_misses": ("Evaluation cache misses since start.", cache["misses"]),
+        "rbdo_eval_cache_entries": ("Evaluation cache entries.", cache["size"]),
+    })
+    await _send_response(send, 200, text.encode("utf-8"), content_type=b"text/plain; version=0.0.4")
+
+
+async def run_optimization(scope, receive, send):
+    # 1. 解析请求数据
+    try:
+        data = json.loads(await _read_body(receive))
+        config = data.get('config', {})
+        ranges_raw = data.get('ranges', {})
+    except Exception as e:
+        return await _send_json(send, 400, {"error": f"Invalid JSON data: {str(e)}"})
+
+    # 2. 初始化异步 LLM Client
+    try:
+        client, hedge = build_async_llm_client(config)
+    except Exception as e:
+        return await _send_json(send, 400, {"error": f"Client Init Failed: {str(e)}"})
+
+    # 3. 校验场景、变量范围与检查点名称
+    error = validate_run(config, ranges_raw)
+    if error is not None:
+        return await _send_json(send, 400, {"error": error})
+    print(f">>> Scenario: {config.get('problem_scenario', 'math_2d_real')}")
+
+    # 4. 初始点生成
+    try:
+        init_points, sampling_log_msg = await agenerate_init_points(config, ranges_raw, client, hedge)
+    except Exception as e:
+        print(traceback.format_exc())
+        return await _send_json(send, 400, {"error": f"Init points generation failed: {str(e)}"})
+
+    # 5. 流式输出
+    events = async_optimization_events(
+        config, ranges_raw, init_points, client, hedge=hedge,
+        sampling_log_msg=sampling_log_msg, eval_cache=EVAL_CACHE, executor=EXECUTOR
+    )
+    await _stream(receive, send, events)
+
+
+ROUTES = {
+    ("GET", "/get_problems"): get_problems,
+    ("GET", "/metrics"): get_metrics,
+    ("POST", "/run_optimization"): run_optimization,
+}
+
+
+async def _lifespan(receive, send):
+    """启动 / 关闭事件：关闭时释放异步客户端连接池与评估线程池"""
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await aclose_clients()
+            EXECUTOR.shutdown(wait=False, cancel_futures=True)
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def app(scope, receive, send):
+    """ASGI 应用入口"""
+    if scope["type"] == "lifespan":
+        return await _lifespan(receive, send)
+    if scope["type"] != "http":
+        return
+    method, path = scope["method"], scope["path"]
+    if method == "OPTIONS":
+        # CORS 预检请求
+        request_headers = dict(scope.get("headers") or [])
+        return await _send_response(send, 204, b"", headers=[
+            (b"access-control-allow-methods", b"GET, POST, OPTIONS"),
+            (b"access-control-allow-headers", request_headers.get(b"access-control-request-headers", b"*")),
+        ])
+    handler = ROUTES.get((method, path))
+    if handler is None:
+        status = 405 if any(route_path == path for _, route_path in ROUTES) else 404
+        return await _send_json(send, status, {"error": f"{method} {path} not supported"})
+    await handler(scope, receive, send)
+
+
+if __name__ == '__main__':
+    import uvicorn  # ASGI 服务器（可选依赖：pip install uvicorn）
+
+    print("Starting LLM-RBDO ASGI Backend on http://localhost:5000")
+    uvicorn.run(app, port=5000)
@@ -0,0 +1,3 @@
+"""LLM-RBDO 端到端性能基准测试
+用法：在项目根目录执行 `python -m benchmarks --help`
+"""
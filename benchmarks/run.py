@@ -0,0 +1,311 @@
+"""LLM-RBDO 端到端性能基准测试
+1. penalized_cost: 单点 / 批量评估在不同样本数 N 下的每秒评估次数（蒙特卡洛热点路径）
+2. pipeline: 用离线模拟 LLM（MockClient）驱动与 app.py 相同的优化主循环（Scripts.optimizer），
+   统计各阶段耗时（初始采样、LLM 调用、扰动生成、评估）与收敛-墙钟时间曲线
+3. import_time: 在全新解释器中测量后端入口模块的冷启动导入耗时
+结果写为 JSON，可用 --compare 与历史结果比较，评估吞吐下降超过容差时以非零状态退出；
+--import-budget 指定导入耗时上限，超出时同样以非零状态退出。
+
+示例：
+    python -m benchmarks --quick --output bench.json
+    python -m benchmarks --compare bench.json --tolerance 0.2
+    python -m benchmarks --skip-eval --skip-pipeline --import-budget 1.0
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from Scripts.design_space import DesignSpace
+from Scripts.mock_llm import MockClient
+from Scripts.optimizer import generate_init_points, optimization_events
+from Scripts.problems import PROBLEM_REGISTRY
+from Scripts.rbdo_utils import penalized_cost, penalized_cost_batch
+
+# 与前端默认值一致的场景设置
+SCENARIOS = {
+    "math_2d_real": {
+        "ranges": {"x1_range": [0, 10], "x2_range": [0, 10]},
+        "config": {
+            "reliability_target": 0.98, "std": 0.3464, "adition_point_std": 0.3464,
+            "num_initial_points": 20,
+        },
+    },
+    "car_crash_real": {
+        "ranges": {
+            **{f"x{i}_range": [0.5, 1.5] for i in range(1, 8)},
+            **{f"x{i}_range": [0.192, 0.345] for i in range(8, 10)},
+        },
+        "config": {
+            "reliability_target": 0.9, "num_initial_points": 60,
+            "std": [0.03] * 7 + [0.006, 0.006, 10, 10],
+            "adition_point_std": [0.03] * 7 + [0.006, 0.006, 0, 0],
+        },
+    },
+}
+
+BASE_CONFIG = {
+    "provider": "mock", "model": "mock", "temperature": 0.2, "top_p": 0.9, "max_tokens": 512,
+    "template_path": str(ROOT / "Scripts" / "prompt_template_Chinese.md"),
+    "max_iterations": 20, "stagnation_limit": 1000, "retain_number": 5,
+    "initial_sampling_method": "lhs", "target_range_min": 0, "target_range_max": 100,
+    "N": 10000, "threshold": 0, "penalty_weight": 10000, "adition_point_number": 10,
+}
+
+FULL_N = (1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+QUICK_N = (1_000, 10_000, 100_000)
+MAX_BATCH_TOTAL_SAMPLES = 20_000_000  # 批量测试的总样本数上限（batch_size × N），超出时跳过以控制耗时
+IMPORT_MODULES = ("Scripts.optimizer", "app", "asgi")  # 冷启动导入耗时的测量对象
+
+
+def peak_rss_mb():
+    """进程峰值常驻内存（MB）；不支持 resource 模块的平台（Windows）返回 None"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 以 KB 计，macOS 以字节计
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True, timeout=10)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def _center_point(scenario):
+    """场景设计空间中心点（按问题定义扩展到完整维度）"""
+    ranges = SCENARIOS[scenario]["ranges"]
+    space = DesignSpace(ranges)
+    point = (space.lower + space.upper) / 2
+    expand = PROBLEM_REGISTRY[scenario]["expand"]
+    return expand(point) if expand else point
+
+
+def _time_call(fn, min_time, max_repeats):
+    """重复调用直到累计耗时超过 min_time 或达到 max_repeats，返回单次最短耗时（秒）与次数"""
+    best = float("inf")
+    elapsed = 0.0
+    repeats = 0
+    while repeats < max_repeats and (repeats == 0 or elapsed < min_time):
+        start = time.perf_counter()
+        fn()
+        dt = time.perf_counter() - start
+        best = min(best, dt)
+        elapsed += dt
+        repeats += 1
+    return best, repeats
+
+
+def bench_penalized_cost(scenario, n_values, batch_size=11, min_time=0.5, max_repeats=20, trace_memory=True):
+    """
+    测量 penalized_cost（单点）与 penalized_cost_batch（batch_size 个点）在各 N 下的吞吐。
+    batch_size × N 超过 MAX_BATCH_TOTAL_SAMPLES 时跳过批量测试（对应字段为 None）。
+    返回：
+    - 列表，每个元素包含 N、单次耗时、evals_per_sec、samples_per_sec 与可选的峰值追踪内存
+    """
+    settings = SCENARIOS[scenario]["config"]
+    problem = PROBLEM_REGISTRY[scenario]
+    kwargs = dict(
+        threshold=0, reliability_target=settings["reliability_target"],
+        constraint_source=problem["con"], objective_fn=problem["obj"],
+        std=np.asarray(settings["std"], dtype=float), penalty_weight=BASE_CONFIG["penalty_weight"],
+    )
+    x = _center_point(scenario)
+    rng = np.random.default_rng(0)
+    points = x + rng.normal(0.0, 0.01, size=(batch_size, x.size)) * np.abs(x)
+    rows = []
+    for N in n_values:
+        single = lambda: penalized_cost(x, N=N, **kwargs)
+        batch = lambda: penalized_cost_batch(points, N=N, **kwargs)
+        t_single, r_single = _time_call(single, min_time, max_repeats)
+        row = {
+            "scenario": scenario, "N": int(N),
+            "single_seconds": t_single, "single_repeats": r_single,
+            "evals_per_sec": 1.0 / t_single, "samples_per_sec": N / t_single,
+            "batch_size": batch_size, "batch_seconds": None, "batch_repeats": 0,
+            "batch_evals_per_sec": None, "batch_samples_per_sec": None,
+        }
+        if batch_size * N <= MAX_BATCH_TOTAL_SAMPLES:
+            t_batch, r_batch = _time_call(batch, min_time, max_repeats)
+            row.update(batch_seconds=t_batch, batch_repeats=r_batch,
+                       batch_evals_per_sec=batch_size / t_batch, batch_samples_per_sec=batch_size * N / t_batch)
+        if trace_memory:
+            # 单独追踪一次调用的峰值分配（numpy 数组分配计入 tracemalloc）
+            tracemalloc.start()
+            single()
+            row["single_peak_traced_mb"] = tracemalloc.get_traced_memory()[1] / 2 ** 20
+            tracemalloc.stop()
+        rows.append(row)
+        batch_msg = f"{row['batch_samples_per_sec']:.3e}" if row["batch_samples_per_sec"] else "skipped"
+        print(f"  [{scenario}] N={N:>9d}: {row['evals_per_sec']:10.2f} evals/s, "
+              f"{row['samples_per_sec']:.3e} samples/s (batch {batch_msg})", file=sys.stderr)
+    return rows
+
+
+def bench_import_time(modules, repeats=3):
+    """
+    在全新的解释器中测量各模块的冷启动导入耗时（不受当前进程已导入模块的影响）。
+    返回：
+    - 列表，每个元素包含 module 与 repeats 次测量中的最短耗时 seconds
+    """
+    rows = []
+    for module in modules:
+        code = f"import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+        times = []
+        for _ in range(repeats):
+            out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+            times.append(float(out.stdout.strip().splitlines()[-1]))
+        rows.append({"module": module, "seconds": min(times), "repeats": repeats})
+        print(f"  [import] {module}: {min(times) * 1000:.0f} ms", file=sys.stderr)
+    return rows
+
+
+def bench_pipeline(scenario, iterations, N, llm_latency=0.0, seed=0, overrides=None):
+    """
+    用 MockClient 驱动完整优化主循环，返回阶段耗时与收敛-墙钟曲线。
+    参数：
+    - scenario: 场景 id
+    - iterations: 迭代次数
+    - N: 蒙特卡洛样本数
+    - llm_latency: 模拟 LLM 每次调用的平均延迟（秒）
+    - seed: 随机种子（模拟 LLM、扰动与公共随机数）
+    - overrides: 额外的运行配置（如 {"executor": "thread"}）
+    """
+    config = dict(BASE_CONFIG, **SCENARIOS[scenario]["config"], problem_scenario=scenario,
+                  max_iterations=iterations, N=N, random_seed=seed)
+    config.update(overrides or {})
+    ranges = SCENARIOS[scenario]["ranges"]
+    client = MockClient(seed=seed, latency=llm_latency)
+
+    timings = {}
+    start = time.perf_counter()
+    init_points, sampling_log_msg = generate_init_points(config, ranges, client)
+    timings["init_sampling"] = time.perf_counter() - start
+
+    curve = []
+    for event in optimization_events(config, ranges, init_points, client,
+                                     sampling_log_msg=sampling_log_msg, timings=timings):
+        if event["type"] == "update":
+            curve.append({
+                "elapsed": time.perf_counter() - start, "iteration": event["iteration"],
+                "cost": event["cost"], "penalty": event["penalty"],
+            })
+    total = time.perf_counter() - start
+    timings["other"] = max(0.0, total - sum(timings.values()))
+    result = {
+        "scenario": scenario, "iterations": iterations, "N": int(N), "llm_latency": llm_latency,
+        "overrides": overrides or {}, "total_seconds": total, "phases": timings,
+        "final": curve[-1] if curve else None, "convergence": curve,
+    }
+    print(f"  [{scenario}] pipeline: {total:.2f}s total, phases "
+          + ", ".join(f"{k}={v:.2f}s" for k, v in timings.items()), file=sys.stderr)
+    return result
+
+
+def compare(current, baseline, tolerance):
+    """比较两份结果中 penalized_cost 的吞吐，返回低于 baseline × (1 - tolerance) 的回归列表"""
+    base = {(r["scenario"], r["N"]): r for r in baseline.get("penalized_cost", [])}
+    regressions = []
+    for row in current.get("penalized_cost", []):
+        ref = base.get((row["scenario"], row["N"]))
+        if ref is None:
+            continue
+        for metric in ("evals_per_sec", "batch_evals_per_sec"):
+            if not row.get(metric) or not ref.get(metric):
+                continue
+            if row[metric] < ref[metric] * (1.0 - tolerance):
+                regressions.append({
+                    "scenario": row["scenario"], "N": row["N"], "metric": metric,
+                    "baseline": ref[metric], "current": row[metric], "ratio": row[metric] / ref[metric],
+                })
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="LLM-RBDO 性能基准测试")
+    parser.add_argument("--scenarios", nargs="+", default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument("--n-values", nargs="+", type=float, default=None, help="penalized_cost 的样本数列表（默认 1e3..1e7）")
+    parser.add_argument("--quick", action="store_true", help="快速模式：N ≤ 1e5，流水线迭代 5 次")
+    parser.add_argument("--iterations", type=int, default=None, help="流水线迭代次数（默认 20，快速模式 5）")
+    parser.add_argument("--pipeline-n", type=int, default=10000, help="流水线中的蒙特卡洛样本数")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="模拟 LLM 平均延迟（秒）")
+    parser.add_argument("--config", type=json.loads, default=None, help="流水线额外配置（JSON 字符串）")
+    parser.add_argument("--skip-eval", action="store_true", help="跳过 penalized_cost 吞吐测试")
+    parser.add_argument("--skip-pipeline", action="store_true", help="跳过流水线测试")
+    parser.add_argument("--skip-import", action="store_true", help="跳过冷启动导入耗时测试")
+    parser.add_argument("--import-modules", nargs="+", default=list(IMPORT_MODULES), help="测量导入耗时的模块")
+    parser.add_argument("--import-budget", type=float, default=None, help="单个模块冷启动导入耗时上限（秒），超出时以非零状态退出")
+    parser.add_argument("--no-trace-memory", action="store_true", help="不使用 tracemalloc 统计单次调用峰值内存")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", "-o", default=None, help="结果 JSON 路径（默认输出到 stdout）")
+    parser.add_argument("--compare", default=None, help="与之比较的历史结果 JSON")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="允许的吞吐下降比例（默认 0.2）")
+    args = parser.parse_args(argv)
+
+    n_values = [int(n) for n in args.n_values] if args.n_values else list(QUICK_N if args.quick else FULL_N)
+    iterations = args.iterations or (5 if args.quick else 20)
+    result = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "processor": platform.processor(),
+            "argv": sys.argv[1:] if argv is None else list(argv),
+        },
+        "penalized_cost": [],
+        "pipeline": [],
+        "import_time": [],
+    }
+    if not args.skip_import:
+        result["import_time"] = bench_import_time(args.import_modules)
+    for scenario in args.scenarios:
+        if not args.skip_eval:
+            result["penalized_cost"].extend(bench_penalized_cost(scenario, n_values, trace_memory=not args.no_trace_memory))
+        if not args.skip_pipeline:
+            result["pipeline"].append(bench_pipeline(scenario, iterations, args.pipeline_n, args.llm_latency,
+                                                     args.seed, args.config))
+    result["peak_rss_mb"] = peak_rss_mb()
+
+    exit_code = 0
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(result, baseline, args.tolerance)
+        result["regressions"] = regressions
+        for r in regressions:
+            print(f"  REGRESSION [{r['scenario']}] N={r['N']} {r['metric']}: "
+                  f"{r['current']:.2f} vs {r['baseline']:.2f} ({r['ratio']:.0%})", file=sys.stderr)
+        exit_code = 1 if regressions else 0
+    if args.import_budget is not None:
+        over_budget = [r for r in result["import_time"] if r["seconds"] > args.import_budget]
+        result["import_over_budget"] = over_budget
+        for r in over_budget:
+            print(f"  IMPORT BUDGET EXCEEDED {r['module']}: {r['seconds']:.3f}s > {args.import_budget:.3f}s", file=sys.stderr)
+        if over_budget:
+            exit_code = 1
+
+    text = json.dumps(result, indent=2, ensure_ascii=False)
+    if args.output:
+        Path(args.output).write_text(text, encoding="utf-8")
+    else:
+        print(text)
+    return exit_code
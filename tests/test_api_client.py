@@ -0,0 +1,81 @@
+"""LLM 客户端注册表的 LRU 淘汰与调用时间预算"""
+
+import gc
+import threading
+import time
+import unittest
+
+from Scripts.api_client import PooledClient, _ClientRegistry
+from Scripts.mock_llm import MockClient
+
+
+class _Client:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class _Owner:
+    pass
+
+
+class ClientRegistryTest(unittest.TestCase):
+    def acquire(self, registry, key):
+        owner = _Owner()
+        entry, closing = registry.acquire(key, _Client)
+        registry.track(owner, entry)
+        for client in closing:
+            client.close()
+        return owner, entry[0]
+
+    def test_reuses_client_per_key(self):
+        registry = _ClientRegistry(2)
+        _, a = self.acquire(registry, "a")
+        _, b = self.acquire(registry, "a")
+        self.assertIs(a, b)
+        self.assertEqual(len(registry), 1)
+
+    def test_evicted_client_closed_after_last_user(self):
+        registry = _ClientRegistry(2)
+        owner, a = self.acquire(registry, "a")
+        self.acquire(registry, "b")
+        self.acquire(registry, "c")
+        self.assertEqual(len(registry), 2)
+        # "a" 已被淘汰但仍被持有，不能关闭
+        self.assertFalse(a.closed)
+        del owner
+        gc.collect()
+        self.acquire(registry, "d")
+        self.assertTrue(a.closed)
+
+    def test_clear_returns_evicted_clients(self):
+        registry = _ClientRegistry(1)
+        owner, a = self.acquire(registry, "a")
+        _, b = self.acquire(registry, "b")
+        self.assertEqual({id(c) for c in registry.clear()}, {id(a), id(b)})
+        self.assertEqual(len(registry), 0)
+
+
+class TimeoutBudgetTest(unittest.TestCase):
+    def test_explicit_timeout_ends_slow_call(self):
+        client = PooledClient(MockClient(latency=2.0, jitter=0.0), "mock", threading.BoundedSemaphore(1))
+        start = time.monotonic()
+        with self.assertRaises(TimeoutError):
+            client.chat.completions.create(model="m", messages=[{"role": "user", "content": "x"}], timeout=0.1)
+        self.assertLess(time.monotonic() - start, 1.0)
+
+    def test_budget_covers_waiting_for_slot(self):
+        semaphore = threading.BoundedSemaphore(1)
+        client = PooledClient(MockClient(), "mock", semaphore)
+        semaphore.acquire()
+        try:
+            with self.assertRaises(TimeoutError):
+                client.chat.completions.create(model="m", messages=[], timeout=0.05)
+        finally:
+            semaphore.release()
+
+
+if __name__ == "__main__":
+    unittest.main()
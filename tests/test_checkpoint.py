@@ -0,0 +1,95 @@
+"""检查点恢复、按运行隔离的随机数生成器与异步驱动中的检查点读写"""
+
+import asyncio
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from Scripts import checkpoint, optimizer
+from Scripts.mock_llm import AsyncMockClient, MockClient
+from Scripts.optimizer import async_optimization_events, generate_init_points, optimization_events
+
+RANGES = {"x1_range": [0, 10], "x2_range": [0, 10]}
+CONFIG = dict(
+    provider="mock", model="m", problem_scenario="math_2d_real", N=500, threshold=0, reliability_target=0.9,
+    std=0.3, penalty_weight=100, max_iterations=4, stagnation_limit=10, target_range_min=0, target_range_max=100,
+    temperature=0.7, top_p=0.9, max_tokens=100, adition_point_number=5, adition_point_std=0.2,
+    num_initial_points=6, initial_sampling_method="lhs", random_seed=7,
+    template_path=os.path.join(os.path.dirname(checkpoint.__file__), "prompt_template_Chinese_Short.md"),
+)
+
+
+def events(**overrides):
+    config = dict(CONFIG, **overrides)
+    client = MockClient()
+    init_points, msg = generate_init_points(config, RANGES, client)
+    return optimization_events(config, RANGES, init_points, client, sampling_log_msg=msg)
+
+
+def run(**overrides):
+    return [e for e in events(**overrides) if e["type"] == "update"]
+
+
+class RunRandomnessTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        patcher = mock.patch.object(checkpoint, "CHECKPOINT_DIR", tmp.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_same_seed_same_run_and_global_state_untouched(self):
+        state = np.random.get_state()
+        first = run()
+        self.assertEqual(first, run())
+        after = np.random.get_state()
+        self.assertTrue(np.array_equal(state[1], after[1]) and state[2] == after[2])
+
+    def test_interleaved_runs_do_not_interfere(self):
+        solo = run()
+        other = events(random_seed=11)
+        interleaved = []
+        for event in events():
+            next(other, None)
+            if event["type"] == "update":
+                interleaved.append(event)
+        self.assertEqual(interleaved, solo)
+
+    def test_resume_continues_the_same_run(self):
+        full = run()
+        run(max_iterations=2, checkpoint_name="half")
+        resumed = run(resume_from="half")
+        self.assertEqual(resumed[-1], full[-1])
+
+
+    def test_async_driver_does_checkpoint_io_off_the_event_loop(self):
+        threads = []
+
+        def recording(fn):
+            def wrapper(*args):
+                threads.append(threading.current_thread())
+                return fn(*args)
+            return wrapper
+
+        async def collect(**overrides):
+            config = dict(CONFIG, **overrides)
+            init_points, _ = generate_init_points(config, RANGES, MockClient())
+            return [e async for e in async_optimization_events(config, RANGES, init_points, AsyncMockClient())
+                    if e["type"] == "update"]
+
+        with mock.patch.object(optimizer, "save_checkpoint", recording(checkpoint.save_checkpoint)), \
+                mock.patch.object(optimizer, "load_checkpoint", recording(checkpoint.load_checkpoint)):
+            full = asyncio.run(collect(checkpoint_name="async"))
+            resumed = asyncio.run(collect(resume_from="async", max_iterations=6))
+        self.assertEqual((full[-1]["iteration"], resumed[-1]["iteration"]), (4, 6))
+        # 初始点 + 4 次迭代各写入一次，恢复时加载一次
+        self.assertEqual(len(threads), 6)
+        self.assertNotIn(threading.main_thread(), threads)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+"""设计空间：变量排序、整数编码映射与越界处理"""
+
+import unittest
+
+import numpy as np
+
+from Scripts.design_space import DesignSpace, as_design_space, sorted_range_keys
+from Scripts.mapping_utils import float_to_int
+
+# 故意打乱顺序，且 x10 需排在 x2 之后
+RANGES = {"x10_range": [-1, 1], "x2_range": [0, 10], "x1_range": [5, 6]}
+
+
+class DesignSpaceTest(unittest.TestCase):
+    def setUp(self):
+        self.space = DesignSpace(RANGES)
+
+    def test_keys_sorted_by_index(self):
+        self.assertEqual(sorted_range_keys(RANGES), ["x1_range", "x2_range", "x10_range"])
+        self.assertEqual(self.space.names, ["x1", "x2", "x10"])
+        self.assertEqual(self.space.bounds, [[5.0, 6.0], [0.0, 10.0], [-1.0, 1.0]])
+        self.assertEqual(self.space.d, 3)
+
+    def test_to_int_matches_scalar_mapping(self):
+        rng = np.random.default_rng(0)
+        points = rng.uniform(self.space.lower, self.space.upper, size=(200, 3))
+        # 包含恰好落在 .5 上的值，检查取偶舍入与内置 round 一致
+        points[0] = [5.125, 2.5, 0.01]
+        expected = [[float_to_int(v, RANGES[k], [0, 100]) for v, k in zip(p, self.space.keys)] for p in points]
+        np.testing.assert_array_equal(self.space.to_int(points), expected)
+        np.testing.assert_array_equal(self.space.to_int(points[0]), expected[0])
+
+    def test_to_float_round_trip(self):
+        codes = np.array([[0, 50, 100], [13, 77, 1]])
+        np.testing.assert_allclose(self.space.to_int(self.space.to_float(codes)), codes)
+        np.testing.assert_allclose(self.space.to_float({"x2": 50, "x10": 100, "x1": 0, "extra": 7}), [5.0, 5.0, 1.0])
+
+    def test_missing_variable(self):
+        with self.assertRaises(ValueError):
+            self.space.to_float({"x1": 1, "x2": 2})
+
+    def test_clip_and_contains(self):
+        points = np.array([[5.5, 5.0, 0.0], [7.0, -1.0, 0.0], [6.0, 10.0, -1.0]])
+        np.testing.assert_array_equal(self.space.contains(points), [True, False, True])
+        self.assertTrue(self.space.contains(self.space.clip(points)).all())
+        np.testing.assert_array_equal(self.space.clip(points[1]), [6.0, 0.0, 0.0])
+
+    def test_as_design_space_reuses_matching_space(self):
+        self.assertIs(as_design_space(self.space), self.space)
+        other = as_design_space(self.space, (0, 10))
+        self.assertEqual(other.target_range, (0, 10))
+        self.assertEqual(other.bounds, self.space.bounds)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,45 @@
+"""设计点评估缓存：LRU 淘汰与缓存键的稳定性"""
+
+import unittest
+
+import numpy as np
+
+from Scripts.eval_cache import EvaluationCache, settings_digest
+
+
+class EvaluationCacheTest(unittest.TestCase):
+    def test_lru_eviction(self):
+        cache = EvaluationCache(max_entries=2)
+        a, b, c = (cache.make_key([x, 0.0], "s") for x in (1.0, 2.0, 3.0))
+        cache.put(a, "a")
+        cache.put(b, "b")
+        self.assertEqual(cache.get(a), "a")  # a 变为最近使用，下一次淘汰 b
+        cache.put(c, "c")
+        self.assertIsNone(cache.get(b))
+        self.assertEqual((cache.get(a), cache.get(c)), ("a", "c"))
+        self.assertEqual(cache.stats(), {"hits": 3, "misses": 1, "size": 2})
+
+    def test_key_quantizes_point(self):
+        cache = EvaluationCache(decimals=6)
+        self.assertEqual(cache.make_key([0.1 + 0.2, -0.0], "s"), cache.make_key(np.array([0.3, 0.0]), "s"))
+        self.assertNotEqual(cache.make_key([0.3, 0.0], "s"), cache.make_key([0.3, 1e-3], "s"))
+        self.assertNotEqual(cache.make_key([0.3, 0.0], "s"), cache.make_key([0.3, 0.0], "t"))
+
+    def test_settings_digest_is_stable(self):
+        first = settings_digest({"N": 1000, "std": np.array([0.1, 0.2]), "threshold": np.float64(0.0)})
+        second = settings_digest({"threshold": 0.0, "std": [0.1, 0.2], "N": 1000})
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, settings_digest({"N": 2000, "std": [0.1, 0.2], "threshold": 0.0}))
+
+    def test_clear_resets_entries_and_counts(self):
+        cache = EvaluationCache()
+        key = cache.make_key([1.0], "s")
+        cache.put(key, 1)
+        cache.get(key)
+        cache.clear()
+        self.assertIsNone(cache.get(key))
+        self.assertEqual(cache.stats(), {"hits": 0, "misses": 1, "size": 0})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+"""后台任务：环形缓冲区续订、准入控制与取消"""
+
+import contextlib
+import io
+import threading
+import unittest
+
+from Scripts.jobs import Job, JobManager, JobQueueFull
+
+
+def _blocking(release, started=None):
+    """在 release 置位或取消前持续运行的任务"""
+    def make_events(cancel):
+        yield {"type": "log", "msg": "start"}
+        if started is not None:
+            started.set()
+        while not release.is_set() and not cancel.is_set():
+            release.wait(0.01)
+        yield {"type": "log", "msg": "end"}
+    return make_events
+
+
+class JobEventsTest(unittest.TestCase):
+    def finished_job(self, n, buffer_size=100):
+        job = Job("j", buffer_size=buffer_size)
+        for i in range(n):
+            job.append({"type": "log", "msg": str(i)})
+        job.set_status("finished")
+        return job
+
+    def test_resume_from_seq(self):
+        job = self.finished_job(5)
+        self.assertEqual([e["seq"] for e in job.events(3)], [3, 4])
+        self.assertEqual([e["msg"] for e in job.events(0)], ["0", "1", "2", "3", "4"])
+        self.assertEqual(list(job.events(5)), [])
+
+    def test_gap_when_buffer_overwritten(self):
+        job = self.finished_job(10, buffer_size=4)
+        events = list(job.events(2))
+        self.assertEqual(events[0], {"type": "gap", "from": 2, "to": 6})
+        self.assertEqual([e["seq"] for e in events[1:]], [6, 7, 8, 9])
+
+    def test_heartbeat_while_idle(self):
+        job = Job("j")
+        stream = job.events(0, heartbeat=0.01)
+        self.assertEqual(next(stream), {"type": "heartbeat", "status": "queued"})
+        job.append({"type": "log", "msg": "x"})
+        self.assertEqual(next(stream)["seq"], 0)
+
+
+class JobManagerTest(unittest.TestCase):
+    def setUp(self):
+        self.release = threading.Event()
+        self.manager = JobManager(max_workers=1, max_queue=1)
+        self.addCleanup(self.manager.shutdown)
+        self.addCleanup(self.release.set)
+
+    def test_admission_control_rejects_when_full(self):
+        running = self.manager.submit(_blocking(self.release))
+        queued = self.manager.submit(_blocking(self.release))
+        with self.assertRaises(JobQueueFull):
+            self.manager.submit(_blocking(self.release))
+        self.release.set()
+        running.future.result(timeout=5)
+        queued.future.result(timeout=5)
+        self.assertEqual(self.manager.active_count(), 0)
+        self.manager.submit(_blocking(self.release)).future.result(timeout=5)
+
+    def test_cancel_running_and_queued(self):
+        started = threading.Event()
+        running = self.manager.submit(_blocking(self.release, started))
+        queued = self.manager.submit(_blocking(self.release))
+        self.assertTrue(started.wait(5))
+        self.assertEqual(self.manager.cancel(queued.id)["status"], "cancelled")
+        self.manager.cancel(running.id)
+        running.future.result(timeout=5)
+        self.assertEqual(running.status, "cancelled")
+        self.assertEqual([e["msg"] for e in running.events(0)], ["start", "end"])
+        # 已结束的任务再次取消时从管理器中删除
+        self.assertEqual(self.manager.cancel(running.id)["status"], "cancelled")
+        self.assertIsNone(self.manager.get(running.id))
+        self.assertIsNone(self.manager.cancel("missing"))
+
+    def test_failure_is_recorded(self):
+        def make_events(cancel):
+            yield {"type": "log", "msg": "start"}
+            raise RuntimeError("boom")
+
+        with contextlib.redirect_stdout(io.StringIO()):  # 任务失败时会打印堆栈
+            job = self.manager.submit(make_events)
+            job.future.result(timeout=5)
+        self.assertEqual((job.status, job.error), ("failed", "boom"))
+        self.assertIn("boom", list(job.events(1))[0]["msg"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,28 @@
+"""LLM 回复缓存目录的路径校验"""
+
+import os
+import unittest
+
+from Scripts.llm_cache import DEFAULT_CACHE_DIR, cache_dir
+from Scripts.optimizer import build_llm_client
+
+
+class CacheDirTest(unittest.TestCase):
+    def test_name_stays_under_root(self):
+        self.assertEqual(cache_dir(), DEFAULT_CACHE_DIR)
+        self.assertEqual(cache_dir("bench"), os.path.join(DEFAULT_CACHE_DIR, "bench"))
+
+    def test_rejects_path_traversal(self):
+        for name in ("..", "../x", "a/b", "/tmp", "a\\b"):
+            with self.assertRaises(ValueError):
+                cache_dir(name)
+
+    def test_request_cannot_choose_directory(self):
+        client, _ = build_llm_client({"provider": "mock", "llm_cache": "record", "llm_cache_dir": "/tmp/elsewhere"})
+        self.assertEqual(client.cache_dir, DEFAULT_CACHE_DIR)
+        with self.assertRaises(ValueError):
+            build_llm_client({"provider": "mock", "llm_cache": "replay", "llm_cache_name": "../etc"})
+
+
+if __name__ == "__main__":
+    unittest.main()
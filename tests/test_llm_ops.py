@@ -0,0 +1,97 @@
+"""LLM 候选点生成：多候选请求的截止时间与批量回复的解析"""
+
+import asyncio
+import os
+import time
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from Scripts import llm_ops
+from Scripts.mock_llm import AsyncMockClient, MockClient
+
+RANGES = {"x1_range": [0, 10], "x2_range": [0, 10]}
+BEST = {"iteration": 0, "point": [50, 50], "penalty": 0.0, "objective": 1.0}
+TEMPLATE = os.path.join(os.path.dirname(llm_ops.__file__), "prompt_template_Chinese_Short.md")
+
+
+class _RecordingClient(AsyncMockClient):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.timeouts = []
+
+    async def acomplete(self, model, messages, temperature, n=1, timeout=None):
+        self.timeouts.append(timeout)
+        return await super().acomplete(model, messages, temperature, n, timeout)
+
+
+def proposals(client, num, deadline=None):
+    return llm_ops.generate_new_points_with_llm(num, [BEST], BEST, 0.7, 0.9, RANGES, [0, 100], client, 100, "m", TEMPLATE,
+                                                deadline=deadline)
+
+
+class ProposalDeadlineTest(unittest.TestCase):
+    def test_deadline_ends_requests_and_frees_the_pool(self):
+        # 请求数超过共享线程池的工作线程数：排队的请求被取消，已开始的在截止时刻结束
+        start = time.monotonic()
+        points = proposals(MockClient(latency=5.0, jitter=0.0), llm_ops.MAX_PROPOSAL_WORKERS + 8, deadline=0.2)
+        self.assertEqual(points, [])
+        self.assertLess(time.monotonic() - start, 1.0)
+        start = time.monotonic()
+        self.assertEqual(len(proposals(MockClient(), 4)), 4)
+        self.assertLess(time.monotonic() - start, 1.0)
+
+    def test_async_passes_deadline_as_timeout(self):
+        client = _RecordingClient()
+        points = asyncio.run(llm_ops.agenerate_new_points_with_llm(
+            3, [BEST], BEST, 0.7, 0.9, RANGES, [0, 100], client, 100, "m", TEMPLATE, deadline=2.0))
+        self.assertEqual(len(points), 3)
+        self.assertEqual(len(client.timeouts), 3)
+        self.assertTrue(all(t is not None and 0 < t <= 2.0 for t in client.timeouts))
+
+
+class BatchParseTest(unittest.TestCase):
+    def test_fenced_block_and_trailing_text(self):
+        content = ('好的，以下是新的设计点：\n```json\n[{"x1": 10, "x2": 20}, {"x1": 30, "x2": 40}]\n```\n'
+                   '这些点都位于可行域附近。')
+        objects = [obj for obj, _ in llm_ops.extract_json_objects(content)]
+        self.assertEqual(objects, [{"x1": 10, "x2": 20}, {"x1": 30, "x2": 40}])
+        points = llm_ops.parse_step_points(content, RANGES, [0, 100])
+        np.testing.assert_allclose(points, [[1.0, 2.0], [3.0, 4.0]])
+
+    def test_nested_braces(self):
+        content = '{"points": [{"x1": 10, "x2": 20}], "meta": {"note": "}{"}} {"x1": 50, "x2": 60}'
+        objects = [obj for obj, _ in llm_ops.extract_json_objects(content)]
+        # 外层对象不是设计点，继续在其内部查找；字符串中的花括号不影响解析
+        self.assertIn({"x1": 10, "x2": 20}, objects)
+        self.assertIn({"x1": 50, "x2": 60}, objects)
+        points = llm_ops.parse_step_points(content, RANGES, [0, 100])
+        np.testing.assert_allclose(points, [[1.0, 2.0], [5.0, 6.0]])
+
+    def test_malformed_objects_are_skipped(self):
+        content = ('[{"x1": 10, "x2": }, {"x1": 10}, {"x1": "a", "x2": 3}, {"x1": true, "x2": 3}, '
+                   '{"x1": 101, "x2": 3}, {"x1": 10, "x2": 20}, {"x1": 10, "x2": 20}, {"x1": 70, "x2": 8')
+        points = llm_ops.parse_step_points(content, RANGES, [0, 100])
+        np.testing.assert_allclose(points, [[1.0, 2.0]])
+        self.assertEqual(llm_ops.parse_step_points("没有设计点", RANGES, [0, 100]), [])
+
+    def test_limit(self):
+        content = '[{"x1": 1, "x2": 1}, {"x1": 2, "x2": 2}, {"x1": 3, "x2": 3}]'
+        self.assertEqual(len(llm_ops.parse_step_points(content, RANGES, [0, 100], limit=2)), 2)
+
+    def test_request_cannot_choose_batch_template(self):
+        from Scripts.optimizer import BATCH_TEMPLATE_PATH, optimization_events
+
+        config = dict(provider="mock", model="m", problem_scenario="math_2d_real", N=200, threshold=0,
+                      reliability_target=0.9, std=0.3, penalty_weight=100, max_iterations=1, stagnation_limit=10,
+                      target_range_min=0, target_range_max=100, temperature=0.7, top_p=0.9, max_tokens=100,
+                      adition_point_number=2, adition_point_std=0.2, random_seed=0, template_path=TEMPLATE,
+                      llm_batch_size=3, batch_template_path="/etc/passwd")
+        with mock.patch.object(llm_ops, "build_step_prompt", wraps=llm_ops.build_step_prompt) as build:
+            list(optimization_events(config, RANGES, [[5.0, 5.0]], MockClient()))
+        self.assertEqual({call.args[4] for call in build.call_args_list}, {BATCH_TEMPLATE_PATH})
+
+
+if __name__ == "__main__":
+    unittest.main()
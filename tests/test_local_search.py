@@ -0,0 +1,100 @@
+"""局部精化：批量模式搜索与主循环中的接受规则"""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from Scripts import checkpoint
+from Scripts.checkpoint import load_checkpoint
+from Scripts.design_space import DesignSpace
+from Scripts.local_search import is_better, pattern_search
+from Scripts.mock_llm import MockClient
+from Scripts.optimizer import optimization_events
+
+SPACE = DesignSpace({"x1_range": [0, 10], "x2_range": [0, 10]})
+TARGET = np.array([3.0, 7.0])
+
+
+class _Quadratic:
+    """目标为到 TARGET 的平方距离；x1 < lower_x1 的点不可行"""
+
+    def __init__(self, lower_x1=None):
+        self.lower_x1 = lower_x1
+        self.batches = []
+
+    def __call__(self, points):
+        self.batches.append(len(points))
+        results = []
+        for p in points:
+            p = np.asarray(p, dtype=float)
+            penalty = 0.0 if self.lower_x1 is None else max(0.0, self.lower_x1 - p[0])
+            results.append({"design_point": p, "cost": float(np.sum((p - TARGET) ** 2)), "penalty": penalty})
+        return results
+
+    def incumbent(self, point):
+        return self([point])[0]
+
+
+class PatternSearchTest(unittest.TestCase):
+    def test_converges_within_budget(self):
+        f = _Quadratic()
+        best, info = pattern_search(f, f.incumbent([5.0, 5.0]), SPACE, 1.0, 200)
+        np.testing.assert_allclose(best["design_point"], TARGET, atol=1e-3)
+        self.assertLessEqual(info["evaluations"], 200)
+        self.assertEqual(info["evaluations"], sum(f.batches[1:]))
+        self.assertGreater(info["improvements"], 0)
+
+    def test_budget_truncates_poll(self):
+        f = _Quadratic()
+        start = f.incumbent([5.0, 5.0])
+        # 试探顺序 +x1, +x2, -x1, -x2；预算 1 时只试探 +x1（无改进）
+        best, info = pattern_search(f, start, SPACE, 1.0, 1)
+        self.assertEqual((info["evaluations"], info["polls"]), (1, 1))
+        self.assertIs(best, start)
+        best, info = pattern_search(f, start, SPACE, 1.0, 3)
+        self.assertEqual((info["evaluations"], f.batches[-1]), (3, 3))
+        np.testing.assert_allclose(best["design_point"], [5.0, 6.0])
+
+    def test_zero_step_dimension_and_bounds(self):
+        f = _Quadratic()
+        best, _ = pattern_search(f, f.incumbent([0.0, 10.0]), SPACE, [0.0, 4.0], 50)
+        self.assertEqual(best["design_point"][0], 0.0)
+        self.assertTrue(SPACE.contains(best["design_point"]))
+        np.testing.assert_allclose(best["design_point"][1], 7.0, atol=1e-3)
+
+    def test_feasibility_first(self):
+        feasible = {"cost": 9.0, "penalty": 0.0}
+        self.assertTrue(is_better({"cost": 1.0, "penalty": 0.0}, feasible))
+        self.assertFalse(is_better({"cost": 1.0, "penalty": 0.5}, feasible))
+        self.assertTrue(is_better({"cost": 9.0, "penalty": 0.0}, {"cost": 1.0, "penalty": 0.5}))
+        self.assertTrue(is_better({"cost": 9.0, "penalty": 0.2}, {"cost": 1.0, "penalty": 0.5}))
+        f = _Quadratic(lower_x1=4.0)
+        best, _ = pattern_search(f, f.incumbent([5.0, 5.0]), SPACE, 1.0, 200)
+        self.assertEqual(best["penalty"], 0.0)
+        np.testing.assert_allclose(best["design_point"], [4.0, 7.0], atol=1e-3)
+
+
+class LocalRefinementTest(unittest.TestCase):
+    def test_refinement_moves_best_and_current_point(self):
+        config = dict(provider="mock", model="m", problem_scenario="math_2d_real", N=500, threshold=0,
+                      reliability_target=0.9, std=0.3, penalty_weight=100, max_iterations=1, stagnation_limit=10,
+                      target_range_min=0, target_range_max=100, temperature=0.7, top_p=0.9, max_tokens=100,
+                      adition_point_number=3, adition_point_std=0.2, random_seed=0, local_search_budget=8,
+                      checkpoint_name="refine",
+                      template_path=os.path.join(os.path.dirname(checkpoint.__file__), "prompt_template_Chinese_Short.md"))
+        with tempfile.TemporaryDirectory() as tmp, mock.patch.object(checkpoint, "CHECKPOINT_DIR", tmp):
+            events = list(optimization_events(config, {"x1_range": [0, 10], "x2_range": [0, 10]}, [[5.0, 5.0]],
+                                              MockClient()))
+            state = load_checkpoint("refine")
+        logs = [e["msg"] for e in events if e["type"] == "log"]
+        self.assertTrue(any("Local refinement!" in msg for msg in logs))
+        final = [e for e in events if e["type"] == "update"][-1]
+        np.testing.assert_array_equal(state.best_point, final["point"])
+        np.testing.assert_array_equal(state.current_point, state.best_point)
+
+
+if __name__ == "__main__":
+    unittest.main()
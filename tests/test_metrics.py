@@ -0,0 +1,74 @@
+"""服务器级指标的 Prometheus 文本格式"""
+
+import re
+import unittest
+
+from Scripts import metrics
+from Scripts.metrics import Counter, Histogram, render_metrics
+
+# 样本行：指标名{标签} 数值
+_SAMPLE_RE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{([a-zA-Z_][a-zA-Z0-9_]*="(\\.|[^"\\])*",?)*\})? '
+                        r'(-?[0-9.e+-]+|\+Inf|-Inf|NaN)$')
+
+
+class ExpositionFormatTest(unittest.TestCase):
+    def test_counter(self):
+        counter = Counter("t_total", "Test counter.", ("scenario",))
+        counter.inc(scenario="b")
+        counter.inc(2.5, scenario="a")
+        counter.inc(scenario="b")
+        self.assertEqual(counter.render(), [
+            "# HELP t_total Test counter.",
+            "# TYPE t_total counter",
+            't_total{scenario="a"} 2.5',
+            't_total{scenario="b"} 2',
+        ])
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = Histogram("t_seconds", "Test histogram.", buckets=(1.0, 0.1))
+        for value in (0.05, 0.5, 5.0):
+            histogram.observe(value)
+        self.assertEqual(histogram.render(), [
+            "# HELP t_seconds Test histogram.",
+            "# TYPE t_seconds histogram",
+            't_seconds_bucket{le="0.1"} 1',
+            't_seconds_bucket{le="1"} 2',
+            't_seconds_bucket{le="+Inf"} 3',
+            "t_seconds_sum 5.55",
+            "t_seconds_count 3",
+        ])
+
+    def test_label_values_are_escaped(self):
+        counter = Counter("t_total", "Test counter.", ("model",))
+        counter.inc(model='a"b\\c\nd')
+        self.assertEqual(counter.render()[-1], 't_total{model="a\\"b\\\\c\\nd"} 1')
+
+    def test_render_metrics_is_valid_exposition(self):
+        metrics.RUNS.inc(scenario="math_2d_real")
+        metrics.ITERATION_SECONDS.observe(0.3, scenario="math_2d_real")
+        metrics.record_llm_usage("mock", 'm"1', None)
+        text = render_metrics({"rbdo_eval_cache_entries": ("Evaluation cache entries.", 7)})
+        self.assertTrue(text.endswith("\n"))
+        families = {}
+        for line in text.splitlines():
+            if line.startswith("# HELP "):
+                continue
+            if line.startswith("# TYPE "):
+                _, _, name, kind = line.split(" ")
+                self.assertNotIn(name, families)
+                families[name] = kind
+                continue
+            match = _SAMPLE_RE.match(line)
+            self.assertIsNotNone(match, line)
+            name = match.group(1)
+            # 直方图的样本行带 _bucket / _sum / _count 后缀
+            family = name if name in families else re.sub(r"_(bucket|sum|count)$", "", name)
+            self.assertIn(family, families, line)
+        self.assertEqual(families["rbdo_runs_total"], "counter")
+        self.assertEqual(families["rbdo_iteration_seconds"], "histogram")
+        self.assertEqual(families["rbdo_eval_cache_entries"], "gauge")
+        self.assertIn("rbdo_eval_cache_entries 7\n", text)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+"""扰动候选点生成"""
+
+import unittest
+
+import numpy as np
+
+from Scripts.design_space import DesignSpace
+from Scripts.perturbation import PERTURBATION_METHODS, generate_perturbations
+
+SPACE = DesignSpace({"x1_range": [0, 1], "x2_range": [0, 10]})
+CENTER = np.array([0.05, 9.5])
+STD = np.array([0.1, 1.0])
+
+
+class PerturbationTest(unittest.TestCase):
+    def test_guaranteed_methods_return_n_points_in_bounds(self):
+        for method in ("truncnorm", "reflect", "sobol"):
+            points = generate_perturbations(CENTER, STD, 64, SPACE, method=method, rng=0)
+            self.assertEqual(points.shape, (64, 2), method)
+            self.assertTrue(SPACE.contains(points).all(), method)
+
+    def test_reject_keeps_only_points_in_bounds(self):
+        points = generate_perturbations(CENTER, STD, 200, SPACE, method="reject", rng=0)
+        self.assertLess(len(points), 200)
+        self.assertTrue(SPACE.contains(points).all())
+
+    def test_same_generator_state_same_points(self):
+        for method in PERTURBATION_METHODS:
+            a = generate_perturbations(CENTER, STD, 16, SPACE, method=method, rng=np.random.default_rng(3))
+            b = generate_perturbations(CENTER, STD, 16, SPACE, method=method, rng=np.random.default_rng(3))
+            np.testing.assert_array_equal(a, b)
+
+    def test_truncnorm_matches_normal_far_from_bounds(self):
+        center = np.array([0.5, 5.0])
+        points = generate_perturbations(center, [0.01, 0.1], 20000, SPACE, method="truncnorm", rng=1)
+        np.testing.assert_allclose(points.mean(axis=0), center, atol=0.005)
+        np.testing.assert_allclose(points.std(axis=0), [0.01, 0.1], rtol=0.05)
+
+    def test_zero_std_and_empty(self):
+        points = generate_perturbations([2.0, 5.0], 0.0, 4, SPACE, method="truncnorm", rng=0)
+        np.testing.assert_array_equal(points, np.tile([1.0, 5.0], (4, 1)))
+        self.assertEqual(generate_perturbations(CENTER, STD, 0, SPACE, rng=0).shape, (0, 2))
+
+    def test_unknown_method(self):
+        with self.assertRaises(ValueError):
+            generate_perturbations(CENTER, STD, 4, SPACE, method="gauss")
+
+
+if __name__ == "__main__":
+    unittest.main()
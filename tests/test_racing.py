@@ -0,0 +1,98 @@
+"""候选点竞速：淘汰顺序、幸存点与样本预算"""
+
+import math
+import unittest
+
+import numpy as np
+
+from Scripts.racing import dominated, race, ranking_key
+from Scripts.rbdo_utils import compute_penalty, wilson_interval
+
+TARGET = 0.9
+WEIGHT = 100.0
+
+
+class _Evaluator:
+    """按每个候选点的真实可靠性与目标函数值给出确定性的评估结果（置信区间随样本数收窄）"""
+
+    def __init__(self, truth):
+        self.truth = truth
+        self.calls = []
+
+    def __call__(self, points, n):
+        self.calls.append((list(points), n))
+        results = []
+        for p in points:
+            reliability, cost = self.truth[p]
+            count = round(reliability * n)
+            lower, upper = wilson_interval(np.array([count]), n)
+            rel = np.array([count / n])
+            results.append({"design_point": p, "cost": cost, "penalty": float(compute_penalty(rel, TARGET, WEIGHT)),
+                            "ci_lower": lower, "ci_upper": upper, "n_samples": n})
+        return results
+
+
+def race_points(truth, N=6400, **kwargs):
+    evaluate = _Evaluator(truth)
+    winner, evaluated, schedule = race(evaluate, list(truth), N, TARGET, WEIGHT, **kwargs)
+    return evaluate, winner, evaluated, schedule
+
+
+class RacingTest(unittest.TestCase):
+    def test_elimination_follows_ranking(self):
+        # 可靠性略高于目标：各点都不能确定可行，只按排名减半；可行点按目标函数值排序，不可行点被淘汰
+        truth = {f"p{i}": (0.91, float(i)) for i in range(6)}
+        truth.update({f"q{i}": (0.5, 0.0) for i in range(2)})
+        evaluate, winner, _, schedule = race_points(truth, initial_samples=400)
+        self.assertEqual(winner["design_point"], "p0")
+        self.assertEqual(schedule, [(400, 8), (800, 4), (1600, 2), (6400, 1)])
+        survivors = [points for points, _ in evaluate.calls]
+        self.assertEqual(survivors[1:], [["p0", "p1", "p2", "p3"], ["p0", "p1"], ["p0"]])
+
+    def test_dominated_points_are_dropped_before_halving(self):
+        # 确定可行且目标更低的点支配其余可行点，可靠性确定不足的点被确定可行的点支配
+        truth = {"a": (0.999, 1.0), "b": (0.999, 2.0), "c": (0.2, 0.0), "d": (0.999, 3.0)}
+        evaluate, winner, _, schedule = race_points(truth, initial_samples=1000)
+        self.assertEqual(winner["design_point"], "a")
+        self.assertEqual(schedule, [(1000, 4), (6400, 1)])
+
+    def test_survivor_never_empty(self):
+        rng = np.random.default_rng(0)
+        for _ in range(200):
+            K = int(rng.integers(1, 12))
+            truth = {i: (float(rng.choice([rng.uniform(0.0, 1.0), 1.0])), float(rng.integers(0, 3))) for i in range(K)}
+            evaluate, winner, _, schedule = race_points(truth, N=int(rng.integers(50, 5000)),
+                                                        eta=float(rng.choice([1.5, 2.0, 3.0])), min_samples=10)
+            self.assertTrue(all(count >= 1 for _, count in schedule))
+            self.assertIn(winner["design_point"], truth)
+            results = evaluate(list(truth), 100)
+            self.assertFalse(dominated(results, TARGET, WEIGHT).all())
+
+    def test_budget_accounting(self):
+        truth = {i: (0.85 + 0.01 * i, 10.0 - i) for i in range(10)}
+        N = 4000
+        evaluate, winner, evaluated, schedule = race_points(truth, N=N)
+        used = sum(r["n_samples"] for r in evaluated)
+        self.assertEqual(used, sum(n * count for n, count in schedule))
+        self.assertEqual(len(evaluated), sum(count for _, count in schedule))
+        self.assertEqual(schedule[-1][0], N)
+        self.assertEqual(winner["n_samples"], N)
+        self.assertLess(used, len(truth) * N)
+        # 自动首轮样本数：N / eta^⌈log_eta K⌉
+        self.assertEqual(schedule[0], (int(N / 2 ** math.ceil(math.log2(10))), 10))
+
+    def test_single_candidate_and_invalid_eta(self):
+        _, winner, evaluated, schedule = race_points({"only": (0.95, 1.0)}, N=500)
+        self.assertEqual((winner["design_point"], schedule), ("only", [(500, 1)]))
+        self.assertEqual(len(evaluated), 1)
+        with self.assertRaises(ValueError):
+            race_points({"only": (0.95, 1.0)}, eta=1.0)
+
+    def test_ranking_key(self):
+        feasible = {"penalty": 0.0, "cost": 5.0}
+        infeasible = {"penalty": 0.1, "cost": 1.0}
+        self.assertLess(ranking_key(feasible), ranking_key(infeasible))
+
+
+if __name__ == "__main__":
+    unittest.main()
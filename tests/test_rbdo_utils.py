@@ -0,0 +1,78 @@
+"""蒙特卡洛可靠性分析：自适应序贯采样与低差异序列采样"""
+
+import unittest
+
+import numpy as np
+
+from Scripts.problems import PROBLEM_REGISTRY
+from Scripts.rbdo_utils import _sequential_counts, reliability_analysis_batch, wilson_interval
+
+CON = PROBLEM_REGISTRY["math_2d_real"]["con"]
+STD = 0.3464
+# 依次为：明显可靠、明显不可靠、第 1 条约束可靠性约 0.856（靠近下面的目标）
+POINTS = np.array([[5.0, 5.0], [1.0, 1.0], [3.0, 3.0]])
+TARGET = 0.86
+
+
+class AdaptiveSamplingTest(unittest.TestCase):
+    def test_decided_points_stop_early(self):
+        counts, n_used = _sequential_counts(POINTS, 64000, STD, 0, CON, 10 ** 6, adaptive=True,
+                                            reliability_target=TARGET, initial_samples=1000, rng=0)
+        np.testing.assert_array_equal(n_used[:2], [1000, 1000])
+        self.assertGreater(n_used[2], 1000)
+        self.assertTrue(np.all(counts <= n_used[:, None]))
+
+    def test_stopping_rule_is_wilson_interval(self):
+        counts, n_used = _sequential_counts(POINTS, 64000, STD, 0, CON, 10 ** 6, adaptive=True,
+                                            reliability_target=TARGET, initial_samples=1000, rng=1)
+        lower, upper = wilson_interval(counts, n_used[:, None])
+        decided = np.all((lower >= TARGET) | (upper < TARGET), axis=1)
+        # 提前停止的点其置信区间必然已可判定；用满 N 的点则不要求
+        self.assertTrue(np.all(decided[n_used < 64000]))
+
+    def test_matches_plain_mc(self):
+        adaptive, info = reliability_analysis_batch(POINTS, 64000, STD, 0, CON, adaptive=True, reliability_target=TARGET,
+                                                    seed=0, return_info=True)
+        plain = reliability_analysis_batch(POINTS, 64000, STD, 0, CON, seed=0)
+        tol = np.maximum(info["ci_width"], 0.005)
+        self.assertTrue(np.all(np.abs(adaptive - plain) <= tol))
+
+    def test_not_adaptive_uses_all_samples(self):
+        _, n_used = _sequential_counts(POINTS, 500, STD, 0, CON, 10 ** 6, rng=0)
+        np.testing.assert_array_equal(n_used, [500, 500, 500])
+
+    def test_requires_target_and_growth(self):
+        with self.assertRaises(ValueError):
+            _sequential_counts(POINTS, 500, STD, 0, CON, 10 ** 6, adaptive=True)
+        with self.assertRaises(ValueError):
+            _sequential_counts(POINTS, 500, STD, 0, CON, 10 ** 6, adaptive=True, reliability_target=0.9, growth=1.0)
+
+
+class QmcSamplerTest(unittest.TestCase):
+    def test_samplers_match_plain_mc(self):
+        reference = reliability_analysis_batch(POINTS, 200000, STD, 0, CON, seed=0)
+        for sampler in ("sobol", "halton", "lhs"):
+            rel = reliability_analysis_batch(POINTS, 4096, STD, 0, CON, sampler=sampler, seed=0)
+            np.testing.assert_allclose(rel, reference, atol=0.01, err_msg=sampler)
+
+    def test_seed_reproducible(self):
+        for sampler in ("sobol", "halton", "lhs"):
+            a = reliability_analysis_batch(POINTS, 1024, STD, 0, CON, sampler=sampler, seed=5)
+            b = reliability_analysis_batch(POINTS, 1024, STD, 0, CON, sampler=sampler, seed=5)
+            np.testing.assert_array_equal(a, b, err_msg=sampler)
+
+    def test_replicates_report_std_error(self):
+        rel, info = reliability_analysis_batch(POINTS, 4096, STD, 0, CON, sampler="sobol", replicates=4, seed=0,
+                                               return_info=True)
+        np.testing.assert_array_equal(info["n_samples"], [4096] * 3)
+        self.assertEqual(info["std_error"].shape, rel.shape)
+        self.assertTrue(np.all(info["std_error"] < 0.01))
+
+    def test_rejects_adaptive_replicates(self):
+        with self.assertRaises(ValueError):
+            reliability_analysis_batch(POINTS, 4096, STD, 0, CON, sampler="sobol", replicates=2, adaptive=True,
+                                       reliability_target=TARGET)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+"""重要性抽样、FORM/SORM 与普通蒙特卡洛的一致性检查"""
+
+import unittest
+
+import numpy as np
+
+from Scripts.problems import PROBLEM_REGISTRY
+from Scripts.rbdo_utils import reliability_analysis_batch
+from Scripts.reliability_methods import importance_sampling_batch
+
+STD = 0.3464
+
+
+class ImportanceSamplingTest(unittest.TestCase):
+    def test_matches_mc_when_mean_violates_constraint(self):
+        # math_2d_real 第 1 条约束在这些点的均值处不满足（beta < 0）
+        con = PROBLEM_REGISTRY["math_2d_real"]["con"]
+        points = np.array([[0.4, 0.4], [1.0, 1.0], [2.0, 2.0]])
+        is_rel, info = importance_sampling_batch(points, STD, 0, con, n_samples=20000, seed=0)
+        mc_rel = reliability_analysis_batch(points, 200000, STD, 0, con, seed=0)
+        self.assertTrue(np.all(info["beta"][:, 0] < 0))
+        np.testing.assert_allclose(is_rel[:, 0], mc_rel[:, 0], atol=0.01)
+
+    def test_matches_mc_for_high_reliability(self):
+        con = PROBLEM_REGISTRY["math_2d_real"]["con"]
+        points = np.array([[3.5, 3.0]])
+        is_rel, _ = importance_sampling_batch(points, STD, 0, con, n_samples=20000, seed=0)
+        mc_rel = reliability_analysis_batch(points, 200000, STD, 0, con, seed=0)
+        np.testing.assert_allclose(is_rel, mc_rel, atol=0.01)
+
+
+class MethodDispatchTest(unittest.TestCase):
+    # 第 1、2 条约束在这些点上的可靠性覆盖 0.08 ~ 1
+    POINTS = np.array([[3.5, 3.0], [5.0, 5.0], [3.0, 3.0], [4.0, 2.0], [2.5, 2.5]])
+
+    def setUp(self):
+        self.con = PROBLEM_REGISTRY["math_2d_real"]["con"]
+        self.mc = reliability_analysis_batch(self.POINTS, 200000, STD, 0, self.con, seed=0)
+
+    def test_form_matches_mc(self):
+        for sorm in (False, True):
+            rel, info = reliability_analysis_batch(self.POINTS, 20000, STD, 0, self.con, method="form", sorm=sorm,
+                                                   return_info=True)
+            self.assertFalse(info["fallback"].any())
+            np.testing.assert_allclose(rel[:, :2], self.mc[:, :2], atol=0.02, err_msg=f"sorm={sorm}")
+
+    def test_is_matches_mc(self):
+        rel = reliability_analysis_batch(self.POINTS, 20000, STD, 0, self.con, method="is", is_samples=20000, seed=0)
+        np.testing.assert_allclose(rel[:, :2], self.mc[:, :2], atol=0.01)
+
+    def test_unknown_method(self):
+        with self.assertRaises(ValueError):
+            reliability_analysis_batch(self.POINTS, 1000, STD, 0, self.con, method="sorm")
+
+
+if __name__ == "__main__":
+    unittest.main()
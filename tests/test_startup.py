@@ -0,0 +1,50 @@
+"""启动开销回归检查：后端入口模块不应在导入时加载重量级依赖，冷启动导入耗时应在预算内"""
+
+import json
+import os
+import subprocess
+import sys
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+HEAVY_MODULES = ("scipy", "openai", "sklearn")
+# 冷启动导入耗时上限（秒），较慢的机器可通过环境变量放宽
+IMPORT_BUDGET = float(os.getenv("RBDO_IMPORT_BUDGET", "1.5"))
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def cold_import(module):
+    """在全新解释器中导入 module，返回 {"seconds": 耗时, "loaded": 已加载的重量级模块}"""
+    code = PROBE.format(module=module, heavy=HEAVY_MODULES)
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+class StartupTest(unittest.TestCase):
+    def check(self, module):
+        # 首次运行包含字节码编译，取两次中的较快者
+        results = [cold_import(module) for _ in range(2)]
+        self.assertEqual(results[-1]["loaded"], [], f"{module} 导入时加载了重量级依赖")
+        seconds = min(r["seconds"] for r in results)
+        self.assertLessEqual(seconds, IMPORT_BUDGET, f"{module} 冷启动导入耗时 {seconds:.3f}s 超出预算")
+
+    def test_optimizer(self):
+        self.check("Scripts.optimizer")
+
+    def test_app(self):
+        self.check("app")
+
+    def test_asgi(self):
+        self.check("asgi")
+
+
+if __name__ == "__main__":
+    unittest.main()